@@ -0,0 +1,111 @@
+"""
+基准测试：包导入耗时与惰性工具注册
+
+1. 冷启动导入：在全新子进程中导入 hello_agents_source_code，统计耗时（取中位数），
+   并与同时导入 openai / httpx / numpy（延迟导入前的行为）进行对比，列出导入后已加载的重量级模块
+2. 工具注册：模拟构造开销较大的工具（创建API客户端、连接向量库等），
+   对比直接注册与 register_lazy 的启动耗时，以及只用到其中一个工具时的总耗时
+
+运行方式（在 hello-agents 目录下）：
+    python benchmarks/bench_import_time.py
+"""
+
+import os
+import sys
+import json
+import time
+import statistics
+import subprocess
+from contextlib import redirect_stdout
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ("openai", "httpx", "numpy", "tavily", "serpapi")
+
+IMPORT_SNIPPET = """
+import sys, time, json
+start = time.perf_counter()
+import hello_agents_source_code
+{extra}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(extra: str, runs: int) -> dict:
+    code = IMPORT_SNIPPET.format(extra=extra, heavy=HEAVY_MODULES)
+    samples, loaded = [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result["elapsed"])
+        loaded = result["loaded"]
+    return {"median_ms": statistics.median(samples) * 1000, "loaded": loaded}
+
+
+def measure_registration(tools: int, construct_cost: float) -> dict:
+    from hello_agents_source_code.tools.base import Tool, ToolParameter
+    from hello_agents_source_code.tools.registry import ToolRegistry
+
+    class HeavyTool(Tool):
+        """构造时需要建立连接的工具"""
+
+        def __init__(self, name: str):
+            time.sleep(construct_cost)
+            super().__init__(name=name, description=f"{name}: 需要远程服务的工具")
+
+        def run(self, parameters):
+            return f"{self.name} -> {parameters.get('input', '')}"
+
+        def get_parameters(self):
+            return [ToolParameter(name="input", type="string", description="输入")]
+
+    results = {}
+    with redirect_stdout(open(os.devnull, "w")):
+        start = time.perf_counter()
+        registry = ToolRegistry()
+        for i in range(tools):
+            registry.register_tool(HeavyTool(f"tool_{i}"))
+        startup = time.perf_counter() - start
+        registry.execute_tool("tool_0", "hello")
+        results["eager"] = (startup, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        registry = ToolRegistry()
+        for i in range(tools):
+            registry.register_lazy(
+                f"tool_{i}", f"tool_{i}: 需要远程服务的工具", lambda name=f"tool_{i}": HeavyTool(name)
+            )
+        startup = time.perf_counter() - start
+        registry.get_tools_description()
+        registry.execute_tool("tool_0", "hello")
+        results["lazy"] = (startup, time.perf_counter() - start)
+    return results
+
+
+def main():
+    runs = 7
+    print("== 冷启动导入（全新子进程，中位数）==")
+    current = measure_import("", runs)
+    eager = measure_import("import openai, httpx\ntry:\n    import numpy\nexcept ImportError:\n    pass", runs)
+    print(f"{'mode':<28} | {'import ms':>9} | loaded heavy modules")
+    print("-" * 70)
+    print(f"{'import hello_agents':<28} | {current['median_ms']:>9.1f} | {', '.join(current['loaded']) or '-'}")
+    print(f"{'eager openai/httpx/numpy':<28} | {eager['median_ms']:>9.1f} | {', '.join(eager['loaded']) or '-'}")
+    print(f"冷启动导入耗时: {eager['median_ms']:.1f} -> {current['median_ms']:.1f} ms")
+
+    print("\n== 工具注册（每个工具构造耗时 0.2s）==")
+    print(f"{'tools':>5} | {'mode':<6} | {'startup ms':>10} | {'startup + 1 call ms':>19}")
+    print("-" * 52)
+    for tools in (5, 10):
+        results = measure_registration(tools, construct_cost=0.2)
+        for mode, (startup, total) in results.items():
+            print(f"{tools:>5} | {mode:<6} | {startup * 1000:>10.1f} | {total * 1000:>19.1f}")
+        print("-" * 52)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+基准测试：每条记忆的内存占用（MemoryItem对象字典 vs 列式存储）
+
+用tracemalloc统计保存N条记忆新增的内存，元数据仿照情景/语义记忆的常见字段
+（session_id、location、mood、key_concepts等）：
+- objects: {记忆ID: MemoryItem}，每条记忆一个对象 + 一个元数据字典
+- columnar: ColumnarMemoryStore，类型/用户ID驻留为整数编号，时间戳与重要性存入array，
+  元数据打包为二进制（msgpack，未安装时为紧凑JSON）
+同时给出按用户+类型过滤的查询耗时，以及读取后的MemoryItem与原记忆是否一致。
+
+测试的是 chapter8/my_columnar_store.py，基础类型依赖已安装的 hello_agents.memory，
+运行方式（在 hello-agents 目录下）：
+    python benchmarks/bench_memory_store.py
+"""
+
+import time
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+
+from hello_agents.memory import MemoryItem
+
+from chapter8_loader import load_chapter8_module
+
+columnar_store = load_chapter8_module("my_columnar_store.py", "hello_agents.memory.storage")
+ColumnarMemoryStore, msgpack = columnar_store.ColumnarMemoryStore, columnar_store.msgpack
+
+MEMORY_TYPES = ("working", "episodic", "semantic", "perceptual")
+LOCATIONS = ("办公室", "家里", "咖啡厅", "会议室")
+MOODS = ("专注", "愉快", "疲惫", "平静")
+CONCEPTS = ("Python", "机器学习", "数据库", "智能体", "向量检索", "记忆系统", "工具调用")
+
+
+def make_items(count: int, users: int = 20, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    now = datetime.now()
+    items = []
+    for i in range(count):
+        metadata = {}
+        if rng.random() < 0.8:  # 部分记忆没有元数据
+            metadata = {
+                "session_id": f"session_{i // 50}",
+                "location": rng.choice(LOCATIONS),
+                "mood": rng.choice(MOODS),
+                "key_concepts": rng.sample(CONCEPTS, 2),
+            }
+        items.append(MemoryItem(
+            id=f"mem_{i:08d}",
+            content=f"用户讨论了{rng.choice(CONCEPTS)}的第{i}个问题，topic{i % 97}",
+            memory_type=rng.choice(MEMORY_TYPES),
+            user_id=f"user_{i % users}",
+            timestamp=now - timedelta(minutes=rng.random() * 10_000),
+            importance=round(rng.random(), 3),
+            metadata=metadata
+        ))
+    return items
+
+
+def measure_bytes(build) -> tuple:
+    """返回 (容器, 新增字节数)；记忆对象在build内创建，列式存储写入后原对象即被释放"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    container = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return container, after - before
+
+
+def main():
+    print(f"元数据格式: {'msgpack' if msgpack is not None else 'json（未安装msgpack）'}")
+    print(f"{'memories':>8} | {'objects B/mem':>13} | {'columnar B/mem':>14} | {'saved':>6} | "
+          f"{'objects find ms':>15} | {'columnar find ms':>16} | same result")
+    print("-" * 104)
+    for count in (1_000, 10_000, 50_000):
+        objects, object_bytes = measure_bytes(lambda: {item.id: item for item in make_items(count)})
+
+        def build_store():
+            store = ColumnarMemoryStore()
+            for item in make_items(count):
+                store.add(item)
+            return store
+
+        store, store_bytes = measure_bytes(build_store)
+
+        start = time.perf_counter()
+        expected = sorted(
+            (m for m in objects.values() if m.user_id == "user_3" and m.memory_type == "episodic"),
+            key=lambda m: m.timestamp, reverse=True
+        )
+        object_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        found = store.find(user_id="user_3", memory_type="episodic")
+        store_ms = (time.perf_counter() - start) * 1000
+
+        same = (
+            [m.id for m in found] == [m.id for m in expected]
+            and all(store.get(m.id).metadata == m.metadata for m in expected)
+        )
+        print(
+            f"{count:>8} | {object_bytes / count:>13.0f} | {store_bytes / count:>14.0f} | "
+            f"{1 - store_bytes / object_bytes:>6.0%} | {object_ms:>15.2f} | {store_ms:>16.2f} | {same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+基准测试：ReActAgent 稳定前缀 + 追加式历史 vs 每步整体渲染
+
+使用离线的模拟LLM运行 5 / 20 / 50 步的ReAct流程，分别测试默认模板与执行历史位于
+模板中部的模板（历史之后还有任务说明），统计：
+- 发送的提示词总token数（按约3字符/token估算）
+- 可命中服务端前缀缓存的token数（与上一次请求的最长公共前缀）
+- 未命中前缀缓存、需要重新prefill的token数
+- 提示词构建耗时
+
+运行方式（在 hello-agents 目录下）：
+    python benchmarks/bench_react_prompt_prefix.py
+"""
+
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.agents.react_agent import ReActAgent, DEFAULT_REACT_PROMPT
+from hello_agents_source_code.tools.registry import ToolRegistry
+
+
+class ScriptedLLM:
+    """按脚本返回固定步数的Action，最后返回Finish，并记录每次请求"""
+
+    provider = "benchmark"
+
+    def __init__(self, steps: int):
+        self.steps = steps
+        self.requests: list[str] = []
+        self.build_time = 0.0
+        self._last_return = None
+
+    def invoke(self, messages, **kwargs) -> str:
+        # 从上次返回到本次调用之间的时间即为Agent构建提示词与执行工具的耗时
+        if self._last_return is not None:
+            self.build_time += time.perf_counter() - self._last_return
+        self.requests.append("".join(f"<{m['role']}>{m['content']}" for m in messages))
+        step = len(self.requests)
+        if step > self.steps:
+            reply = "Thought: 信息已足够\nAction: Finish[完成]"
+        else:
+            reply = f"Thought: 第{step}步需要更多信息\nAction: lookup[关键词{step}]"
+        self._last_return = time.perf_counter()
+        return reply
+
+
+class LegacyReActAgent(ReActAgent):
+    """每一步都整体渲染提示词的旧实现"""
+
+    def _build_prompt_prefix(self, question):
+        return None
+
+
+# 执行历史放在任务说明之前的模板：整体渲染时历史之后的内容每一步都会错位
+MID_HISTORY_PROMPT = DEFAULT_REACT_PROMPT.replace("## 执行历史\n{history}\n\n", "").replace(
+    "## 当前任务", "## 执行历史\n{history}\n\n## 当前任务"
+)
+
+
+def build_registry() -> ToolRegistry:
+    registry = ToolRegistry()
+    with redirect_stdout(open(os.devnull, "w")):
+        for i in range(20):
+            registry.register_function(
+                f"tool_{i}",
+                f"第{i}个示例工具，用于演示提示词中工具描述的体积。" * 3,
+                lambda text: "结果" * 40,
+            )
+        registry.register_function("lookup", "查询资料", lambda text: f"关于{text}的资料：" + "内容" * 60)
+    return registry
+
+
+def common_prefix_len(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def measure(agent_cls, steps: int, template: str) -> dict:
+    llm = ScriptedLLM(steps)
+    agent = agent_cls("bench", build_registry(), llm, max_steps=steps + 1, custom_prompt=template)
+    with redirect_stdout(open(os.devnull, "w")):
+        agent.run("请综合多个来源回答一个需要多步检索的问题")
+
+    total = cached = 0
+    previous = ""
+    for request in llm.requests:
+        total += len(request)
+        cached += common_prefix_len(previous, request)
+        previous = request
+    return {
+        "prompt_tokens": total // 3,
+        "cached_tokens": cached // 3,
+        "uncached_tokens": (total - cached) // 3,
+        "build_ms": llm.build_time * 1000,
+    }
+
+
+def main():
+    for title, template in (("默认模板", DEFAULT_REACT_PROMPT), ("历史位于模板中部", MID_HISTORY_PROMPT)):
+        print(f"\n== {title} ==")
+        print(f"{'steps':>5} | {'mode':<8} | {'prompt tok':>10} | {'prefix-cached':>13} | {'uncached':>9} | {'build ms':>8}")
+        print("-" * 70)
+        for steps in (5, 20, 50):
+            legacy = measure(LegacyReActAgent, steps, template)
+            current = measure(ReActAgent, steps, template)
+            for mode, result in (("legacy", legacy), ("prefix", current)):
+                print(
+                    f"{steps:>5} | {mode:<8} | {result['prompt_tokens']:>10} | {result['cached_tokens']:>13} | "
+                    f"{result['uncached_tokens']:>9} | {result['build_ms']:>8.2f}"
+                )
+            print(
+                f"{'':>5} | 未命中前缀缓存token: {legacy['uncached_tokens']} -> {current['uncached_tokens']}，"
+                f"构建耗时: {legacy['build_ms']:.2f} -> {current['build_ms']:.2f} ms"
+            )
+            print("-" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+基准测试：memory.db 持续写入吞吐量（逐条连接提交 vs WAL + 单写线程批量提交）
+
+- legacy: 每次添加记忆都新建连接、写入用户与记忆、commit后关闭（回滚日志模式，每次提交fsync），
+  即智能体每次工具调用写一条记忆的做法
+- tuned: SQLiteMemoryStore，WAL + synchronous=NORMAL，后台单写线程按批提交，
+  预编译语句缓存，读连接池
+分别统计单线程与多线程（模拟多个智能体同时写入）的吞吐量，最后给出常见查询的执行计划与耗时。
+
+测试的是 chapter8/my_sqlite_store.py，基础类型依赖已安装的 hello_agents.memory，
+运行方式（在 hello-agents 目录下）：
+    python benchmarks/bench_sqlite_store.py
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import tempfile
+import threading
+from contextlib import redirect_stdout
+
+from chapter8_loader import load_chapter8_module
+
+SQLiteMemoryStore = load_chapter8_module("my_sqlite_store.py", "hello_agents.memory.storage").SQLiteMemoryStore
+
+LEGACY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, name TEXT, properties TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE IF NOT EXISTS memories (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, content TEXT NOT NULL,
+    memory_type TEXT NOT NULL, timestamp INTEGER NOT NULL, importance REAL NOT NULL, properties TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id));
+CREATE INDEX IF NOT EXISTS idx_memories_user_id ON memories (user_id);
+CREATE INDEX IF NOT EXISTS idx_memories_type ON memories (memory_type);
+CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories (timestamp);
+CREATE INDEX IF NOT EXISTS idx_memories_importance ON memories (importance);
+"""
+
+MEMORY_TYPES = ("working", "episodic", "semantic", "perceptual")
+
+
+def make_rows(count: int, prefix: str = "m", users: int = 20, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    now = int(time.time())
+    return [
+        (
+            f"{prefix}{i}", f"user_{i % users}", f"用户讨论了第{i}个问题 topic{i % 97}",
+            rng.choice(MEMORY_TYPES), now - rng.randrange(86_400 * 30), round(rng.random(), 3),
+            {"session_id": f"session_{i // 50}", "tags": ["bench"]}
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_add(db_path: str, row: tuple):
+    memory_id, user_id, content, memory_type, timestamp, importance, properties = row
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT OR IGNORE INTO users (id, name) VALUES (?, ?)", (user_id, user_id))
+    conn.execute(
+        "INSERT OR REPLACE INTO memories (id, user_id, content, memory_type, timestamp, importance, properties) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (memory_id, user_id, content, memory_type, timestamp, importance, json.dumps(properties))
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_threads(target, rows: list, threads: int) -> float:
+    chunks = [rows[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=target, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def measure_legacy(directory: str, count: int, threads: int) -> float:
+    db_path = os.path.join(directory, f"legacy_{threads}.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+
+    def worker(chunk):
+        for row in chunk:
+            for attempt in range(50):
+                try:
+                    legacy_add(db_path, row)
+                    break
+                except sqlite3.OperationalError:  # database is locked
+                    time.sleep(0.001 * (attempt + 1))
+
+    return count / run_threads(worker, make_rows(count), threads)
+
+
+def measure_tuned(directory: str, count: int, threads: int) -> tuple:
+    store = SQLiteMemoryStore(os.path.join(directory, f"tuned_{threads}.db"))
+
+    def worker(chunk):
+        for row in chunk:
+            store.add_memory(*row)
+
+    rows = make_rows(count)
+    start = time.perf_counter()
+    run_threads(worker, rows, threads)
+    store.flush()
+    elapsed = time.perf_counter() - start
+    stats = store.get_database_stats()
+    return count / elapsed, stats, store
+
+
+def explain(store: SQLiteMemoryStore, sql: str, params: tuple) -> str:
+    with store._reader() as conn:
+        plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return "; ".join(row[-1] for row in plan)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory, redirect_stdout(open(os.devnull, "w")):
+        results = []
+        for threads, legacy_count, tuned_count in ((1, 500, 50_000), (4, 500, 50_000)):
+            legacy_rate = measure_legacy(directory, legacy_count, threads)
+            tuned_rate, stats, store = measure_tuned(directory, tuned_count, threads)
+            results.append((threads, legacy_rate, tuned_rate, stats))
+            if threads == 1:
+                query_store = store
+            else:
+                store.close()
+
+        queries = [
+            ("user + type + time range",
+             "SELECT * FROM memories WHERE user_id = ? AND memory_type = ? AND timestamp >= ? "
+             "ORDER BY importance DESC, timestamp DESC LIMIT 10",
+             ("user_3", "episodic", int(time.time()) - 86_400 * 7),
+             dict(user_id="user_3", memory_type="episodic", start_time=int(time.time()) - 86_400 * 7, limit=10)),
+            ("user + importance threshold",
+             "SELECT * FROM memories WHERE user_id = ? AND importance >= ? "
+             "ORDER BY importance DESC, timestamp DESC LIMIT 10",
+             ("user_3", 0.9),
+             dict(user_id="user_3", importance_threshold=0.9, limit=10)),
+        ]
+        plans = []
+        for label, sql, params, kwargs in queries:
+            start = time.perf_counter()
+            for _ in range(200):
+                query_store.search_memories(**kwargs)
+            plans.append((label, (time.perf_counter() - start) / 200 * 1000, explain(query_store, sql, params)))
+        query_store.close()
+
+    print(f"{'threads':>7} | {'legacy adds/s':>13} | {'tuned adds/s':>12} | {'speedup':>8} | {'avg batch':>9}")
+    print("-" * 62)
+    for threads, legacy_rate, tuned_rate, stats in results:
+        print(
+            f"{threads:>7} | {legacy_rate:>13.0f} | {tuned_rate:>12.0f} | "
+            f"{tuned_rate / legacy_rate:>7.1f}x | {stats['avg_batch_size']:>9.1f}"
+        )
+    print()
+    for label, ms, plan in plans:
+        print(f"{label:<28} {ms:>6.3f} ms  {plan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+基准测试：WorkingMemory 插入吞吐量（堆 + 惰性删除 vs 每次插入线性扫描）
+
+容量填满后持续插入新记忆，每次插入都会触发过期检查与容量淘汰，分别统计：
+- legacy: 每次插入线性扫描全部记忆做过期清理，并用min()寻找优先级最低的记忆
+- heap: 过期时间与优先级两个最小堆，出堆时惰性跳过已删除的条目
+两者淘汰结果一致，插入吞吐量应随容量增长基本保持不变。
+
+测试的是 chapter8/my_working_memory.py，基础类型依赖已安装的 hello_agents.memory，
+运行方式（在 hello-agents 目录下）：
+    python benchmarks/bench_working_memory.py
+"""
+
+import time
+import random
+from datetime import datetime, timedelta
+
+from hello_agents.memory import MemoryItem, MemoryConfig
+
+from chapter8_loader import load_chapter8_module
+
+WorkingMemory = load_chapter8_module("my_working_memory.py", "hello_agents.memory.types").WorkingMemory
+
+
+class LegacyWorkingMemory(WorkingMemory):
+    """每次插入都线性扫描的旧实现"""
+
+    def _expire_old_memories(self):
+        cutoff = datetime.now() - timedelta(minutes=self.max_age_minutes)
+        for memory_id in [m.id for m in self.memories.values() if m.timestamp < cutoff]:
+            self.remove(memory_id)
+
+    def _remove_lowest_priority_memory(self):
+        lowest = min(
+            self.memories.values(),
+            key=lambda m: m.importance * self._calculate_time_decay(m.timestamp)
+        )
+        self.remove(lowest.id)
+
+
+def make_items(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    now = datetime.now()
+    return [
+        MemoryItem(
+            id=f"m{i}",
+            content=f"工作记忆 第{i}条 topic{i % 97} item{i % 13}",
+            memory_type="working",
+            user_id="bench",
+            timestamp=now - timedelta(minutes=rng.random() * 30),
+            importance=rng.random(),
+            metadata={}
+        )
+        for i in range(count)
+    ]
+
+
+def measure(memory_cls, capacity: int, inserts: int) -> tuple:
+    memory = memory_cls(MemoryConfig(working_memory_capacity=capacity, working_memory_ttl=60))
+    items = make_items(capacity + inserts)
+    for item in items[:capacity]:
+        memory.add(item)
+
+    start = time.perf_counter()
+    for item in items[capacity:]:
+        memory.add(item)
+    elapsed = time.perf_counter() - start
+    return inserts / elapsed, set(memory.memories)
+
+
+def main():
+    inserts = 500
+    print(f"{'capacity':>8} | {'legacy ops/s':>12} | {'heap ops/s':>10} | {'speedup':>7} | same result")
+    print("-" * 62)
+    for capacity in (100, 1_000, 10_000, 30_000):
+        legacy_rate, legacy_ids = measure(LegacyWorkingMemory, capacity, inserts)
+        heap_rate, heap_ids = measure(WorkingMemory, capacity, inserts)
+        print(
+            f"{capacity:>8} | {legacy_rate:>12.0f} | {heap_rate:>10.0f} | "
+            f"{heap_rate / legacy_rate:>6.1f}x | {legacy_ids == heap_ids}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+加载第8章改写的记忆模块（chapter8/my_*.py）供基准测试使用
+
+这些文件是 hello_agents.memory 包内模块的改写版本，使用相对导入（from ..base import MemoryItem），
+不能直接作为脚本导入。这里按包内模块名加载它们，MemoryItem / MemoryConfig 等基础类型
+仍来自已安装的 hello_agents（pip install hello-agents）。
+"""
+
+import os
+import sys
+import importlib
+import importlib.util
+
+CHAPTER8 = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chapter8")
+
+
+def load_chapter8_module(filename: str, package: str):
+    """
+    以package子模块的身份加载chapter8下的文件
+
+    Args:
+        filename: chapter8目录下的文件名，如 "my_working_memory.py"
+        package: 文件对应的包，如 "hello_agents.memory.types"，相对导入以它为基准解析
+
+    Returns:
+        加载后的模块
+    """
+    importlib.import_module(package)
+    name = f"{package}.{os.path.splitext(filename)[0]}"
+    spec = importlib.util.spec_from_file_location(name, os.path.join(CHAPTER8, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
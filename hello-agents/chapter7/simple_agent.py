@@ -1,7 +1,11 @@
 # my_simple_agent.py
-from typing import Optional, Iterator
+from typing import Optional, Iterator, Dict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from hello_agents import SimpleAgent, HelloAgentsLLM, Config, Message
 import re
+import time
+import inspect
+import threading
 
 class MySimpleAgent(SimpleAgent):
     """
@@ -16,11 +20,34 @@ class MySimpleAgent(SimpleAgent):
         system_prompt: Optional[str] = None,
         config: Optional[Config] = None,
         tool_registry: Optional['ToolRegistry'] = None,
-        enable_tool_calling: bool = True
+        enable_tool_calling: bool = True,
+        max_tool_workers: int = 8,
+        tool_timeout: Optional[float] = 30.0,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        tool_top_k: Optional[int] = None,
+        use_native_tools: bool = False
     ):
+        """
+        Args:
+            max_tool_workers: 同一轮工具调用的最大并发数
+            tool_timeout: 单个工具调用的默认超时（秒），None表示不限
+            tool_timeouts: 按工具名单独指定的超时，如 {"search": 10}
+            tool_top_k: 只在系统提示词中列出与用户输入最相关的前k个工具，None表示列出全部
+            use_native_tools: 是否使用原生function calling（tools/tool_calls），代替 [TOOL_CALL:...] 文本标记；
+                需要hello_agents_source_code中的ToolRegistry与HelloAgentsLLM，不支持时退回文本标记
+        """
         super().__init__(name, llm, system_prompt, config)
         self.tool_registry = tool_registry
         self.enable_tool_calling = enable_tool_calling and tool_registry is not None
+        self.max_tool_workers = max_tool_workers
+        self.tool_timeout = tool_timeout
+        self.tool_timeouts = tool_timeouts or {}
+        self.tool_top_k = tool_top_k
+        self.use_native_tools = use_native_tools and self.enable_tool_calling and self._supports_native_tools()
+        if use_native_tools and self.enable_tool_calling and not self.use_native_tools:
+            print("⚠️ 当前LLM或工具注册表不支持原生function calling，改用 [TOOL_CALL:...] 文本标记")
+        self._tool_executor: Optional[ThreadPoolExecutor] = None
+        self._hung_tool_calls: list = []  # 已超时但仍在线程池中运行的调用
         print(f"✅ {name} 初始化完成，工具调用: {'启用' if self.enable_tool_calling else '禁用'}")
 
     def run(self, input_text: str, max_tool_iterations: int = 3, **kwargs) -> str:
@@ -33,7 +60,7 @@ class MySimpleAgent(SimpleAgent):
         messages = []
 
         # 添加系统消息（可能包含工具信息）
-        enhanced_system_prompt = self._get_enhanced_system_prompt()
+        enhanced_system_prompt = self._get_enhanced_system_prompt(input_text)
         messages.append({"role": "system", "content": enhanced_system_prompt})
 
         # 添加历史消息
@@ -54,17 +81,20 @@ class MySimpleAgent(SimpleAgent):
             return response
 
         # 支持多轮工具调用的逻辑
+        if self.use_native_tools:
+            return self._run_with_native_tools(messages, input_text, max_tool_iterations, **kwargs)
         return self._run_with_tools(messages, input_text, max_tool_iterations, **kwargs)
     
-    def _get_enhanced_system_prompt(self) -> str:
-        """构建增强的系统提示词，包含工具信息"""
+    def _get_enhanced_system_prompt(self, query: Optional[str] = None) -> str:
+        """构建增强的系统提示词，包含工具信息（设置了tool_top_k时只包含与query相关的工具）"""
         base_prompt = self.system_prompt or "你是一个有用的AI助手。"
 
-        if not self.enable_tool_calling or not self.tool_registry:
+        # 原生function calling模式下工具定义随请求发送，不需要写进提示词
+        if not self.enable_tool_calling or not self.tool_registry or self.use_native_tools:
             return base_prompt
 
         # 获取工具描述
-        tools_description = self.tool_registry.get_tools_description()
+        tools_description = self._get_tools_description(query)
         if not tools_description or tools_description == "暂无可用工具":
             return base_prompt
 
@@ -80,6 +110,20 @@ class MySimpleAgent(SimpleAgent):
 
         return base_prompt + tools_section
     
+    def _get_tools_description(self, query: Optional[str]) -> str:
+        """
+        获取工具描述
+
+        只有注册表支持按相关性筛选（hello_agents_source_code的ToolRegistry）时才传入query/top_k，
+        pip安装的hello_agents中ToolRegistry.get_tools_description()不接受参数，此时列出全部工具。
+        """
+        if self.tool_top_k is not None:
+            parameters = inspect.signature(self.tool_registry.get_tools_description).parameters
+            if "query" in parameters and "top_k" in parameters:
+                return self.tool_registry.get_tools_description(query=query, top_k=self.tool_top_k)
+            print("⚠️ 当前工具注册表不支持按相关性筛选工具，tool_top_k将被忽略")
+        return self.tool_registry.get_tools_description()
+
     def _run_with_tools(self, messages: list, input_text: str, max_tool_iterations: int, **kwargs) -> str:
         """支持工具调用的运行逻辑"""
         current_iteration = 0
@@ -94,13 +138,11 @@ class MySimpleAgent(SimpleAgent):
 
             if tool_calls:
                 print(f"🔧 检测到 {len(tool_calls)} 个工具调用")
-                # 执行所有工具调用并收集结果
-                tool_results = []
+                # 并发执行所有工具调用，结果按原顺序收集
+                tool_results = self._execute_tool_calls(tool_calls)
                 clean_response = response
 
                 for call in tool_calls:
-                    result = self._execute_tool_call(call['tool_name'], call['parameters'])
-                    tool_results.append(result)
                     # 从响应中移除工具调用标记
                     clean_response = clean_response.replace(call['original'], "")
 
@@ -129,6 +171,54 @@ class MySimpleAgent(SimpleAgent):
 
         return final_response
 
+    def _supports_native_tools(self) -> bool:
+        """注册表能导出JSON Schema并执行结构化调用，且LLM能发送tools参数"""
+        return (
+            hasattr(self.tool_registry, "get_openai_tools")
+            and hasattr(self.tool_registry, "execute_tool_call")
+            and hasattr(self.llm, "invoke_with_tools")
+        )
+
+    def _run_with_native_tools(self, messages: list, input_text: str, max_tool_iterations: int, **kwargs) -> str:
+        """
+        原生function calling的运行逻辑
+
+        工具JSON Schema来自注册表（按版本缓存），模型返回结构化参数，
+        同一轮的多个tool_calls并发执行，结果以tool消息按原顺序追加。
+        """
+        tools = self.tool_registry.get_openai_tools(query=input_text, top_k=self.tool_top_k)
+        final_response = ""
+
+        for _ in range(max_tool_iterations):
+            reply = self.llm.invoke_with_tools(messages, tools, **kwargs)
+            if not reply["tool_calls"]:
+                final_response = reply["content"] or ""
+                break
+
+            print(f"🔧 检测到 {len(reply['tool_calls'])} 个工具调用")
+            messages.append(reply["message"])
+            results = self._execute_tool_calls(reply["tool_calls"], execute=self._execute_native_call)
+            for call, result in zip(reply["tool_calls"], results):
+                messages.append({"role": "tool", "tool_call_id": call["id"], "content": result})
+        else:
+            # 超过最大迭代次数，不再提供工具，要求模型直接回答
+            final_response = self.llm.invoke(messages, **kwargs)
+
+        self.add_message(Message(input_text, "user"))
+        self.add_message(Message(final_response, "assistant"))
+        print(f"✅ {self.name} 响应完成")
+        return final_response
+
+    def _execute_native_call(self, call: dict) -> str:
+        """执行一个结构化的工具调用"""
+        if call["error"]:
+            return f"❌ 工具 {call['name']} 参数错误:{call['error']}"
+        try:
+            result = self.tool_registry.execute_tool_call(call["name"], call["arguments"])
+            return f"🔧 工具 {call['name']} 执行结果:\n{result}"
+        except Exception as e:
+            return f"❌ 工具调用失败:{str(e)}"
+
     def _parse_tool_calls(self, text: str) -> list:
         """解析文本中的工具调用"""
         pattern = r'\[TOOL_CALL:([^:]+):([^\]]+)\]'
@@ -144,6 +234,92 @@ class MySimpleAgent(SimpleAgent):
 
         return tool_calls
 
+    def _execute_tool_calls(self, tool_calls: list, execute=None) -> list:
+        """
+        在有界线程池中并发执行同一轮的所有工具调用
+
+        一轮N个工具调用的耗时约为最慢的那一个，而不是N个之和；
+        每个调用的超时从它真正开始执行时计算（在线程池中排队的时间不计入），
+        超时的调用返回错误信息，不会阻塞其他结果，返回顺序与tool_calls一致。
+
+        Args:
+            tool_calls: 工具调用列表
+            execute: 执行单个调用的函数，默认按 [TOOL_CALL:...] 文本标记的格式执行
+        """
+        if execute is None:
+            execute = lambda call: self._execute_tool_call(call['tool_name'], call['parameters'])
+
+        if self._tool_executor is None:
+            self._tool_executor = ThreadPoolExecutor(
+                max_workers=self.max_tool_workers, thread_name_prefix=f"{self.name}-tool"
+            )
+
+        def submit(call):
+            started = {}
+            ready = threading.Event()
+
+            def run():
+                started["at"] = time.monotonic()
+                ready.set()
+                return execute(call)
+
+            return self._tool_executor.submit(run), started, ready
+
+        begin = time.monotonic()
+        runs = [submit(call) for call in tool_calls]
+
+        results = []
+        for call, (future, started, ready) in zip(tool_calls, runs):
+            tool_name = call.get('tool_name') or call.get('name')
+            timeout = self.tool_timeouts.get(tool_name, self.tool_timeout)
+            if self._wait_tool_result(future, started, ready, timeout):
+                results.append(future.result())
+            else:
+                future.cancel()
+                results.append(f"❌ 工具 {tool_name} 执行超时（{timeout}秒）")
+
+        if len(tool_calls) > 1:
+            print(f"⏱️ {len(tool_calls)} 个工具调用并发执行耗时 {time.monotonic() - begin:.2f}s")
+        return results
+
+    def _wait_tool_result(self, future, started: dict, ready: threading.Event, timeout: Optional[float]) -> bool:
+        """等待单个调用完成，返回是否在超时前完成；超时后仍在运行的调用记录下来，它们会一直占用工作线程"""
+        if timeout is None:
+            future.result()
+            return True
+        # 排队阶段不计时；但如果工作线程已全部被超时后仍未结束的调用占住，排队的调用永远不会开始，直接判为超时
+        while not ready.wait(0.05):
+            if future.done():
+                return True
+            self._hung_tool_calls = [f for f in self._hung_tool_calls if not f.done()]
+            if len(self._hung_tool_calls) >= self.max_tool_workers:
+                return False
+        remaining = max(0.0, started["at"] + timeout - time.monotonic())
+        try:
+            future.result(timeout=remaining)
+            return True
+        except FutureTimeoutError:
+            self._hung_tool_calls.append(future)
+            return False
+
+    def close(self):
+        """关闭工具线程池：排队中的调用直接取消，不等待仍在运行（包括已超时）的调用"""
+        if self._tool_executor is not None:
+            self._tool_executor.shutdown(wait=False, cancel_futures=True)
+            self._tool_executor = None
+        self._hung_tool_calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        # 初始化失败时可能还没有线程池属性
+        if getattr(self, "_tool_executor", None) is not None:
+            self.close()
+
     def _execute_tool_call(self, tool_name: str, parameters: str) -> str:
         """执行工具调用"""
         if not self.tool_registry:
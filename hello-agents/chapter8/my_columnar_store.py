@@ -0,0 +1,282 @@
+import sys
+import json
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..base import MemoryItem
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# datetime与tuple在msgpack中用扩展类型、在JSON中用单键标记对象保存，解包后还原为原类型；
+# 其余无法直接序列化的值仍转为字符串
+_EXT_DATETIME = 1
+_EXT_TUPLE = 2
+_JSON_DATETIME = "__datetime__"
+_JSON_TUPLE = "__tuple__"
+
+
+def _msgpack_default(value: Any) -> Any:
+    # strict_types=True时tuple以及dict/list的子类都会交给default处理
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, value.isoformat().encode("utf-8"))
+    if isinstance(value, tuple):
+        return msgpack.ExtType(_EXT_TUPLE, _msgpack_packb(list(value)))
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return str(value)
+
+
+def _msgpack_packb(value: Any) -> bytes:
+    return msgpack.packb(value, default=_msgpack_default, use_bin_type=True, strict_types=True)
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode("utf-8"))
+    if code == _EXT_TUPLE:
+        return tuple(msgpack.unpackb(data, raw=False, ext_hook=_msgpack_ext_hook))
+    return msgpack.ExtType(code, data)
+
+
+def _json_tag(value: Any) -> Any:
+    """json.dumps会把tuple直接写成数组而不经过default，因此先递归替换为标记对象"""
+    if isinstance(value, datetime):
+        return {_JSON_DATETIME: value.isoformat()}
+    if isinstance(value, tuple):
+        return {_JSON_TUPLE: [_json_tag(v) for v in value]}
+    if isinstance(value, dict):
+        return {k: _json_tag(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_json_tag(v) for v in value]
+    return value
+
+
+def _json_untag(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if _JSON_DATETIME in obj:
+            return datetime.fromisoformat(obj[_JSON_DATETIME])
+        if _JSON_TUPLE in obj:
+            return tuple(obj[_JSON_TUPLE])
+    return obj
+
+
+def pack_metadata(metadata: Dict[str, Any]) -> Optional[bytes]:
+    """
+    元数据打包为二进制，空字典不占用空间
+
+    datetime与tuple解包后还原为原类型；其他无法直接序列化的值转为字符串。
+    使用JSON时，只有一个键且键为 "__datetime__" 或 "__tuple__" 的字典会被当作标记对象。
+    """
+    if not metadata:
+        return None
+    if msgpack is not None:
+        return _msgpack_packb(metadata)
+    return json.dumps(_json_tag(metadata), ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def unpack_metadata(blob: Optional[bytes]) -> Dict[str, Any]:
+    if blob is None:
+        return {}
+    if msgpack is not None:
+        return msgpack.unpackb(blob, raw=False, ext_hook=_msgpack_ext_hook)
+    return json.loads(blob, object_hook=_json_untag)
+
+
+class StringTable:
+    """字符串驻留表：记忆类型、用户ID等重复度高的字符串只保存一份，列中只存整数编号"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(sys.intern(value))
+            self.codes[value] = code
+        return code
+
+    def decode(self, code: int) -> str:
+        return self.strings[code]
+
+
+class ColumnarMemoryStore:
+    """
+    列式记忆存储
+
+    每条记忆不再是一个带元数据字典的MemoryItem对象，而是各列中的一行：
+    - memory_type / user_id: 驻留字符串的编号（array('I')）
+    - timestamp / importance: array('d')
+    - metadata: msgpack二进制（未安装msgpack时为紧凑JSON），空元数据不占空间
+    MemoryItem只在读取时临时构造，删除的行放入空闲列表供后续复用。
+    """
+
+    def __init__(self):
+        self.strings = StringTable()
+        self._row_of: Dict[str, int] = {}  # 记忆ID -> 行号
+        self._ids: List[Optional[str]] = []
+        self._contents: List[Optional[str]] = []
+        self._types = array("I")
+        self._users = array("I")
+        self._timestamps = array("d")
+        self._importances = array("d")
+        self._metadata: List[Optional[bytes]] = []
+        self._free_rows: List[int] = []
+
+    def add(self, memory_item: MemoryItem) -> str:
+        """添加记忆，相同ID的记忆会被覆盖"""
+        row = self._row_of.get(memory_item.id)
+        if row is None:
+            row = self._free_rows.pop() if self._free_rows else self._append_row()
+            self._row_of[memory_item.id] = row
+
+        self._ids[row] = memory_item.id
+        self._contents[row] = memory_item.content
+        self._types[row] = self.strings.encode(memory_item.memory_type)
+        self._users[row] = self.strings.encode(memory_item.user_id)
+        self._timestamps[row] = memory_item.timestamp.timestamp()
+        self._importances[row] = memory_item.importance
+        self._metadata[row] = pack_metadata(memory_item.metadata)
+        return memory_item.id
+
+    def get(self, memory_id: str) -> Optional[MemoryItem]:
+        """按ID读取，返回新构造的MemoryItem"""
+        row = self._row_of.get(memory_id)
+        return self._materialize(row) if row is not None else None
+
+    def remove(self, memory_id: str) -> bool:
+        row = self._row_of.pop(memory_id, None)
+        if row is None:
+            return False
+        self._ids[row] = None
+        self._contents[row] = None
+        self._metadata[row] = None
+        self._free_rows.append(row)
+        return True
+
+    def update_importance(self, memory_id: str, importance: float) -> bool:
+        """只修改一列，不需要构造MemoryItem"""
+        row = self._row_of.get(memory_id)
+        if row is None:
+            return False
+        self._importances[row] = importance
+        return True
+
+    def find(
+        self,
+        user_id: Optional[str] = None,
+        memory_type: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[MemoryItem]:
+        """按列过滤，只为命中的行构造MemoryItem，结果按时间倒序"""
+        rows = self._match_rows(user_id, memory_type, start_time, end_time)
+        rows.sort(key=self._timestamps.__getitem__, reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
+        return [self._materialize(row) for row in rows]
+
+    def iter_items(self, user_id: Optional[str] = None, memory_type: Optional[str] = None) -> Iterator[MemoryItem]:
+        """逐条遍历记忆，每次只构造一个MemoryItem"""
+        for row in self._match_rows(user_id, memory_type):
+            yield self._materialize(row)
+
+    def count(self, user_id: Optional[str] = None, memory_type: Optional[str] = None) -> int:
+        if user_id is None and memory_type is None:
+            return len(self._row_of)
+        return len(self._match_rows(user_id, memory_type))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """存储规模与内存占用估算（不含MemoryItem视图）"""
+        total = len(self._row_of)
+        column_bytes = sum(
+            sys.getsizeof(column)
+            for column in (self._types, self._users, self._timestamps, self._importances,
+                           self._ids, self._contents, self._metadata)
+        )
+        value_bytes = sum(sys.getsizeof(value) for value in self._ids if value is not None)
+        value_bytes += sum(sys.getsizeof(value) for value in self._contents if value is not None)
+        value_bytes += sum(sys.getsizeof(value) for value in self._metadata if value is not None)
+        index_bytes = sys.getsizeof(self._row_of)
+        total_bytes = column_bytes + value_bytes + index_bytes
+        return {
+            "count": total,
+            "free_rows": len(self._free_rows),
+            "interned_strings": len(self.strings.strings),
+            "metadata_format": "msgpack" if msgpack is not None else "json",
+            "total_bytes": total_bytes,
+            "bytes_per_memory": total_bytes / total if total else 0.0,
+        }
+
+    def _append_row(self) -> int:
+        row = len(self._ids)
+        self._ids.append(None)
+        self._contents.append(None)
+        self._types.append(0)
+        self._users.append(0)
+        self._timestamps.append(0.0)
+        self._importances.append(0.0)
+        self._metadata.append(None)
+        return row
+
+    def _match_rows(
+        self,
+        user_id: Optional[str] = None,
+        memory_type: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[int]:
+        # 字符串先转为编号，之后只比较整数列；从未出现过的值直接返回空结果
+        user_code = type_code = None
+        if user_id is not None:
+            user_code = self.strings.codes.get(user_id)
+            if user_code is None:
+                return []
+        if memory_type is not None:
+            type_code = self.strings.codes.get(memory_type)
+            if type_code is None:
+                return []
+        start = start_time.timestamp() if start_time is not None else None
+        end = end_time.timestamp() if end_time is not None else None
+
+        rows = []
+        ids, users, types, timestamps = self._ids, self._users, self._types, self._timestamps
+        for row in range(len(ids)):
+            if ids[row] is None:
+                continue
+            if user_code is not None and users[row] != user_code:
+                continue
+            if type_code is not None and types[row] != type_code:
+                continue
+            if start is not None and timestamps[row] < start:
+                continue
+            if end is not None and timestamps[row] > end:
+                continue
+            rows.append(row)
+        return rows
+
+    def _materialize(self, row: int) -> MemoryItem:
+        return MemoryItem(
+            id=self._ids[row],
+            content=self._contents[row],
+            memory_type=self.strings.decode(self._types[row]),
+            user_id=self.strings.decode(self._users[row]),
+            timestamp=datetime.fromtimestamp(self._timestamps[row]),
+            importance=self._importances[row],
+            metadata=unpack_metadata(self._metadata[row])
+        )
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._row_of
@@ -0,0 +1,465 @@
+import os
+import json
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..base import MemoryItem
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        properties TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS memories (
+        id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        content TEXT NOT NULL,
+        memory_type TEXT NOT NULL,
+        timestamp INTEGER NOT NULL,
+        importance REAL NOT NULL,
+        properties TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS concepts (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        description TEXT,
+        properties TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS memory_concepts (
+        memory_id TEXT NOT NULL,
+        concept_id TEXT NOT NULL,
+        relevance_score REAL DEFAULT 1.0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (memory_id, concept_id),
+        FOREIGN KEY (memory_id) REFERENCES memories (id) ON DELETE CASCADE,
+        FOREIGN KEY (concept_id) REFERENCES concepts (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS concept_relationships (
+        from_concept_id TEXT NOT NULL,
+        to_concept_id TEXT NOT NULL,
+        relationship_type TEXT NOT NULL,
+        strength REAL DEFAULT 1.0,
+        properties TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (from_concept_id, to_concept_id, relationship_type),
+        FOREIGN KEY (from_concept_id) REFERENCES concepts (id) ON DELETE CASCADE,
+        FOREIGN KEY (to_concept_id) REFERENCES concepts (id) ON DELETE CASCADE
+    )
+    """,
+    # 与查询形状一致的复合索引：按用户+类型+时间范围过滤，按用户+重要性阈值过滤/排序
+    "CREATE INDEX IF NOT EXISTS idx_memories_user_type_time ON memories (user_id, memory_type, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_memories_user_importance ON memories (user_id, importance)",
+    "CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_memory_concepts_concept ON memory_concepts (concept_id)",
+    # 被复合索引覆盖（user_id是前缀）或选择性太低（只有几种类型）的旧索引只会拖慢写入
+    "DROP INDEX IF EXISTS idx_memories_user_id",
+    "DROP INDEX IF EXISTS idx_memories_type",
+    "DROP INDEX IF EXISTS idx_memory_concepts_memory",
+]
+
+# SQL文本固定，sqlite3按文本缓存预编译语句，每个连接只编译一次
+_INSERT_USER = "INSERT OR IGNORE INTO users (id, name) VALUES (?, ?)"
+_UPSERT_MEMORY = """
+    INSERT INTO memories (id, user_id, content, memory_type, timestamp, importance, properties)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        content = excluded.content,
+        memory_type = excluded.memory_type,
+        timestamp = excluded.timestamp,
+        importance = excluded.importance,
+        properties = excluded.properties,
+        updated_at = CURRENT_TIMESTAMP
+"""
+_UPDATE_MEMORY = """
+    UPDATE memories SET
+        content = COALESCE(?, content),
+        importance = COALESCE(?, importance),
+        properties = COALESCE(?, properties),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+_DELETE_MEMORY = "DELETE FROM memories WHERE id = ?"
+_LINK_CONCEPT = """
+    INSERT OR REPLACE INTO memory_concepts (memory_id, concept_id, relevance_score) VALUES (?, ?, ?)
+"""
+_INSERT_CONCEPT = "INSERT OR IGNORE INTO concepts (id, name) VALUES (?, ?)"
+_SELECT_MEMORY = """
+    SELECT id, user_id, content, memory_type, timestamp, importance, properties
+    FROM memories WHERE id = ?
+"""
+
+_BATCHABLE = frozenset({_INSERT_USER, _UPSERT_MEMORY, _INSERT_CONCEPT, _LINK_CONCEPT})
+
+_STOP = object()
+
+
+class SQLiteMemoryStore:
+    """
+    调优后的SQLite记忆存储（memory.db）
+
+    - WAL模式 + synchronous=NORMAL：读写互不阻塞，提交时不再每次fsync
+    - 单写线程：所有写操作进入队列，由后台线程按批在一个事务中提交（group commit），
+      连续的同类语句合并为executemany
+    - 固定SQL文本配合sqlite3的语句缓存，避免重复编译
+    - 读连接池：多个只读连接并发查询；有未落盘的写入时先等待提交，保证读到自己的写入
+
+    这是独立的存储实现，MemoryManager不会自动使用它，需要时直接创建并调用。
+    """
+
+    def __init__(
+        self,
+        db_path: str = "./memory_data/memory.db",
+        read_pool_size: int = 4,
+        batch_size: int = 1000,
+        statement_cache_size: int = 128
+    ):
+        """
+        Args:
+            db_path: 数据库文件路径
+            read_pool_size: 只读连接数
+            batch_size: 单个事务最多包含的写操作数
+            statement_cache_size: 每个连接缓存的预编译语句数
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.statement_cache_size = statement_cache_size
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._writer = self._connect()
+        for statement in _SCHEMA:
+            self._writer.execute(statement)
+        self._known_users = set()  # 已提交到数据库的用户，只由写线程更新
+
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all_readers = []
+        for _ in range(max(1, read_pool_size)):
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            self._readers.put(conn)
+            self._all_readers.append(conn)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+        self._thread = threading.Thread(target=self._write_loop, name="sqlite-memory-writer", daemon=True)
+        self._thread.start()
+        print(f"✅ SQLite记忆存储初始化完成: {db_path} (WAL, 读连接 {len(self._all_readers)})")
+
+    # ==================== 写操作（异步排队，返回Future） ====================
+
+    def add_memory(
+        self,
+        memory_id: str,
+        user_id: str,
+        content: str,
+        memory_type: str,
+        timestamp: int,
+        importance: float,
+        properties: Optional[Dict[str, Any]] = None,
+        wait: bool = False
+    ) -> str:
+        """
+        添加（或覆盖）记忆
+
+        Args:
+            wait: 是否等待该写入提交后再返回；默认立即返回，由后台线程批量提交
+
+        Returns:
+            记忆ID
+        """
+        row = (
+            memory_id, user_id, content, memory_type, int(timestamp), importance,
+            json.dumps(properties, ensure_ascii=False) if properties else None
+        )
+        ops = [(_UPSERT_MEMORY, row)]
+        if user_id not in self._known_users:
+            # 用户行需先于其记忆写入（外键约束）；用户只有在所在批次提交成功后才记为已知，
+            # 在此之前的每次写入都带上INSERT OR IGNORE，首个批次失败也不会影响后续写入
+            ops.insert(0, (_INSERT_USER, (user_id, user_id)))
+        future = self._submit(ops)
+        if wait:
+            future.result()
+        return memory_id
+
+    def add_memory_item(self, memory_item: MemoryItem, wait: bool = False) -> str:
+        """添加MemoryItem"""
+        return self.add_memory(
+            memory_id=memory_item.id,
+            user_id=memory_item.user_id,
+            content=memory_item.content,
+            memory_type=memory_item.memory_type,
+            timestamp=int(memory_item.timestamp.timestamp()),
+            importance=memory_item.importance,
+            properties=memory_item.metadata,
+            wait=wait
+        )
+
+    def update_memory(
+        self,
+        memory_id: str,
+        content: Optional[str] = None,
+        importance: Optional[float] = None,
+        properties: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """更新记忆（等待提交），返回是否存在该记忆"""
+        props = json.dumps(properties, ensure_ascii=False) if properties is not None else None
+        return self._submit([(_UPDATE_MEMORY, (content, importance, props, memory_id))]).result() > 0
+
+    def delete_memory(self, memory_id: str) -> bool:
+        """删除记忆（等待提交），关联的概念链接由外键级联删除"""
+        return self._submit([(_DELETE_MEMORY, (memory_id,))]).result() > 0
+
+    def link_concepts(self, memory_id: str, concepts: Iterable[Tuple[str, str, float]]) -> Future:
+        """
+        为记忆关联概念
+
+        Args:
+            memory_id: 记忆ID
+            concepts: (概念ID, 概念名称, 相关度) 列表
+        """
+        ops = []
+        for concept_id, name, relevance in concepts:
+            ops.append((_INSERT_CONCEPT, (concept_id, name)))
+            ops.append((_LINK_CONCEPT, (memory_id, concept_id, relevance)))
+        return self._submit(ops)
+
+    def flush(self, timeout: Optional[float] = None):
+        """等待此前提交的所有写入落盘"""
+        self._submit([]).result(timeout)
+
+    # ==================== 读操作（连接池） ====================
+
+    def get_memory(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        """按ID读取记忆"""
+        with self._reader() as conn:
+            row = conn.execute(_SELECT_MEMORY, (memory_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def search_memories(
+        self,
+        user_id: Optional[str] = None,
+        memory_type: Optional[str] = None,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+        importance_threshold: Optional[float] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        条件查询，按重要性、时间倒序
+
+        user_id + memory_type (+时间范围) 命中 (user_id, memory_type, timestamp) 索引，
+        只有 user_id + 重要性阈值时命中 (user_id, importance) 索引。
+        """
+        where, params = [], []
+        if user_id is not None:
+            where.append("user_id = ?")
+            params.append(user_id)
+        if memory_type is not None:
+            where.append("memory_type = ?")
+            params.append(memory_type)
+        if start_time is not None:
+            where.append("timestamp >= ?")
+            params.append(int(start_time))
+        if end_time is not None:
+            where.append("timestamp <= ?")
+            params.append(int(end_time))
+        if importance_threshold is not None:
+            where.append("importance >= ?")
+            params.append(importance_threshold)
+        # 条件组合有限，SQL文本随之固定，同样能命中语句缓存
+        sql = (
+            "SELECT id, user_id, content, memory_type, timestamp, importance, properties FROM memories"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY importance DESC, timestamp DESC LIMIT ?"
+        )
+        params.append(limit)
+        with self._reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def get_database_stats(self) -> Dict[str, Any]:
+        """各表行数与写入批次统计"""
+        stats = {}
+        with self._reader() as conn:
+            for table in ("users", "memories", "concepts", "memory_concepts", "concept_relationships"):
+                stats[f"{table}_count"] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            stats["journal_mode"] = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        with self._stats_lock:
+            stats["write_batches"] = self.batches
+            stats["writes"] = self.writes
+            stats["avg_batch_size"] = self.writes / self.batches if self.batches else 0.0
+        stats["store_type"] = "sqlite"
+        stats["db_path"] = self.db_path
+        return stats
+
+    def close(self):
+        """提交剩余写入并关闭所有连接"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._writer.close()
+        for conn in self._all_readers:
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ==================== 内部实现 ====================
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: 事务由写线程显式BEGIN/COMMIT控制
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self.statement_cache_size
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _submit(self, ops: List[Tuple[str, tuple]]) -> Future:
+        if self._closed:
+            raise RuntimeError("SQLite记忆存储已关闭")
+        future = Future()
+        self._queue.put((ops, future))
+        return future
+
+    @contextmanager
+    def _reader(self):
+        # 读自己的写：队列中还有未提交的写入时，先等写线程处理完
+        if self._queue.unfinished_tasks:
+            self.flush()
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _write_loop(self):
+        """单写线程：阻塞取出第一个请求，再把队列中已有的请求一并取出，在一个事务中提交"""
+        while True:
+            first = self._queue.get()
+            batch = [first] if first is not _STOP else []
+            stop = first is _STOP
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                try:
+                    self._commit_batch(batch)
+                except Exception as e:
+                    # 兜底：写线程退出后之后的写入与flush会永远等待，因此只让本批请求失败
+                    print(f"❌ 写入批次处理失败: {e}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _commit_batch(self, batch: List[Tuple[List[Tuple[str, tuple]], Future]]):
+        conn = self._writer
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # 按提交顺序展开所有语句，相邻的同一插入语句合并为executemany（如连续的add_memory）；
+            # 更新与删除逐条执行，以便返回各自影响的行数
+            flat = [(sql, params, index) for index, (ops, _) in enumerate(batch) for sql, params in ops]
+            rowcounts = {}
+            for sql, group in groupby(flat, key=lambda op: op[0]):
+                group = list(group)
+                if sql in _BATCHABLE:
+                    conn.executemany(sql, [params for _, params, _ in group])
+                else:
+                    for _, params, index in group:
+                        rowcounts[index] = rowcounts.get(index, 0) + conn.execute(sql, params).rowcount
+            conn.execute("COMMIT")
+        except Exception as e:
+            # 除sqlite3.Error外，参数无法绑定（如超出64位的整数）等错误同样只让本批失败
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # 整批失败时逐个重试，只让出错的请求失败
+            print(f"⚠️ 批量写入失败，逐条重试: {e}")
+            for item in batch:
+                self._commit_batch([item])
+            return
+
+        self._known_users.update(
+            params[0] for ops, _ in batch for sql, params in ops if sql is _INSERT_USER
+        )
+        with self._stats_lock:
+            self.batches += 1
+            self.writes += len(batch)
+        for index, (_, future) in enumerate(batch):
+            future.set_result(rowcounts.get(index, 0))
+
+    @staticmethod
+    def _row_to_dict(row: tuple) -> Dict[str, Any]:
+        memory_id, user_id, content, memory_type, timestamp, importance, properties = row
+        return {
+            "memory_id": memory_id,
+            "user_id": user_id,
+            "content": content,
+            "memory_type": memory_type,
+            "timestamp": timestamp,
+            "importance": importance,
+            "properties": json.loads(properties) if properties else {}
+        }
+
+    @staticmethod
+    def to_memory_item(row: Dict[str, Any]) -> MemoryItem:
+        """查询结果转换为MemoryItem"""
+        return MemoryItem(
+            id=row["memory_id"],
+            content=row["content"],
+            memory_type=row["memory_type"],
+            user_id=row["user_id"],
+            timestamp=datetime.fromtimestamp(row["timestamp"]),
+            importance=row["importance"],
+            metadata=row["properties"]
+        )
@@ -1,40 +1,252 @@
+import re
+import math
+import heapq
+import itertools
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from ..base import MemoryItem, MemoryConfig
+
+_ASCII_WORD = re.compile(r"[a-z0-9_]+")
+_CJK_RUN = re.compile(r"[一-鿿]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """分词：英文按单词（小写），中文按连续片段的二元组"""
+    text = text.lower()
+    terms = _ASCII_WORD.findall(text)
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+class InvertedIndex:
+    """
+    增量倒排索引
+
+    每条记忆在添加时计算一次稀疏向量（对数词频，L2归一化），写入各个词的倒排表；
+    删除时只更新该记忆出现过的词。IDF在查询时由倒排表长度即时得到，
+    不需要像TfidfVectorizer那样每次查询都对全部记忆重新fit。
+    文档以整数槽位标识，倒排表按需转换为NumPy数组并缓存，查询时只在命中的候选槽位上分组累加。
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = {}  # 词 -> {槽位: 权重}
+        self.doc_terms: Dict[int, Tuple[str, ...]] = {}  # 槽位 -> 包含的词
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # 词 -> (槽位数组, 权重数组)
+
+    def add(self, doc_id: int, text: str):
+        if doc_id in self.doc_terms:
+            self.remove(doc_id)
+        counts = Counter(tokenize(text))
+        weights = {term: 1 + math.log(count) for term, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        for term, weight in weights.items():
+            self.postings.setdefault(term, {})[doc_id] = weight / norm
+            self._arrays.pop(term, None)
+        self.doc_terms[doc_id] = tuple(weights)
+
+    def remove(self, doc_id: int):
+        for term in self.doc_terms.pop(doc_id, ()):
+            self._arrays.pop(term, None)
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, query: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        只遍历查询词的倒排表，结果数组只覆盖命中的候选槽位，与槽位总数无关
+
+        Args:
+            query: 查询文本
+
+        Returns:
+            (候选槽位, TF-IDF余弦相似度, 关键词覆盖率) 三个等长数组，候选为命中至少一个查询词的槽位
+        """
+        query_counts = Counter(tokenize(query))
+        total = len(self.doc_terms)
+        query_weights = {}
+        for term, count in query_counts.items():
+            posting = self.postings.get(term)
+            if posting:
+                # 与sklearn的smooth_idf一致
+                idf = math.log((1 + total) / (1 + len(posting))) + 1
+                query_weights[term] = (1 + math.log(count)) * idf
+        if not query_weights:
+            empty = np.zeros(0)
+            return np.zeros(0, dtype=np.intp), empty, empty
+        query_norm = math.sqrt(sum(w * w for w in query_weights.values()))
+
+        slot_arrays, weight_arrays = [], []
+        for term, weight in query_weights.items():
+            slots, doc_weights = self._posting_arrays(term)
+            slot_arrays.append(slots)
+            weight_arrays.append((weight / query_norm) * doc_weights)
+        # 拼接各查询词的倒排表后按槽位分组累加；同一倒排表内槽位不重复，分组计数即命中的查询词数
+        candidates, inverse = np.unique(np.concatenate(slot_arrays), return_inverse=True)
+        vector_scores = np.bincount(inverse, weights=np.concatenate(weight_arrays), minlength=candidates.size)
+        matched = np.bincount(inverse, minlength=candidates.size)
+        return candidates, vector_scores, matched / len(query_counts)
+
+    def _posting_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            posting = self.postings[term]
+            arrays = (
+                np.fromiter(posting.keys(), dtype=np.intp, count=len(posting)),
+                np.fromiter(posting.values(), dtype=np.float64, count=len(posting)),
+            )
+            self._arrays[term] = arrays
+        return arrays
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+
 class WorkingMemory:
-    def __init__(self, config: MemoryConfig):
+    def __init__(self, config: MemoryConfig, storage_backend=None):
+        self.config = config
         self.max_capacity = config.working_memory_capacity or 50
         self.max_age_minutes = config.working_memory_ttl or 60
-        self.memories = []
+        self.memories: Dict[str, MemoryItem] = {}  # 记忆ID -> 记忆，保持插入顺序
+        self.index = InvertedIndex()
+
+        # 每条记忆占用一个槽位，时间戳与重要性按槽位存放在连续数组中，检索时整体向量化计算
+        self._slots: Dict[str, int] = {}   # 记忆ID -> 槽位
+        self._slot_items: List[MemoryItem] = []  # 槽位 -> 记忆（空闲槽位为None）
+        self._free_slots: List[int] = []
+        self._timestamps = np.zeros(64)    # 秒级时间戳
+        self._importances = np.zeros(64)
+
+        # 两个最小堆，元素为 (键, 序号, 记忆ID)，删除记忆时不修改堆，出堆时按序号惰性跳过失效条目
+        self._expiry_heap: List[Tuple[datetime, int, str]] = []    # 按时间戳，最早的先过期
+        self._priority_heap: List[Tuple[float, int, str]] = []     # 按优先级，最低的先淘汰
+        self._entry_seq: Dict[str, int] = {}  # 记忆ID -> 当前有效条目的序号
+        self._seq = itertools.count()
 
     def add(self, memory_item: MemoryItem) -> str:
         """添加工作记忆"""
         self._expire_old_memories()  # 过期清理
-        
-        if len(self.memories) >= self.max_capacity:
+
+        if memory_item.id not in self.memories and len(self.memories) >= self.max_capacity:
             self._remove_lowest_priority_memory()  # 容量管理
-        
-        self.memories.append(memory_item)
+
+        self.memories[memory_item.id] = memory_item
+        slot = self._assign_slot(memory_item)
+        self.index.add(slot, memory_item.content)
+
+        seq = next(self._seq)
+        self._entry_seq[memory_item.id] = seq
+        heapq.heappush(self._expiry_heap, (memory_item.timestamp, seq, memory_item.id))
+        heapq.heappush(self._priority_heap, (self._priority_key(memory_item), seq, memory_item.id))
+        self._compact_heaps()
         return memory_item.id
 
+    def remove(self, memory_id: str) -> bool:
+        """删除记忆，同时更新倒排索引；堆中的条目惰性删除"""
+        if self.memories.pop(memory_id, None) is None:
+            return False
+        slot = self._slots.pop(memory_id)
+        self.index.remove(slot)
+        self._slot_items[slot] = None
+        self._free_slots.append(slot)
+        del self._entry_seq[memory_id]
+        return True
+
+    def _assign_slot(self, memory_item: MemoryItem) -> int:
+        """为记忆分配槽位（同ID覆盖时复用原槽位），并写入时间戳与重要性数组"""
+        slot = self._slots.get(memory_item.id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                slot = len(self._slot_items)
+                self._slot_items.append(None)
+                if slot >= len(self._timestamps):
+                    self._timestamps = np.resize(self._timestamps, 2 * len(self._timestamps))
+                    self._importances = np.resize(self._importances, 2 * len(self._importances))
+            self._slots[memory_item.id] = slot
+        self._slot_items[slot] = memory_item
+        self._timestamps[slot] = memory_item.timestamp.timestamp()
+        self._importances[slot] = memory_item.importance
+        return slot
+
     def retrieve(self, query: str, limit: int = 5, **kwargs) -> List[MemoryItem]:
         """混合检索：TF-IDF向量化 + 关键词匹配"""
         self._expire_old_memories()
-        
-        # 尝试TF-IDF向量检索
-        vector_scores = self._try_tfidf_search(query)
-        
-        # 计算综合分数
-        scored_memories = []
-        for memory in self.memories:
-            vector_score = vector_scores.get(memory.id, 0.0)
-            keyword_score = self._calculate_keyword_score(query, memory.content)
-            
-            # 混合评分
-            base_relevance = vector_score * 0.7 + keyword_score * 0.3 if vector_score > 0 else keyword_score
-            time_decay = self._calculate_time_decay(memory.timestamp)
-            importance_weight = 0.8 + (memory.importance * 0.4)
-            
-            final_score = base_relevance * time_decay * importance_weight
-            if final_score > 0:
-                scored_memories.append((final_score, memory))
-        
-        scored_memories.sort(key=lambda x: x[0], reverse=True)
-        return [memory for _, memory in scored_memories[:limit]]
\ No newline at end of file
+
+        # 未命中任何查询词的记忆两项分数都为0，只对候选槽位计算
+        candidates, vector, keyword = self.index.search(query)
+        if limit <= 0 or candidates.size == 0:
+            return []
+
+        # 混合评分（与逐条计算的公式一致，按数组整体计算）
+        base_relevance = np.where(vector > 0, vector * 0.7 + keyword * 0.3, keyword)
+        hours_passed = (datetime.now().timestamp() - self._timestamps[candidates]) / 3600
+        time_decay = np.maximum(0.1, getattr(self.config, "decay_factor", 0.95) ** (hours_passed / 6))
+        importance_weight = 0.8 + self._importances[candidates] * 0.4
+        final_scores = base_relevance * time_decay * importance_weight
+
+        positive = final_scores > 0
+        candidates, final_scores = candidates[positive], final_scores[positive]
+        # argpartition取出前limit个（O(n)），只对这limit个排序
+        if candidates.size > limit:
+            top = np.argpartition(-final_scores, limit - 1)[:limit]
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.argsort(-final_scores[top], kind="stable")]
+        return [self._slot_items[slot] for slot in candidates[top].tolist()]
+
+    def _calculate_time_decay(self, timestamp: datetime) -> float:
+        """时间衰减：每6小时衰减为原来的decay_factor倍，最低0.1"""
+        hours_passed = (datetime.now() - timestamp).total_seconds() / 3600
+        decay_factor = getattr(self.config, "decay_factor", 0.95) ** (hours_passed / 6)
+        return max(0.1, decay_factor)
+
+    def _priority_key(self, memory: MemoryItem) -> float:
+        """
+        与当前时间无关的优先级排序键（对数形式）
+
+        优先级 = 重要性 × decay^((now - t) / 6h)，其中 decay^(now/6h) 对所有记忆相同，
+        因此按 log(重要性) - (t / 6h) × log(decay) 排序与按当前优先级排序一致，入堆后无需更新。
+        （时间衰减的0.1下限只影响存活超过约11天的记忆，工作记忆的TTL远小于此。）
+        """
+        if memory.importance <= 0:
+            return -math.inf
+        decay_factor = getattr(self.config, "decay_factor", 0.95)
+        hours = memory.timestamp.timestamp() / 3600
+        return math.log(memory.importance) - (hours / 6) * math.log(decay_factor)
+
+    def _expire_old_memories(self):
+        """删除超过存活时间的记忆：只弹出堆顶已过期的条目，O(k log n)"""
+        cutoff = datetime.now() - timedelta(minutes=self.max_age_minutes)
+        heap = self._expiry_heap
+        while heap and heap[0][0] < cutoff:
+            _, seq, memory_id = heapq.heappop(heap)
+            if self._entry_seq.get(memory_id) == seq:
+                self.remove(memory_id)
+
+    def _remove_lowest_priority_memory(self):
+        """容量已满时删除优先级最低的记忆，O(log n)"""
+        heap = self._priority_heap
+        while heap:
+            _, seq, memory_id = heapq.heappop(heap)
+            if self._entry_seq.get(memory_id) == seq:
+                self.remove(memory_id)
+                return
+
+    def _compact_heaps(self):
+        """失效条目超过有效条目数时重建堆，保证堆的大小与记忆数同阶（均摊O(1)）"""
+        limit = 2 * len(self.memories) + 64
+        for heap in (self._expiry_heap, self._priority_heap):
+            if len(heap) > limit:
+                heap[:] = [entry for entry in heap if self._entry_seq.get(entry[2]) == entry[1]]
+                heapq.heapify(heap)
@@ -1,11 +1,13 @@
 """Plan and Solve Agent实现 - 分解规划与逐步执行的智能体"""
 
 import ast
+import asyncio
 from typing import Optional, List, Dict, Any
 from ..core.agent import Agent
 from ..core.llm import HelloAgentsLLM
 from ..core.config import Config
 from ..core.message import Message
+from ..utils.helpers import run_coroutine_sync
 
 # 默认规划器提示词模板
 DEFAULT_PLANNER_PROMPT = """
@@ -42,6 +44,42 @@ DEFAULT_EXECUTOR_PROMPT = """
 请仅输出针对"当前步骤"的回答:
 """
 
+# 依赖图规划器提示词模板
+DEFAULT_DAG_PLANNER_PROMPT = """
+你是一个顶级的AI规划专家。你的任务是将用户提出的复杂问题分解成一个由多个简单步骤组成的行动计划，
+并标明步骤之间的依赖关系，使互不依赖的步骤可以同时执行。
+你的输出必须是一个Python列表，每个元素是一个字典：
+- "id": 步骤编号（整数，从1开始）
+- "task": 子任务描述
+- "deps": 该步骤需要用到其结果的前置步骤编号列表，没有依赖时为空列表
+最后一个步骤必须负责汇总得出最终答案。
+
+问题: {question}
+
+请严格按照以下格式输出你的计划:
+```python
+[{{"id": 1, "task": "步骤1", "deps": []}}, {{"id": 2, "task": "步骤2", "deps": []}}, {{"id": 3, "task": "汇总", "deps": [1, 2]}}]
+```
+"""
+
+# 依赖图执行器提示词模板：只提供所依赖步骤的结果，而不是完整的执行记录
+DEFAULT_DAG_EXECUTOR_PROMPT = """
+你是一位顶级的AI执行专家。你的任务是完成一个更大计划中的单个步骤。
+你将收到原始问题、当前步骤，以及当前步骤所依赖的前置步骤的结果。
+请你专注于解决"当前步骤"，并仅输出该步骤的最终答案，不要输出任何额外的解释或对话。
+
+# 原始问题:
+{question}
+
+# 依赖步骤的结果:
+{dependencies}
+
+# 当前步骤:
+{current_step}
+
+请仅输出针对"当前步骤"的回答:
+"""
+
 class Planner:
     """规划器 - 负责将复杂问题分解为简单步骤"""
 
@@ -80,6 +118,105 @@ class Planner:
             print(f"❌ 解析计划时发生未知错误: {e}")
             return []
 
+    def plan_dag(self, question: str, **kwargs) -> List[Dict[str, Any]]:
+        """
+        生成带依赖关系的执行计划
+
+        使用依赖图提示词模板；模型仍返回纯字符串列表时，按顺序串联为一条依赖链。
+
+        Args:
+            question: 要解决的问题
+            **kwargs: LLM调用参数
+
+        Returns:
+            步骤列表，每个步骤为 {"id": int, "task": str, "deps": List[int]}
+        """
+        return normalize_plan(self.plan(question, **kwargs))
+
+def _plan_id(value: Any) -> Optional[Any]:
+    """规范化模型给出的步骤编号：数字字符串转为整数，布尔值与不可哈希的值视为无效（返回None）"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return value
+
+
+def _plan_deps(value: Any) -> List[Any]:
+    """规范化依赖：列表/元组逐项处理，单个数字或字符串视为一个步骤编号"""
+    if value is None:
+        return []
+    items = value if isinstance(value, (list, tuple)) else [value]
+    return [dep for dep in map(_plan_id, items) if dep is not None]
+
+
+def normalize_plan(plan: List[Any]) -> List[Dict[str, Any]]:
+    """
+    将计划规范化为依赖图步骤列表
+
+    - 字符串步骤依赖于前一个步骤（与顺序执行语义一致）
+    - 字典步骤保留声明的依赖，忽略不存在的步骤编号与自依赖；
+      单个依赖（如 "deps": 2 或 "deps": "12"）视为只有一个依赖，无效的步骤编号按位置编号
+    - 重复的步骤编号重新编号为未使用的整数，依赖按编号指向首次出现的步骤
+    - 按依赖拓扑排序（依赖总在被依赖步骤之前），只丢弃使图成环的依赖边
+    """
+    steps: List[Dict[str, Any]] = []
+    for index, item in enumerate(plan, 1):
+        if isinstance(item, dict):
+            step_id = _plan_id(item.get("id", index))
+            if step_id is None:
+                step_id = index
+            task = str(item.get("task") or item.get("step") or "")
+            deps = item.get("deps")
+            if deps is None:
+                deps = item.get("dependencies")
+            deps = _plan_deps(deps)
+        else:
+            step_id = index
+            task = str(item)
+            deps = [steps[-1]["id"]] if steps else []
+        steps.append({"id": step_id, "task": task, "deps": deps})
+
+    seen: set = set()
+    next_id = max((step["id"] for step in steps if isinstance(step["id"], int)), default=0) + 1
+    for step in steps:
+        if step["id"] in seen:
+            print(f"⚠️ 计划中步骤编号 {step['id']} 重复，已重新编号为 {next_id}")
+            step["id"] = next_id
+            next_id += 1
+        seen.add(step["id"])
+
+    by_id = {step["id"]: step for step in steps}
+    for step in steps:
+        step["deps"] = [dep for dep in dict.fromkeys(step["deps"]) if dep in by_id and dep != step["id"]]
+
+    # 按列表顺序深度优先遍历：先输出依赖再输出步骤本身；依赖正处于当前访问路径上说明成环，只丢弃这条边
+    ordered: List[Dict[str, Any]] = []
+    state: Dict[Any, int] = {}  # 1: 访问中, 2: 已输出
+
+    def visit(step: Dict[str, Any]):
+        state[step["id"]] = 1
+        kept = []
+        for dep in step["deps"]:
+            if state.get(dep) == 1:
+                print(f"⚠️ 步骤 {step['id']} 对步骤 {dep} 的依赖会形成环，已忽略")
+                continue
+            if dep not in state:
+                visit(by_id[dep])
+            kept.append(dep)
+        step["deps"] = kept
+        state[step["id"]] = 2
+        ordered.append(step)
+
+    for step in steps:
+        if step["id"] not in state:
+            visit(step)
+    return ordered
+
 class Executor:
     """执行器 - 负责按计划逐步执行"""
 
@@ -121,6 +258,69 @@ class Executor:
 
         return final_answer
 
+class DAGExecutor:
+    """依赖图执行器 - 互不依赖的步骤通过异步LLM调用并发执行"""
+
+    def __init__(self, llm_client: HelloAgentsLLM, prompt_template: Optional[str] = None):
+        self.llm_client = llm_client
+        self.prompt_template = prompt_template if prompt_template else DEFAULT_DAG_EXECUTOR_PROMPT
+
+    def execute(self, question: str, steps: List[Dict[str, Any]], **kwargs) -> str:
+        """
+        按依赖图执行任务
+
+        Args:
+            question: 原始问题
+            steps: normalize_plan规范化后的步骤列表
+            **kwargs: LLM调用参数
+
+        Returns:
+            最后一个步骤的结果
+        """
+        results = run_coroutine_sync(self.execute_async(question, steps, **kwargs))
+        return results[steps[-1]["id"]] if steps else ""
+
+    async def execute_async(self, question: str, steps: List[Dict[str, Any]], **kwargs) -> Dict[Any, str]:
+        """
+        并发执行依赖图，每个步骤在其依赖全部完成后立即开始
+
+        Returns:
+            步骤编号到结果的映射
+        """
+        print(f"\n--- 正在并行执行计划（{len(steps)} 个步骤）---")
+        tasks: Dict[Any, asyncio.Task] = {}
+
+        async def run_step(step: Dict[str, Any]) -> str:
+            dep_results = [await tasks[dep] for dep in step["deps"]]
+            dependencies = "\n\n".join(
+                f"步骤 {dep}: {self._task_of(steps, dep)}\n结果: {result}"
+                for dep, result in zip(step["deps"], dep_results)
+            )
+            prompt = self.prompt_template.format(
+                question=question,
+                dependencies=dependencies if dependencies else "无",
+                current_step=step["task"]
+            )
+            print(f"-> 开始执行步骤 {step['id']}: {step['task']}")
+            response_text = await self.llm_client.ainvoke([{"role": "user", "content": prompt}], **kwargs) or ""
+            print(f"✅ 步骤 {step['id']} 已完成，结果: {response_text}")
+            return response_text
+
+        # normalize_plan按拓扑顺序返回步骤，依赖总在列表中更早的位置，因此按顺序创建任务即可
+        for step in steps:
+            tasks[step["id"]] = asyncio.create_task(run_step(step))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return {step_id: task.result() for step_id, task in tasks.items()}
+
+    @staticmethod
+    def _task_of(steps: List[Dict[str, Any]], step_id: Any) -> str:
+        return next((step["task"] for step in steps if step["id"] == step_id), "")
+
 class PlanAndSolveAgent(Agent):
     """
     Plan and Solve Agent - 分解规划与逐步执行的智能体
@@ -140,7 +340,8 @@ class PlanAndSolveAgent(Agent):
         llm: HelloAgentsLLM,
         system_prompt: Optional[str] = None,
         config: Optional[Config] = None,
-        custom_prompts: Optional[Dict[str, str]] = None
+        custom_prompts: Optional[Dict[str, str]] = None,
+        parallel: bool = False
     ):
         """
         初始化PlanAndSolveAgent
@@ -150,20 +351,22 @@ class PlanAndSolveAgent(Agent):
             llm: LLM实例
             system_prompt: 系统提示词
             config: 配置对象
-            custom_prompts: 自定义提示词模板 {"planner": "", "executor": ""}
+            custom_prompts: 自定义提示词模板 {"planner": "", "executor": "", "dag_planner": "", "dag_executor": ""}
+            parallel: 是否使用依赖图模式，互不依赖的步骤并发执行，且每步只传入所依赖步骤的结果
         """
         super().__init__(name, llm, system_prompt, config)
 
         # 设置提示词模板：用户自定义优先，否则使用默认模板
-        if custom_prompts:
-            planner_prompt = custom_prompts.get("planner")
-            executor_prompt = custom_prompts.get("executor")
+        custom_prompts = custom_prompts or {}
+        self.parallel = parallel
+        if parallel:
+            planner_prompt = custom_prompts.get("dag_planner") or DEFAULT_DAG_PLANNER_PROMPT
+            self.executor = DAGExecutor(self.llm, custom_prompts.get("dag_executor"))
         else:
-            planner_prompt = None
-            executor_prompt = None
+            planner_prompt = custom_prompts.get("planner")
+            self.executor = Executor(self.llm, custom_prompts.get("executor"))
 
         self.planner = Planner(self.llm, planner_prompt)
-        self.executor = Executor(self.llm, executor_prompt)
     
     def run(self, input_text: str, **kwargs) -> str:
         """
@@ -179,7 +382,10 @@ class PlanAndSolveAgent(Agent):
         print(f"\n🤖 {self.name} 开始处理问题: {input_text}")
         
         # 1. 生成计划
-        plan = self.planner.plan(input_text, **kwargs)
+        if self.parallel:
+            plan = self.planner.plan_dag(input_text, **kwargs)
+        else:
+            plan = self.planner.plan(input_text, **kwargs)
         if not plan:
             final_answer = "无法生成有效的行动计划，任务终止。"
             print(f"\n--- 任务终止 ---\n{final_answer}")
@@ -1,6 +1,7 @@
 """ReAct Agent实现 - 推理与行动结合的智能体"""
 
 import re
+import json
 from typing import Optional, List, Dict, Any, Tuple
 from ..core.agent import Agent
 from ..core.llm import HelloAgentsLLM
@@ -36,6 +37,94 @@ DEFAULT_REACT_PROMPT = """你是一个具备推理和行动能力的AI助手。
 
 现在开始你的推理和行动："""
 
+# 原生function calling模式的提示词：工具定义通过tools参数以JSON Schema发送，不再写进提示词
+DEFAULT_REACT_NATIVE_PROMPT = """你是一个具备推理和行动能力的AI助手。你可以通过思考分析问题，然后调用合适的工具来获取信息，最终给出准确的答案。
+
+## 工作流程
+1. 每一步先简要说明你的思考，然后调用一个最合适的工具
+2. 工具的执行结果会返回给你，如果信息不够，继续使用其他工具或相同工具的不同参数
+3. 只有当你确信有足够信息回答问题时，才调用 Finish 工具给出最终答案
+
+## 当前任务
+**Question:** {question}"""
+
+# 原生模式下表示结束的伪工具
+FINISH_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "Finish",
+        "description": "当你有足够信息时，给出问题的最终答案",
+        "parameters": {
+            "type": "object",
+            "properties": {"answer": {"type": "string", "description": "最终答案"}},
+            "required": ["answer"],
+        },
+    },
+}
+
+class StreamingActionParser:
+    """
+    流式Action解析器
+
+    随着token到达增量解析 Thought/Action，一旦 `tool_name[...]` 的右括号闭合
+    （按括号深度匹配，支持参数中的嵌套括号）即认为Action完整，调用方可以立刻停止生成。
+    """
+
+    THOUGHT_PATTERN = re.compile(r"Thought:\**\s*")
+    ACTION_PATTERN = re.compile(r"Action:\**\s*")
+
+    def __init__(self):
+        self.text = ""
+        self.action: Optional[str] = None
+        self._action_start: Optional[int] = None
+        self._scan_pos = 0
+        self._depth = 0
+
+    def feed(self, chunk: str) -> bool:
+        """
+        追加一个文本片段
+
+        Returns:
+            Action是否已经完整
+        """
+        if self.action is not None:
+            return True
+        self.text += chunk
+
+        if self._action_start is None:
+            match = self.ACTION_PATTERN.search(self.text)
+            # 标记后面至少要出现一个非空白字符，避免把尚未到达的 "**" 当作Action内容
+            if not match or match.end() >= len(self.text):
+                return False
+            self._action_start = match.end()
+            self._scan_pos = match.end()
+
+        for i in range(self._scan_pos, len(self.text)):
+            char = self.text[i]
+            if char == "[":
+                self._depth += 1
+            elif char == "]" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.action = self.text[self._action_start:i + 1].strip().strip("`")
+                    return True
+            elif char == "\n" and self._depth == 0 and self.text[self._action_start:i].strip():
+                # 没有括号的单行Action，交给完整解析处理
+                break
+        self._scan_pos = len(self.text)
+        return False
+
+    @property
+    def thought(self) -> Optional[str]:
+        """已解析出的思考内容"""
+        match = self.THOUGHT_PATTERN.search(self.text)
+        if not match:
+            return None
+        end = self.ACTION_PATTERN.search(self.text, match.end())
+        thought = self.text[match.end():end.start() if end else len(self.text)]
+        return thought.strip().strip("*").strip() or None
+
+
 class ReActAgent(Agent):
     """
     ReAct (Reasoning and Acting) Agent
@@ -57,7 +146,10 @@ class ReActAgent(Agent):
         system_prompt: Optional[str] = None,
         config: Optional[Config] = None,
         max_steps: int = 5,
-        custom_prompt: Optional[str] = None
+        custom_prompt: Optional[str] = None,
+        stream: bool = False,
+        tool_top_k: Optional[int] = None,
+        function_calling: bool = False
     ):
         """
         初始化ReActAgent
@@ -70,11 +162,19 @@ class ReActAgent(Agent):
             config: 配置对象
             max_steps: 最大执行步数
             custom_prompt: 自定义提示词模板
+            stream: 是否使用流式执行模式，Action完整后立即停止生成并调用工具
+            tool_top_k: 只向提示词注入与问题最相关的前k个工具，None表示注入全部工具
+            function_calling: 是否使用原生function calling（tools/tool_calls）代替文本格式的Action解析
         """
         super().__init__(name, llm, system_prompt, config)
         self.tool_registry = tool_registry
         self.max_steps = max_steps
+        self.stream = stream
+        self.tool_top_k = tool_top_k
+        self.function_calling = function_calling
         self.current_history: List[str] = []
+        self.last_run_stats: Dict[str, int] = {}
+        self._prefix_cache: Optional[Tuple[Tuple[str, str], str]] = None
 
         # 设置提示词模板：用户自定义优先，否则使用默认模板
         self.prompt_template = custom_prompt if custom_prompt else DEFAULT_REACT_PROMPT
@@ -85,44 +185,51 @@ class ReActAgent(Agent):
         
         Args:
             input_text: 用户问题
-            **kwargs: 其他参数
+            **kwargs: 其他参数，stream=True/False可覆盖初始化时的执行模式
             
         Returns:
             最终答案
         """
+        stream = kwargs.pop("stream", self.stream)
         self.current_history = []
         current_step = 0
+        self.last_run_stats = {"llm_calls": 0, "failed_steps": 0}
         
         print(f"\n🤖 {self.name} 开始处理问题: {input_text}")
+
+        if self.function_calling and not stream:
+            return self._run_native(input_text, **kwargs)
+        
+        # 稳定前缀（说明 + 工具 + 问题）每次运行只渲染一次，执行历史以多轮消息追加在后面，
+        # 使每一步请求都以相同的字节开头，便于服务端复用前缀/KV缓存
+        prefix = self._build_prompt_prefix(input_text)
+        messages = [{"role": "user", "content": prefix}] if prefix is not None else None
         
         while current_step < self.max_steps:
             current_step += 1
             print(f"\n--- 第 {current_step} 步 ---")
             
-            # 构建提示词
-            tools_desc = self.tool_registry.get_tools_description()
-            history_str = "\n".join(self.current_history)
-            prompt = self.prompt_template.format(
-                tools=tools_desc,
-                question=input_text,
-                history=history_str
-            )
+            # 自定义模板中没有{history}占位符时，退回到每步整体渲染
+            if prefix is None:
+                messages = [{"role": "user", "content": self._render_full_prompt(input_text)}]
             
-            # 调用LLM
-            messages = [{"role": "user", "content": prompt}]
-            response_text = self.llm.invoke(messages, **kwargs)
+            # 调用LLM并解析输出
+            self.last_run_stats["llm_calls"] += 1
+            if stream:
+                response_text, thought, action = self._stream_step(messages, **kwargs)
+            else:
+                response_text = self.llm.invoke(messages, **kwargs)
+                thought, action = self._parse_output(response_text) if response_text else (None, None)
             
             if not response_text:
                 print("❌ 错误：LLM未能返回有效响应。")
                 break
             
-            # 解析输出
-            thought, action = self._parse_output(response_text)
-            
             if thought:
                 print(f"🤔 思考: {thought}")
             
             if not action:
+                self.last_run_stats["failed_steps"] += 1
                 print("⚠️ 警告：未能解析出有效的Action，流程终止。")
                 break
             
@@ -140,7 +247,9 @@ class ReActAgent(Agent):
             # 执行工具调用
             tool_name, tool_input = self._parse_action(action)
             if not tool_name or tool_input is None:
+                self.last_run_stats["failed_steps"] += 1
                 self.current_history.append("Observation: 无效的Action格式，请检查。")
+                self._append_step(messages, prefix, action, "无效的Action格式，请检查。")
                 continue
             
             print(f"🎬 行动: {tool_name}[{tool_input}]")
@@ -152,6 +261,7 @@ class ReActAgent(Agent):
             # 更新历史
             self.current_history.append(f"Action: {action}")
             self.current_history.append(f"Observation: {observation}")
+            self._append_step(messages, prefix, action, observation)
         
         print("⏰ 已达到最大步数，流程终止。")
         final_answer = "抱歉，我无法在限定步数内完成这个任务。"
@@ -162,6 +272,127 @@ class ReActAgent(Agent):
         
         return final_answer
     
+    def _run_native(self, input_text: str, **kwargs) -> str:
+        """
+        原生function calling模式
+
+        工具以JSON Schema随请求发送（按注册表版本缓存），模型返回结构化的tool_calls，
+        参数中的逗号、括号等不再需要从自由文本中解析；Finish作为一个伪工具结束流程。
+        """
+        tools = self.tool_registry.get_openai_tools(query=input_text, top_k=self.tool_top_k) + [FINISH_TOOL]
+        messages: List[Dict[str, Any]] = [
+            {"role": "user", "content": DEFAULT_REACT_NATIVE_PROMPT.format(question=input_text)}
+        ]
+
+        for current_step in range(1, self.max_steps + 1):
+            print(f"\n--- 第 {current_step} 步 ---")
+            self.last_run_stats["llm_calls"] += 1
+            reply = self.llm.invoke_with_tools(messages, tools, **kwargs)
+
+            if reply["content"]:
+                print(f"🤔 思考: {reply['content']}")
+
+            if not reply["tool_calls"]:
+                # 模型没有调用工具而是直接回答
+                if reply["content"]:
+                    return self._finish(input_text, reply["content"])
+                self.last_run_stats["failed_steps"] += 1
+                print("❌ 错误：LLM未能返回有效响应。")
+                break
+
+            messages.append(reply["message"])
+            for call in reply["tool_calls"]:
+                if call["name"] == "Finish" and not call["error"]:
+                    return self._finish(input_text, str(call["arguments"].get("answer", "")))
+
+                if call["error"]:
+                    self.last_run_stats["failed_steps"] += 1
+                    observation = f"参数错误：{call['error']}，请检查后重新调用。"
+                else:
+                    print(f"🎬 行动: {call['name']}({json.dumps(call['arguments'], ensure_ascii=False)})")
+                    observation = self.tool_registry.execute_tool_call(call["name"], call["arguments"])
+                print(f"👀 观察: {observation}")
+
+                self.current_history.append(f"Action: {call['name']}[{json.dumps(call['arguments'], ensure_ascii=False)}]")
+                self.current_history.append(f"Observation: {observation}")
+                messages.append({"role": "tool", "tool_call_id": call["id"], "content": observation})
+
+        print("⏰ 已达到最大步数，流程终止。")
+        return self._finish(input_text, "抱歉，我无法在限定步数内完成这个任务。")
+
+    def _finish(self, input_text: str, final_answer: str) -> str:
+        """记录最终答案并保存到历史记录"""
+        print(f"🎉 最终答案: {final_answer}")
+        self.add_message(Message(input_text, "user"))
+        self.add_message(Message(final_answer, "assistant"))
+        return final_answer
+
+    def _build_prompt_prefix(self, question: str) -> Optional[str]:
+        """
+        渲染去掉执行历史后的提示词前缀，工具描述与问题不变时直接复用上次的结果
+
+        Returns:
+            前缀文本；模板中没有{history}占位符时返回None
+        """
+        if "{history}" not in self.prompt_template:
+            return None
+        tools_desc = self.tool_registry.get_tools_description(query=question, top_k=self.tool_top_k)
+        key = (tools_desc, question)
+        if self._prefix_cache is not None and self._prefix_cache[0] == key:
+            return self._prefix_cache[1]
+
+        head, tail = self.prompt_template.split("{history}", 1)
+        prefix = (head + tail).format(tools=tools_desc, question=question)
+        self._prefix_cache = (key, prefix)
+        return prefix
+
+    def _render_full_prompt(self, question: str) -> str:
+        """按原始方式整体渲染模板（用于不含{history}占位符的自定义模板）"""
+        return self.prompt_template.format(
+            tools=self.tool_registry.get_tools_description(query=question, top_k=self.tool_top_k),
+            question=question,
+            history="\n".join(self.current_history)
+        )
+
+    def _append_step(
+        self,
+        messages: List[Dict[str, str]],
+        prefix: Optional[str],
+        action: str,
+        observation: str
+    ):
+        """
+        把一步的行动与观察以 assistant/user 消息追加到对话末尾。
+        与原先的执行历史保持一致，只保留Action而不重复思考内容，控制上下文增长。
+        """
+        if prefix is None:
+            return
+        messages.append({"role": "assistant", "content": f"Action: {action}"})
+        messages.append({"role": "user", "content": f"Observation: {observation}"})
+
+    def _stream_step(self, messages: List[Dict[str, str]], **kwargs) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        流式执行一步：边接收边解析，Action完整后立即关闭流，节省等待时间与输出token
+
+        Returns:
+            (已接收的文本, 思考, 行动)
+        """
+        parser = StreamingActionParser()
+        chunks = self.llm.think(messages, **kwargs)
+        try:
+            for chunk in chunks:
+                if parser.feed(chunk):
+                    print("\n⚡ Action已完整，提前结束生成")
+                    break
+        finally:
+            chunks.close()
+
+        if parser.action is not None:
+            return parser.text, parser.thought, parser.action
+        # 流结束仍未得到完整Action（例如没有括号的格式），退回完整解析
+        thought, action = self._parse_output(parser.text)
+        return parser.text, thought, action
+
     def _parse_output(self, text: str) -> Tuple[Optional[str], Optional[str]]:
         """解析LLM输出，提取思考和行动"""
         thought_match = re.search(r"Thought: (.*)", text)
@@ -1,10 +1,14 @@
 """Reflection Agent实现 - 自我反思与迭代优化的智能体"""
 
+import time
+import asyncio
+from difflib import SequenceMatcher
 from typing import Optional, List, Dict, Any
 from ..core.agent import Agent
 from ..core.llm import HelloAgentsLLM
 from ..core.config import Config
 from ..core.message import Message
+from ..utils.helpers import run_coroutine_sync
 
 # 默认提示词模板
 DEFAULT_PROMPTS = {
@@ -72,6 +76,20 @@ class Memory:
                 return record['content']
         return ""
 
+    def is_converged(self, threshold: float) -> bool:
+        """
+        判断最近两次执行结果是否已经收敛（相似度不低于threshold）
+
+        先用quick_ratio（相似度上界）快速排除差异明显的情况，只有必要时才计算精确相似度。
+        """
+        executions = [record['content'] for record in self.records if record['type'] == 'execution']
+        if len(executions) < 2:
+            return False
+        matcher = SequenceMatcher(None, executions[-2], executions[-1])
+        if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+            return False
+        return matcher.ratio() >= threshold
+
 class ReflectionAgent(Agent):
     """
     Reflection Agent - 自我反思与迭代优化的智能体
@@ -94,7 +112,10 @@ class ReflectionAgent(Agent):
         system_prompt: Optional[str] = None,
         config: Optional[Config] = None,
         max_iterations: int = 3,
-        custom_prompts: Optional[Dict[str, str]] = None
+        custom_prompts: Optional[Dict[str, str]] = None,
+        reflect_llm: Optional[HelloAgentsLLM] = None,
+        pipelined: bool = False,
+        convergence_threshold: Optional[float] = None
     ):
         """
         初始化ReflectionAgent
@@ -106,10 +127,20 @@ class ReflectionAgent(Agent):
             config: 配置对象
             max_iterations: 最大迭代次数
             custom_prompts: 自定义提示词模板 {"initial": "", "reflect": "", "refine": ""}
+            reflect_llm: 负责反思（评审）角色的LLM，可以使用更便宜的模型，默认与llm相同
+            pipelined: 是否使用流水线模式：反思与推测性优化并发执行，只有评审意见与推测所用的一致时才采用优化结果
+            convergence_threshold: 相邻两次执行结果的相似度达到该值时提前结束，
+                None表示顺序模式不检查、流水线模式使用0.95
         """
         super().__init__(name, llm, system_prompt, config)
         self.max_iterations = max_iterations
         self.memory = Memory()
+        self.reflect_llm = reflect_llm or llm
+        self.pipelined = pipelined
+        self.convergence_threshold = convergence_threshold
+        if pipelined and convergence_threshold is None:
+            self.convergence_threshold = 0.95
+        self.last_run_stats: Dict[str, Any] = {}
 
         # 设置提示词模板：用户自定义优先，否则使用默认模板
         self.prompts = custom_prompts if custom_prompts else DEFAULT_PROMPTS
@@ -130,6 +161,12 @@ class ReflectionAgent(Agent):
         # 重置记忆
         self.memory = Memory()
 
+        if self.pipelined:
+            final_result = run_coroutine_sync(self._run_pipelined(input_text, **kwargs))
+            self.add_message(Message(input_text, "user"))
+            self.add_message(Message(final_result, "assistant"))
+            return final_result
+
         # 1. 初始执行
         print("\n--- 正在进行初始尝试 ---")
         initial_prompt = self.prompts["initial"].format(task=input_text)
@@ -147,11 +184,11 @@ class ReflectionAgent(Agent):
                 task=input_text,
                 content=last_result
             )
-            feedback = self._get_llm_response(reflect_prompt, **kwargs)
+            feedback = self._get_llm_response(reflect_prompt, llm=self.reflect_llm, **kwargs)
             self.memory.add_record("reflection", feedback)
 
             # b. 检查是否需要停止
-            if "无需改进" in feedback or "no need for improvement" in feedback.lower():
+            if self._is_approved(feedback):
                 print("\n✅ 反思认为结果已无需改进，任务完成。")
                 break
 
@@ -165,6 +202,10 @@ class ReflectionAgent(Agent):
             refined_result = self._get_llm_response(refine_prompt, **kwargs)
             self.memory.add_record("execution", refined_result)
 
+            if self.convergence_threshold is not None and self.memory.is_converged(self.convergence_threshold):
+                print("\n✅ 优化结果与上一轮基本一致，判定已收敛，任务完成。")
+                break
+
         final_result = self.memory.get_last_execution()
         print(f"\n--- 任务完成 ---\n最终结果:\n{final_result}")
 
@@ -174,7 +215,118 @@ class ReflectionAgent(Agent):
 
         return final_result
     
-    def _get_llm_response(self, prompt: str, **kwargs) -> str:
+    async def _run_pipelined(self, input_text: str, **kwargs) -> str:
+        """
+        流水线模式
+
+        从第二轮起，反思请求与推测性优化请求同时发出，推测性优化假设本轮评审意见与上一轮相同：
+        - 评审通过：取消推测性优化，任务完成
+        - 评审意见与推测所用的意见一致：直接采用推测性优化的结果（与顺序执行的提示词相同）
+        - 评审意见不同：丢弃推测结果，按本轮评审意见重新优化，保证结果与顺序执行一致
+        相邻两次结果收敛时提前结束，省去后续的反思调用。
+        """
+        stats = {
+            "llm_calls": 0, "discarded_calls": 0, "speculation_hits": 0, "wasted_tokens": 0,
+            "tokens_saved": 0, "latency_saved": 0.0, "elapsed": 0.0,
+        }
+        started = time.perf_counter()
+
+        print("\n--- 正在进行初始尝试 ---")
+        initial_prompt = self.prompts["initial"].format(task=input_text)
+        self.memory.add_record("execution", await self._aget_llm_response(initial_prompt, **kwargs))
+        stats["llm_calls"] += 1
+
+        previous_feedback: Optional[str] = None  # 上一轮的评审意见，作为本轮推测性优化的依据
+        for i in range(self.max_iterations):
+            print(f"\n--- 第 {i+1}/{self.max_iterations} 轮迭代（流水线） ---")
+            last_result = self.memory.get_last_execution()
+            reflect_prompt = self.prompts["reflect"].format(task=input_text, content=last_result)
+
+            round_start = time.perf_counter()
+            reflect_task = asyncio.create_task(
+                self._timed(self._aget_llm_response(reflect_prompt, llm=self.reflect_llm, **kwargs))
+            )
+            refine_task = None
+            if previous_feedback is not None:
+                speculative_prompt = self.prompts["refine"].format(
+                    task=input_text, last_attempt=last_result, feedback=previous_feedback
+                )
+                refine_task = asyncio.create_task(self._timed(self._aget_llm_response(speculative_prompt, **kwargs)))
+
+            feedback, reflect_time = await reflect_task
+            stats["llm_calls"] += 1
+            self.memory.add_record("reflection", feedback)
+
+            if self._is_approved(feedback):
+                if refine_task is not None:
+                    self._discard_speculation(refine_task, speculative_prompt, stats)
+                print("\n✅ 反思认为结果已无需改进，任务完成。")
+                break
+
+            if refine_task is not None and feedback.strip() == previous_feedback.strip():
+                refined_result, refine_time = await refine_task
+                stats["llm_calls"] += 1
+                stats["speculation_hits"] += 1
+                # 顺序执行需要 reflect + refine 的时间，流水线只需两者中较长的一个
+                stats["latency_saved"] += reflect_time + refine_time - (time.perf_counter() - round_start)
+                print("⚡ 评审意见与上一轮一致，采用推测性优化的结果")
+            else:
+                if refine_task is not None:
+                    self._discard_speculation(refine_task, speculative_prompt, stats)
+                refine_prompt = self.prompts["refine"].format(
+                    task=input_text, last_attempt=last_result, feedback=feedback
+                )
+                refined_result = await self._aget_llm_response(refine_prompt, **kwargs)
+                stats["llm_calls"] += 1
+            self.memory.add_record("execution", refined_result)
+            previous_feedback = feedback
+
+            if self.memory.is_converged(self.convergence_threshold):
+                # 省去了确认收敛所需的那一轮反思调用
+                stats["tokens_saved"] += (len(reflect_prompt) + len(feedback)) // 3
+                print("\n✅ 优化结果与上一轮基本一致，判定已收敛，任务完成。")
+                break
+
+        stats["tokens_saved"] -= stats["wasted_tokens"]
+        stats["elapsed"] = time.perf_counter() - started
+        self.last_run_stats = stats
+
+        final_result = self.memory.get_last_execution()
+        print(f"\n--- 任务完成 ---\n最终结果:\n{final_result}")
+        print(
+            f"📊 LLM调用 {stats['llm_calls']} 次（丢弃 {stats['discarded_calls']} 次），"
+            f"估计节省token {stats['tokens_saved']}，节省延迟 {stats['latency_saved']:.2f}s，"
+            f"总耗时 {stats['elapsed']:.2f}s"
+        )
+        return final_result
+
+    @staticmethod
+    def _discard_speculation(task: asyncio.Task, prompt: str, stats: Dict[str, Any]):
+        """取消（或丢弃已完成的）推测性优化请求，并计入浪费的token"""
+        task.cancel()
+        # 已经完成（或失败）的请求不会被取消，取走结果避免未检索异常的警告
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        stats["discarded_calls"] += 1
+        stats["wasted_tokens"] += len(prompt) // 3
+
+    @staticmethod
+    async def _timed(coro) -> tuple:
+        """执行协程并返回 (结果, 耗时秒数)"""
+        start = time.perf_counter()
+        result = await coro
+        return result, time.perf_counter() - start
+
+    @staticmethod
+    def _is_approved(feedback: str) -> bool:
+        """评审意见是否认为无需改进"""
+        return "无需改进" in feedback or "no need for improvement" in feedback.lower()
+
+    def _get_llm_response(self, prompt: str, llm: Optional[HelloAgentsLLM] = None, **kwargs) -> str:
         """调用LLM并获取完整响应"""
         messages = [{"role": "user", "content": prompt}]
-        return self.llm.invoke(messages, **kwargs) or ""
+        return (llm or self.llm).invoke(messages, **kwargs) or ""
+
+    async def _aget_llm_response(self, prompt: str, llm: Optional[HelloAgentsLLM] = None, **kwargs) -> str:
+        """异步调用LLM并获取完整响应"""
+        messages = [{"role": "user", "content": prompt}]
+        return await (llm or self.llm).ainvoke(messages, **kwargs) or ""
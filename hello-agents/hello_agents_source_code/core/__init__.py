@@ -1,7 +1,11 @@
 """核心框架模块"""
 
 from .agent import Agent
-from .llm import HelloAgentsLLM
+from .llm import HelloAgentsLLM, close_async_clients
+from .batching import RequestBatcher
+from .cache import ResponseCache
+from .endpoints import Endpoint, EndpointPool
+from .rate_limit import RateLimiter, RetryPolicy, PRIORITY_INTERACTIVE, PRIORITY_BATCH
 from .message import Message
 from .config import Config
 from .exceptions import HelloAgentsException
@@ -9,6 +13,15 @@ from .exceptions import HelloAgentsException
 __all__ = [
     "Agent",
     "HelloAgentsLLM", 
+    "close_async_clients",
+    "RequestBatcher",
+    "ResponseCache",
+    "Endpoint",
+    "EndpointPool",
+    "RateLimiter",
+    "RetryPolicy",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_BATCH",
     "Message",
     "Config",
     "HelloAgentsException"
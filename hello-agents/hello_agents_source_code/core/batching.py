@@ -0,0 +1,117 @@
+"""请求合并 - 位于HelloAgentsLLM.invoke之前的调度层"""
+
+import json
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """
+    计算请求的内容指纹
+
+    所有参数会被序列化为规范化的JSON（键排序），再取SHA-256，
+    因此字节级相同的请求总是得到相同的指纹。
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BatchStats:
+    """请求合并指标：总请求数、实际下发数与合并命中"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    def record_request(self, coalesced: bool, waiters: int = 1):
+        with self._lock:
+            self.requests += 1
+            if coalesced:
+                self.coalesced += 1
+            self.max_waiters = max(self.max_waiters, waiters)
+
+    def to_dict(self) -> dict[str, Any]:
+        """导出统计信息"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "dispatched": self.requests - self.coalesced,
+                "coalesced": self.coalesced,
+                "coalesce_rate": self.coalesced / self.requests if self.requests else 0.0,
+                "max_waiters": self.max_waiters,
+            }
+
+
+class RequestBatcher:
+    """
+    请求合并调度器
+
+    对在途的相同请求做single-flight合并：第一个调用方在自己的线程中发出请求，
+    之后到达的相同请求不再下发，而是等待同一个结果。
+    OpenAI兼容的chat接口不支持在一次调用中提交多个对话，因此这里不设收集窗口，
+    不同的请求各自立即下发，不会因等待凑批而增加延迟。
+    """
+
+    _shared: dict[tuple[str, str], "RequestBatcher"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self.stats = BatchStats()
+        self._lock = threading.Lock()
+        self._inflight: dict[str, tuple[Future, list[int]]] = {}
+
+    @classmethod
+    def shared(cls, base_url: str, api_key: str) -> "RequestBatcher":
+        """获取指向同一服务端点的共享调度器，使不同LLM实例之间也能合并请求"""
+        key = (base_url, api_key)
+        with cls._shared_lock:
+            batcher = cls._shared.get(key)
+            if batcher is None:
+                batcher = cls()
+                cls._shared[key] = batcher
+            return batcher
+
+    def submit(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        提交请求并阻塞等待结果
+
+        Args:
+            key: 请求指纹，相同指纹的在途请求会被合并
+            fn: 实际发出请求的函数，由第一个提交该指纹的调用方执行
+
+        Returns:
+            fn的返回值；fn抛出的异常会传播给所有等待者
+        """
+        with self._lock:
+            entry = self._inflight.get(key)
+            coalesced = entry is not None
+            if coalesced:
+                future, waiters = entry
+                waiters[0] += 1
+            else:
+                future, waiters = Future(), [1]
+                self._inflight[key] = (future, waiters)
+            self.stats.record_request(coalesced, waiters[0])
+
+        if coalesced:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def get_stats(self) -> dict[str, Any]:
+        """获取请求合并统计信息"""
+        return self.stats.to_dict()
@@ -0,0 +1,268 @@
+"""响应缓存 - 面向确定性LLM调用的内容寻址缓存"""
+
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .batching import request_fingerprint
+
+
+class LRUCache:
+    """
+    线程安全的内存LRU缓存
+
+    - 超过max_entries时淘汰最久未使用的条目
+    - 支持全局TTL以及单条目TTL，过期条目在读取时惰性删除
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            max_entries: 最大条目数
+            ttl: 默认过期时间（秒），None表示不过期
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """读取条目，不存在或已过期时返回default"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        """写入条目，ttl为None时使用默认TTL"""
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Any) -> bool:
+        """删除条目"""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def delete_where(self, predicate) -> int:
+        """删除所有键满足条件的条目，返回删除数量"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    基于SQLite的磁盘缓存层
+
+    - 支持TTL过期，过期条目在读取时删除
+    - 条目数超过max_entries时先清理过期条目，仍超出再按最近访问时间淘汰
+    - 条目数在内存中维护，写入时不再统计全表；多个进程共享同一文件时以各自的计数为准，len()会重新统计
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 100_000, ttl: Optional[float] = None):
+        """
+        Args:
+            db_path: 数据库文件路径
+            max_entries: 最大条目数
+            ttl: 过期时间（秒），None表示不过期
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_access ON response_cache (last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_expires ON response_cache (expires_at)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._count -= self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,)).rowcount
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        with self._lock:
+            # 先删除旧值，由删除的行数得知是新增还是覆盖
+            replaced = self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,)).rowcount
+            self._conn.execute(
+                "INSERT INTO response_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now)
+            )
+            self._count += 1 - replaced
+            if self._count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+            self._conn.commit()
+            self._count = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        """条目数超出容量时调用：清理过期条目，仍超出则按LRU淘汰，调用方需持有锁"""
+        self._count -= self._conn.execute(
+            "DELETE FROM response_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        ).rowcount
+        overflow = self._count - self.max_entries
+        if overflow > 0:
+            self._count -= self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN "
+                "(SELECT key FROM response_cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._count = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+            return self._count
+
+
+class ResponseCache:
+    """
+    LLM响应缓存
+
+    以 (model, messages, temperature, max_tokens, 其他调用参数) 的内容指纹为键，
+    内存LRU作为一级缓存，可选的SQLite文件作为二级持久缓存。
+    默认只缓存temperature=0的确定性调用。
+    """
+
+    def __init__(
+        self,
+        max_memory_entries: int = 1024,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 100_000,
+        ttl: Optional[float] = None,
+        deterministic_only: bool = True
+    ):
+        """
+        Args:
+            max_memory_entries: 内存缓存最大条目数
+            db_path: SQLite缓存文件路径，None表示只使用内存缓存
+            max_disk_entries: 磁盘缓存最大条目数
+            ttl: 缓存过期时间（秒），None表示不过期
+            deterministic_only: 是否只缓存temperature=0的调用
+        """
+        self.memory = LRUCache(max_entries=max_memory_entries, ttl=ttl)
+        self.disk = SQLiteCache(db_path, max_entries=max_disk_entries, ttl=ttl) if db_path else None
+        self.deterministic_only = deterministic_only
+
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def make_key(self, model: str, messages: list[dict[str, str]], params: dict[str, Any]) -> str:
+        """计算缓存键"""
+        return request_fingerprint(model, messages, params)
+
+    def is_cacheable(self, params: dict[str, Any]) -> bool:
+        """判断调用是否可缓存，流式等传输层参数不影响结果"""
+        if self.deterministic_only:
+            return params.get("temperature") == 0
+        return True
+
+    def get(self, key: str) -> Optional[str]:
+        """按内存、磁盘的顺序查找，磁盘命中会回填内存"""
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                self._count("disk_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str):
+        """写入所有缓存层"""
+        if value is None:
+            return
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self):
+        """清空所有缓存层"""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """获取命中统计"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_entries": len(self.memory),
+                "disk_entries": len(self.disk) if self.disk is not None else 0,
+            }
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
@@ -0,0 +1,240 @@
+"""多端点负载均衡 - 路由、熔断与健康检查"""
+
+import time
+import threading
+from typing import Any, Callable, Iterable, Literal, Optional, Union
+
+ROUTING_STRATEGIES = Literal["least_outstanding", "ewma"]
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    - closed: 正常放行，连续失败达到阈值后打开
+    - open: 拒绝请求，经过reset_timeout后进入half_open
+    - half_open: 只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow_request(self) -> bool:
+        """判断当前是否允许发出请求，调用方需持有端点池的锁"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+
+class Endpoint:
+    """单个OpenAI兼容服务端点及其运行时状态"""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        name: Optional[str] = None
+    ):
+        """
+        Args:
+            base_url: 服务地址
+            api_key: API密钥，未提供时沿用LLM实例的密钥
+            model: 该端点使用的模型名称，未提供时沿用LLM实例的模型
+            name: 端点名称，用于日志与统计
+        """
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.name = name or base_url
+        self.client: Any = None
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+        self.breaker = CircuitBreaker()
+
+    @classmethod
+    def from_spec(cls, spec: Union[str, dict[str, Any], "Endpoint"]) -> "Endpoint":
+        """从地址字符串、配置字典或Endpoint实例构建端点；传入Endpoint时复制配置，运行状态不与原实例共享"""
+        if isinstance(spec, Endpoint):
+            return cls(base_url=spec.base_url, api_key=spec.api_key, model=spec.model, name=spec.name)
+        if isinstance(spec, str):
+            return cls(base_url=spec)
+        return cls(**spec)
+
+    def __repr__(self) -> str:
+        return f"Endpoint(name={self.name}, state={self.breaker.state})"
+
+
+class EndpointPool:
+    """
+    端点池
+
+    - least_outstanding: 选择在途请求最少的端点，相同时选择延迟更低的
+    - ewma: 选择 EWMA延迟 ×（在途请求数 + 1）最小的端点，慢副本会自然分到更少流量
+    熔断打开的端点不会被选中；可选的后台健康检查用于尽早恢复或摘除端点。
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[Union[str, dict[str, Any], Endpoint]],
+        strategy: ROUTING_STRATEGIES = "least_outstanding",
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        ewma_alpha: float = 0.3
+    ):
+        """
+        Args:
+            endpoints: 端点列表
+            strategy: 路由策略
+            failure_threshold: 连续失败多少次后熔断
+            reset_timeout: 熔断后多久允许探测请求（秒）
+            ewma_alpha: 延迟EWMA的平滑系数
+        """
+        self.endpoints = [Endpoint.from_spec(spec) for spec in endpoints]
+        if not self.endpoints:
+            raise ValueError("端点池至少需要一个端点")
+        if strategy not in ("least_outstanding", "ewma"):
+            raise ValueError(f"不支持的路由策略: {strategy}")
+        self.strategy = strategy
+        self.ewma_alpha = ewma_alpha
+        for endpoint in self.endpoints:
+            endpoint.breaker.failure_threshold = failure_threshold
+            endpoint.breaker.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._health_thread: Optional[threading.Thread] = None
+        self._stop_health = threading.Event()
+
+    def select(self, exclude: Iterable[Endpoint] = (), force: bool = False) -> Optional[Endpoint]:
+        """
+        选择一个端点并计入在途请求
+
+        Args:
+            exclude: 本次请求已经尝试失败的端点
+            force: 没有可用端点时是否忽略熔断状态，强制选择得分最好的端点
+
+        Returns:
+            选中的端点；所有端点都被排除或熔断且未强制选择时返回None
+        """
+        excluded = {id(endpoint) for endpoint in exclude}
+        with self._lock:
+            candidates = [e for e in self.endpoints if id(e) not in excluded]
+            candidates.sort(key=self._score)
+            chosen = next((e for e in candidates if e.breaker.allow_request()), None)
+            if chosen is None and force:
+                chosen = min(self.endpoints, key=self._score)
+            if chosen is not None:
+                chosen.outstanding += 1
+                chosen.requests += 1
+            return chosen
+
+    def release(self, endpoint: Endpoint, latency: Optional[float] = None, success: bool = True):
+        """
+        请求结束后更新端点状态
+
+        Args:
+            endpoint: select返回的端点
+            latency: 本次请求耗时（秒）
+            success: 端点是否健康地完成了请求
+        """
+        with self._lock:
+            endpoint.outstanding = max(0, endpoint.outstanding - 1)
+            if success:
+                endpoint.breaker.record_success()
+                if latency is not None:
+                    if endpoint.ewma_latency is None:
+                        endpoint.ewma_latency = latency
+                    else:
+                        endpoint.ewma_latency += self.ewma_alpha * (latency - endpoint.ewma_latency)
+            else:
+                endpoint.failures += 1
+                endpoint.breaker.record_failure()
+
+    def start_health_checks(self, probe: Callable[[Endpoint], bool], interval: float = 10.0):
+        """
+        启动后台健康检查线程
+
+        Args:
+            probe: 探测函数，返回端点是否健康
+            interval: 检查间隔（秒）
+        """
+        if self._health_thread is not None:
+            return
+        # 每个线程使用独立的停止事件，stop后立即重新start不会让旧线程继续运行
+        stop = self._stop_health = threading.Event()
+
+        def _loop():
+            while not stop.wait(interval):
+                for endpoint in self.endpoints:
+                    try:
+                        healthy = probe(endpoint)
+                    except Exception:
+                        healthy = False
+                    with self._lock:
+                        if healthy:
+                            endpoint.breaker.record_success()
+                        else:
+                            endpoint.breaker.record_failure()
+
+        self._health_thread = threading.Thread(target=_loop, name="llm-endpoint-health", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self, timeout: Optional[float] = 5.0):
+        """
+        停止后台健康检查
+
+        Args:
+            timeout: 等待线程退出的最长时间（秒），正在进行的探测会先完成
+        """
+        self._stop_health.set()
+        thread, self._health_thread = self._health_thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def get_stats(self) -> list[dict[str, Any]]:
+        """获取各端点的运行状态"""
+        with self._lock:
+            return [
+                {
+                    "name": endpoint.name,
+                    "base_url": endpoint.base_url,
+                    "state": endpoint.breaker.state,
+                    "outstanding": endpoint.outstanding,
+                    "ewma_latency_ms": endpoint.ewma_latency * 1000 if endpoint.ewma_latency is not None else None,
+                    "requests": endpoint.requests,
+                    "failures": endpoint.failures,
+                }
+                for endpoint in self.endpoints
+            ]
+
+    def _score(self, endpoint: Endpoint) -> tuple:
+        # 没有延迟样本的端点视为0延迟，保证新端点能被尽快探索
+        latency = endpoint.ewma_latency or 0.0
+        if self.strategy == "ewma":
+            return (latency * (endpoint.outstanding + 1), endpoint.outstanding)
+        return (endpoint.outstanding, latency)
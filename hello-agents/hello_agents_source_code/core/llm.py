@@ -1,10 +1,24 @@
 """HelloAgents统一LLM接口 - 基于OpenAI原生API"""
 
 import os
-from typing import Literal, Optional, Iterator
-from openai import OpenAI
+import json
+import time
+import asyncio
+import threading
+import weakref
+from typing import Literal, Optional, Iterator, AsyncIterator, Any, Union, TYPE_CHECKING
+
+# openai SDK导入较慢，在首次创建客户端时才导入，导入本包本身保持轻量
+if TYPE_CHECKING:
+    from openai import OpenAI, AsyncOpenAI
 
 from .exceptions import HelloAgentsException
+from .batching import RequestBatcher, request_fingerprint
+from .cache import ResponseCache
+from .endpoints import Endpoint, EndpointPool, ROUTING_STRATEGIES
+from .rate_limit import (
+    PRIORITY_INTERACTIVE, RateLimiter, RetryPolicy, estimate_tokens, get_rate_limiter
+)
 
 # 支持的LLM提供商
 SUPPORTED_PROVIDERS = Literal[
@@ -12,6 +26,75 @@ SUPPORTED_PROVIDERS = Literal[
     "kimi", "zhipu", "ollama", "vllm", "local", "auto"
 ]
 
+# 异步客户端共享池：按事件循环隔离，同一循环内相同 (base_url, api_key) 共用一个 AsyncOpenAI
+# httpx的连接池绑定在创建它的事件循环上，因此不能跨循环复用
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str], 'AsyncOpenAI']]" = weakref.WeakKeyDictionary()
+_ASYNC_CLIENTS_LOCK = threading.Lock()
+
+# 从缓存回放流式响应时每个片段的字符数
+CACHE_REPLAY_CHUNK_SIZE = 16
+
+
+async def close_async_clients() -> None:
+    """关闭当前事件循环中所有共享的异步客户端，释放连接池"""
+    loop = asyncio.get_running_loop()
+    with _ASYNC_CLIENTS_LOCK:
+        clients = _ASYNC_CLIENTS.pop(loop, {})
+    for client in clients.values():
+        await client.close()
+
+
+class _TrackedStream:
+    """
+    包装流式响应：端点在流结束（读完、出错或被关闭）时才释放并记录延迟，
+    流中途的错误同样计入端点的熔断统计
+    """
+
+    def __init__(self, stream: Any, on_done):
+        self._stream = stream
+        self._on_done = on_done  # on_done(error, complete)
+        self._done = False
+
+    def _finish(self, error: Optional[BaseException], complete: bool):
+        if not self._done:
+            self._done = True
+            self._on_done(error, complete)
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                yield chunk
+        except BaseException as e:
+            self._finish(e, False)
+            raise
+        self._finish(None, True)
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._finish(None, False)
+
+
+class _AsyncTrackedStream(_TrackedStream):
+    """_TrackedStream的异步版本"""
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except BaseException as e:
+            self._finish(e, False)
+            raise
+        self._finish(None, True)
+
+    async def close(self):
+        try:
+            await self._stream.close()
+        finally:
+            self._finish(None, False)
+
+
 class HelloAgentsLLM:
     """
     为HelloAgents定制的LLM客户端。
@@ -33,6 +116,17 @@ class HelloAgentsLLM:
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         timeout: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        batching: Union[bool, RequestBatcher] = False,
+        cache: Optional[ResponseCache] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        endpoints: Optional[list[Union[str, dict[str, Any], Endpoint]]] = None,
+        routing: ROUTING_STRATEGIES = "least_outstanding",
+        health_check_interval: Optional[float] = None,
         **kwargs
     ):
         """
@@ -47,14 +141,37 @@ class HelloAgentsLLM:
             temperature: 温度参数
             max_tokens: 最大token数
             timeout: 超时时间，从环境变量LLM_TIMEOUT读取，默认60秒
+            max_connections: 异步连接池最大连接数，从环境变量LLM_MAX_CONNECTIONS读取，默认100
+            max_keepalive_connections: 异步连接池最大保活连接数，从环境变量LLM_MAX_KEEPALIVE读取，默认20
+            keepalive_expiry: 保活连接空闲过期时间（秒），从环境变量LLM_KEEPALIVE_EXPIRY读取，默认30秒
+            batching: 是否合并并发的相同请求。True表示使用同一端点的共享调度器，
+                也可以直接传入RequestBatcher实例
+            cache: 响应缓存，命中时不再请求服务端，可在多个实例间共享
+            requests_per_minute: 每分钟请求数上限，从环境变量LLM_RPM读取，默认不限
+            tokens_per_minute: 每分钟token数上限，从环境变量LLM_TPM读取，默认不限
+            max_retries: 限流、超时、服务端错误时的最大重试次数，从环境变量LLM_MAX_RETRIES读取，默认3次
+            endpoints: 端点池，元素可以是地址字符串、{"base_url", "api_key", "model", "name"}字典或Endpoint。
+                提供时按routing策略在端点间路由并自动故障转移，未提供base_url时以第一个端点为主地址
+            routing: 端点路由策略，"least_outstanding"（最少在途请求）或"ewma"（延迟EWMA）
+            health_check_interval: 端点后台健康检查间隔（秒），None表示只根据请求结果被动熔断
         """
         # 优先使用传入参数，如果未提供，则从环境变量加载
         self.model = model or os.getenv("LLM_MODEL_ID")
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.timeout = timeout or int(os.getenv("LLM_TIMEOUT", "60"))
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+        self.max_keepalive_connections = max_keepalive_connections or int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
         self.kwargs = kwargs
 
+        # 端点池模式下，以第一个端点作为主地址参与provider检测与凭据解析
+        self.endpoint_pool: Optional[EndpointPool] = EndpointPool(endpoints, routing) if endpoints else None
+        if self.endpoint_pool is not None:
+            primary = self.endpoint_pool.endpoints[0]
+            base_url = base_url or primary.base_url
+            api_key = api_key or primary.api_key
+
         # 自动检测provider或使用指定的provider
         self.provider = provider or self._auto_detect_provider(api_key, base_url)
 
@@ -69,6 +186,46 @@ class HelloAgentsLLM:
 
         # 创建OpenAI客户端
         self._client = self._create_client()
+        if self.endpoint_pool is not None:
+            for endpoint in self.endpoint_pool.endpoints:
+                endpoint.api_key = endpoint.api_key or self.api_key
+                endpoint.client = self._create_client(endpoint.base_url, endpoint.api_key)
+            if health_check_interval:
+                self.endpoint_pool.start_health_checks(self._probe_endpoint, health_check_interval)
+
+        # 请求合并调度器（可选）
+        if isinstance(batching, RequestBatcher):
+            self.batcher: Optional[RequestBatcher] = batching
+        elif batching:
+            self.batcher = RequestBatcher.shared(self.base_url, self.api_key)
+        else:
+            self.batcher = None
+
+        # 响应缓存（可选）
+        self.cache = cache
+
+        # 限流与重试：同一提供商的所有实例共享一个限流器
+        rpm = requests_per_minute or (int(os.getenv("LLM_RPM")) if os.getenv("LLM_RPM") else None)
+        tpm = tokens_per_minute or (int(os.getenv("LLM_TPM")) if os.getenv("LLM_TPM") else None)
+        self.rate_limiter: RateLimiter = get_rate_limiter(self.provider, self.base_url, rpm, tpm)
+        self.retry_policy = RetryPolicy(
+            max_retries=max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "3"))
+        )
+
+    def close(self):
+        """停止端点健康检查并关闭同步客户端的连接池"""
+        if self.endpoint_pool is not None:
+            self.endpoint_pool.stop_health_checks()
+            for endpoint in self.endpoint_pool.endpoints:
+                if endpoint.client is not None:
+                    endpoint.client.close()
+        self._client.close()
+
+    def __enter__(self) -> "HelloAgentsLLM":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def _auto_detect_provider(self, api_key: Optional[str], base_url: Optional[str]) -> str:
         """
@@ -209,13 +366,230 @@ class HelloAgentsLLM:
             resolved_base_url = base_url or os.getenv("LLM_BASE_URL")
             return resolved_api_key, resolved_base_url
 
-    def _create_client(self) -> OpenAI:
-        """创建OpenAI客户端"""
+    def _create_client(self, base_url: Optional[str] = None, api_key: Optional[str] = None) -> "OpenAI":
+        """创建OpenAI客户端，默认指向主地址"""
+        from openai import OpenAI
+
         return OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url,
-            timeout=self.timeout
+            api_key=api_key or self.api_key,
+            base_url=base_url or self.base_url,
+            timeout=self.timeout,
+            max_retries=0  # 重试由RetryPolicy统一调度
         )
+
+    def _get_async_client(self, base_url: Optional[str] = None, api_key: Optional[str] = None) -> "AsyncOpenAI":
+        """
+        获取当前事件循环中共享的AsyncOpenAI客户端，默认指向主地址。
+        指向相同base_url/api_key的所有实例共用同一个连接池，首个创建者的连接池配置生效。
+        """
+        loop = asyncio.get_running_loop()
+        base_url = base_url or self.base_url
+        api_key = api_key or self.api_key
+        key = (base_url, api_key)
+        with _ASYNC_CLIENTS_LOCK:
+            clients = _ASYNC_CLIENTS.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                import httpx
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+                http_client = DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_keepalive_connections,
+                        keepalive_expiry=self.keepalive_expiry,
+                    ),
+                    timeout=self.timeout,
+                )
+                client = AsyncOpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    timeout=self.timeout,
+                    max_retries=0,
+                    http_client=http_client,
+                )
+                clients[key] = client
+            return client
+
+    def _call_with_retry(
+        self,
+        create,
+        messages: list[dict[str, str]],
+        params: dict[str, Any],
+        priority: int,
+        stream: bool = False
+    ):
+        """
+        在限流器、端点路由与重试策略的调度下发出请求
+
+        Args:
+            create: 发出请求的函数，参数为 (client, model)
+            messages: 消息列表，用于估算token用量
+            params: 请求参数
+            priority: 调用优先级
+            stream: create返回的是否为流式响应；是则在流结束时才释放端点并记录延迟
+
+        Returns:
+            create的返回值（流式时为包装后的流）；重试耗尽后抛出最后一次的原始异常
+        """
+        estimated = estimate_tokens(messages, params.get("max_tokens"))
+        attempt = 0
+        tried: list[Endpoint] = []
+        while True:
+            self.rate_limiter.acquire(estimated, priority)
+            endpoint = self._select_endpoint(tried)
+            started = time.monotonic()
+            try:
+                if endpoint is None:
+                    response = create(self._client, self.model)
+                else:
+                    response = create(endpoint.client, endpoint.model or self.model)
+            except Exception as e:
+                if self._failover(endpoint, e, tried):
+                    print(f"🔀 端点 {endpoint.name} 调用失败（{e.__class__.__name__}），切换到其他端点")
+                    continue
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                tried.clear()
+                print(f"⚠️ LLM调用失败（{e.__class__.__name__}），{delay:.1f}秒后进行第{attempt}次重试")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # KeyboardInterrupt等：不计入端点健康统计，但必须归还在途计数
+                if endpoint is not None:
+                    self.endpoint_pool.release(endpoint)
+                raise
+            if stream:
+                return _TrackedStream(response, self._stream_done_callback(estimated, endpoint, started))
+            self._on_call_success(response, estimated, endpoint, started)
+            return response
+
+    async def _acall_with_retry(
+        self,
+        create,
+        messages: list[dict[str, str]],
+        params: dict[str, Any],
+        priority: int,
+        stream: bool = False
+    ):
+        """_call_with_retry的异步版本，create接收 (async_client, model) 并返回协程"""
+        estimated = estimate_tokens(messages, params.get("max_tokens"))
+        attempt = 0
+        tried: list[Endpoint] = []
+        while True:
+            await self.rate_limiter.acquire_async(estimated, priority)
+            endpoint = self._select_endpoint(tried)
+            started = time.monotonic()
+            try:
+                if endpoint is None:
+                    response = await create(self._get_async_client(), self.model)
+                else:
+                    client = self._get_async_client(endpoint.base_url, endpoint.api_key)
+                    response = await create(client, endpoint.model or self.model)
+            except Exception as e:
+                if self._failover(endpoint, e, tried):
+                    continue
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                tried.clear()
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # 任务取消等：不计入端点健康统计，但必须归还在途计数
+                if endpoint is not None:
+                    self.endpoint_pool.release(endpoint)
+                raise
+            if stream:
+                return _AsyncTrackedStream(response, self._stream_done_callback(estimated, endpoint, started))
+            self._on_call_success(response, estimated, endpoint, started)
+            return response
+
+    def _select_endpoint(self, tried: list[Endpoint]) -> Optional[Endpoint]:
+        """从端点池中选择端点，未配置端点池时返回None表示使用主地址"""
+        if self.endpoint_pool is None:
+            return None
+        return self.endpoint_pool.select(exclude=tried, force=True)
+
+    def _failover(self, endpoint: Optional[Endpoint], error: Exception, tried: list[Endpoint]) -> bool:
+        """
+        记录端点失败并判断是否应立即切换到其他端点
+
+        连接错误、超时、限流与服务端错误会触发故障转移，其中限流不计入熔断；
+        参数错误等客户端错误与端点无关，直接返回False。
+        """
+        if endpoint is None:
+            return False
+        retryable = self._release_failed(endpoint, error)
+        if not retryable:
+            return False
+        tried.append(endpoint)
+        return len(tried) < len(self.endpoint_pool.endpoints)
+
+    def _probe_endpoint(self, endpoint: Endpoint) -> bool:
+        """健康检查：请求端点的模型列表"""
+        endpoint.client.with_options(timeout=5).models.list()
+        return True
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """计算重试前的等待时间，不应重试时返回None"""
+        if attempt >= self.retry_policy.max_retries or not self.retry_policy.is_retryable(error):
+            return None
+        retry_after = self.retry_policy.get_retry_after(error)
+        if self.retry_policy.is_rate_limited(error):
+            self.rate_limiter.on_throttle(retry_after)
+        return self.retry_policy.compute_delay(attempt, retry_after)
+
+    def _release_failed(self, endpoint: Endpoint, error: BaseException) -> bool:
+        """释放失败请求占用的端点，可重试的错误（限流除外）计入熔断；返回错误是否可重试"""
+        retryable = isinstance(error, Exception) and self.retry_policy.is_retryable(error)
+        self.endpoint_pool.release(
+            endpoint, success=not retryable or self.retry_policy.is_rate_limited(error)
+        )
+        return retryable
+
+    def _stream_done_callback(self, estimated_tokens: int, endpoint: Optional[Endpoint], started: float):
+        """流结束时的回调：完整读完时按成功处理并记录总耗时，中途出错按失败处理，提前关闭只释放端点"""
+        def on_done(error: Optional[BaseException], complete: bool):
+            if error is not None:
+                if endpoint is not None:
+                    self._release_failed(endpoint, error)
+            elif complete:
+                self._on_call_success(None, estimated_tokens, endpoint, started)
+            elif endpoint is not None:
+                self.endpoint_pool.release(endpoint)
+        return on_done
+
+    def _on_call_success(
+        self,
+        response: Any,
+        estimated_tokens: int,
+        endpoint: Optional[Endpoint] = None,
+        started: Optional[float] = None
+    ):
+        """调用成功后更新端点延迟、恢复限流速率，并按实际用量校正token配额"""
+        if endpoint is not None:
+            self.endpoint_pool.release(endpoint, latency=time.monotonic() - started)
+        self.rate_limiter.on_success()
+        usage = getattr(response, "usage", None)
+        self.rate_limiter.reconcile(estimated_tokens, getattr(usage, "total_tokens", None))
+
+    def _cache_key(self, messages: list[dict[str, str]], params: dict[str, Any]) -> Optional[str]:
+        """计算缓存键，未启用缓存或调用不可缓存时返回None"""
+        if self.cache is None or not self.cache.is_cacheable(params):
+            return None
+        return self.cache.make_key(self.model, messages, params)
+
+    def _build_request_params(self, kwargs: dict[str, Any]) -> dict[str, Any]:
+        """合并实例默认参数与单次调用参数"""
+        return {
+            "temperature": kwargs.get('temperature', self.temperature),
+            "max_tokens": kwargs.get('max_tokens', self.max_tokens),
+            **{k: v for k, v in kwargs.items() if k not in ['temperature', 'max_tokens']}
+        }
     
     def _get_default_model(self) -> str:
         """获取默认模型"""
@@ -260,7 +634,13 @@ class HelloAgentsLLM:
             else:
                 return "gpt-3.5-turbo"
 
-    def think(self, messages: list[dict[str, str]], temperature: Optional[float] = None) -> Iterator[str]:
+    def think(
+        self,
+        messages: list[dict[str, str]],
+        temperature: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        **kwargs
+    ) -> Iterator[str]:
         """
         调用大语言模型进行思考，并返回流式响应。
         这是主要的调用方法，默认使用流式响应以获得更好的用户体验。
@@ -268,54 +648,234 @@ class HelloAgentsLLM:
         Args:
             messages: 消息列表
             temperature: 温度参数，如果未提供则使用初始化时的值
+            priority: 调用优先级，受限流时交互式调用先于批量任务获得配额
+            **kwargs: 其他请求参数（如max_tokens），与invoke一致
 
         Yields:
             str: 流式响应的文本片段
         """
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        params = self._build_request_params(kwargs)
+        cache_key = self._cache_key(messages, params)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                # 将缓存的完整响应按片段回放，保持流式接口的行为一致
+                print("✅ 命中响应缓存:")
+                for i in range(0, len(cached), CACHE_REPLAY_CHUNK_SIZE):
+                    content = cached[i:i + CACHE_REPLAY_CHUNK_SIZE]
+                    print(content, end="", flush=True)
+                    yield content
+                print()
+                return
+
         print(f"🧠 正在调用 {self.model} 模型...")
+        collected = []
         try:
-            response = self._client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature if temperature is not None else self.temperature,
-                max_tokens=self.max_tokens,
-                stream=True,
+            response = self._call_with_retry(
+                lambda client, model: client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    stream=True,
+                    **params
+                ),
+                messages, params, priority, stream=True
             )
 
             # 处理流式响应
             print("✅ 大语言模型响应成功:")
-            for chunk in response:
-                content = chunk.choices[0].delta.content or ""
-                if content:
-                    print(content, end="", flush=True)
-                    yield content
+            try:
+                for chunk in response:
+                    content = chunk.choices[0].delta.content or ""
+                    if content:
+                        print(content, end="", flush=True)
+                        collected.append(content)
+                        yield content
+            finally:
+                # 调用方提前停止迭代时关闭连接，让服务端停止生成
+                response.close()
             print()  # 在流式输出结束后换行
 
         except Exception as e:
             print(f"❌ 调用LLM API时发生错误: {e}")
             raise HelloAgentsException(f"LLM调用失败: {str(e)}")
 
+        # 只有完整接收的响应才写入缓存
+        if cache_key is not None:
+            self.cache.set(cache_key, "".join(collected))
+
     def invoke(self, messages: list[dict[str, str]], **kwargs) -> str:
         """
         非流式调用LLM，返回完整响应。
         适用于不需要流式输出的场景。
+        启用批处理时，并发的相同请求只会发出一次调用；启用缓存时，命中的请求不会发出调用。
+        可通过priority参数指定调用优先级（PRIORITY_INTERACTIVE / PRIORITY_BATCH）。
         """
+        priority = kwargs.pop('priority', PRIORITY_INTERACTIVE)
+        params = self._build_request_params(kwargs)
+        cache_key = self._cache_key(messages, params)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        if self.batcher is not None:
+            key = request_fingerprint(self.base_url, self.model, messages, params)
+            result = self.batcher.submit(key, lambda: self._invoke_once(messages, params, priority))
+        else:
+            result = self._invoke_once(messages, params, priority)
+
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        return result
+
+    def _invoke_once(self, messages: list[dict[str, str]], params: dict[str, Any], priority: int) -> str:
+        """发出一次非流式请求（含限流与重试）"""
         try:
-            response = self._client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=kwargs.get('temperature', self.temperature),
-                max_tokens=kwargs.get('max_tokens', self.max_tokens),
-                **{k: v for k, v in kwargs.items() if k not in ['temperature', 'max_tokens']}
+            response = self._call_with_retry(
+                lambda client, model: client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    **params
+                ),
+                messages, params, priority
             )
             return response.choices[0].message.content
         except Exception as e:
             raise HelloAgentsException(f"LLM调用失败: {str(e)}")
 
+    def invoke_with_tools(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]],
+        tool_choice: Union[str, dict[str, Any]] = "auto",
+        **kwargs
+    ) -> dict[str, Any]:
+        """
+        原生function calling调用：把工具的JSON Schema随请求发送，由模型返回结构化的tool_calls。
+
+        Args:
+            messages: 消息列表
+            tools: OpenAI格式的工具定义，通常来自ToolRegistry.get_openai_tools()
+            tool_choice: "auto"、"none"、"required"或指定某个工具
+
+        Returns:
+            {
+                "content": 文本回复（可能为None）,
+                "tool_calls": [{"id", "name", "arguments": 解析后的参数字典, "error": JSON解析错误或None}],
+                "message": 可直接追加到消息列表的assistant消息
+            }
+        """
+        priority = kwargs.pop('priority', PRIORITY_INTERACTIVE)
+        params = self._build_request_params(kwargs)
+        if tools:
+            params["tools"] = tools
+            params["tool_choice"] = tool_choice
+        try:
+            response = self._call_with_retry(
+                lambda client, model: client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    **params
+                ),
+                messages, params, priority
+            )
+        except Exception as e:
+            raise HelloAgentsException(f"LLM调用失败: {str(e)}")
+        return self._parse_tool_response(response.choices[0].message)
+
+    @staticmethod
+    def _parse_tool_response(message: Any) -> dict[str, Any]:
+        """把响应消息整理为content + tool_calls，参数JSON解析失败时保留原文与错误信息"""
+        tool_calls = []
+        raw_calls = []
+        for call in message.tool_calls or []:
+            raw_arguments = call.function.arguments or "{}"
+            try:
+                arguments = json.loads(raw_arguments)
+                error = None if isinstance(arguments, dict) else "参数必须是JSON对象"
+            except json.JSONDecodeError as e:
+                arguments, error = {}, f"参数不是合法的JSON: {e}"
+            if not isinstance(arguments, dict):
+                arguments = {}
+            tool_calls.append({"id": call.id, "name": call.function.name, "arguments": arguments, "error": error})
+            raw_calls.append({
+                "id": call.id,
+                "type": "function",
+                "function": {"name": call.function.name, "arguments": raw_arguments},
+            })
+
+        assistant_message: dict[str, Any] = {"role": "assistant", "content": message.content}
+        if raw_calls:
+            assistant_message["tool_calls"] = raw_calls
+        return {"content": message.content, "tool_calls": tool_calls, "message": assistant_message}
+
+    async def ainvoke(self, messages: list[dict[str, str]], **kwargs) -> str:
+        """
+        异步非流式调用LLM，返回完整响应。
+        基于共享的AsyncOpenAI连接池，适合在单个事件循环中并发驱动大量请求。
+        """
+        priority = kwargs.pop('priority', PRIORITY_INTERACTIVE)
+        params = self._build_request_params(kwargs)
+        cache_key = self._cache_key(messages, params)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            response = await self._acall_with_retry(
+                lambda client, model: client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    **params
+                ),
+                messages, params, priority
+            )
+            result = response.choices[0].message.content
+        except Exception as e:
+            raise HelloAgentsException(f"LLM调用失败: {str(e)}")
+
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        return result
+
+    async def astream(self, messages: list[dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """
+        异步流式调用LLM。
+        与think不同，这里不打印输出，便于大量会话并发时由调用方自行处理。
+
+        Yields:
+            str: 流式响应的文本片段
+        """
+        priority = kwargs.pop('priority', PRIORITY_INTERACTIVE)
+        params = self._build_request_params(kwargs)
+        try:
+            response = await self._acall_with_retry(
+                lambda client, model: client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    stream=True,
+                    **params
+                ),
+                messages, params, priority, stream=True
+            )
+            try:
+                async for chunk in response:
+                    if not chunk.choices:
+                        continue
+                    content = chunk.choices[0].delta.content or ""
+                    if content:
+                        yield content
+            finally:
+                await response.close()
+        except Exception as e:
+            raise HelloAgentsException(f"LLM调用失败: {str(e)}")
+
     def stream_invoke(self, messages: list[dict[str, str]], **kwargs) -> Iterator[str]:
         """
         流式调用LLM的别名方法，与think方法功能相同。
         保持向后兼容性。
         """
-        temperature = kwargs.get('temperature')
-        yield from self.think(messages, temperature)
+        yield from self.think(messages, **kwargs)
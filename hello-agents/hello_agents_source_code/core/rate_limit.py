@@ -0,0 +1,325 @@
+"""限流与重试 - 按提供商共享的自适应令牌桶与重试调度"""
+
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+# 调用优先级，数值越小越先获得配额
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# 可重试的HTTP状态码
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def estimate_tokens(messages: list[dict[str, Any]], max_tokens: Optional[int] = None) -> int:
+    """
+    粗略估算一次调用消耗的token数（提示词 + 预留的补全长度）
+
+    中英文混合文本按约3个字符一个token估算，实际用量会在响应返回后校正。
+    """
+    chars = sum(len(str(message.get("content") or "")) for message in messages)
+    return chars // 3 + (max_tokens or 256)
+
+
+class TokenBucket:
+    """令牌桶，rate为每分钟补充的令牌数，None表示不限流"""
+
+    def __init__(self, rate_per_minute: Optional[float] = None):
+        self.rate = rate_per_minute
+        self.capacity = rate_per_minute
+        self.tokens = rate_per_minute or 0.0
+        self._updated = time.monotonic()
+
+    def set_rate(self, rate_per_minute: Optional[float]):
+        """调整补充速率，桶容量保持为配置的每分钟额度"""
+        self._refill()
+        self.rate = rate_per_minute
+
+    def set_capacity(self, rate_per_minute: Optional[float]):
+        """
+        更改每分钟额度
+
+        保留桶中现有的令牌（超出新容量的部分截断），不重新装满，
+        避免重复配置时凭空多出一整分钟的额度；从不限流改为限流时才从满桶开始。
+        """
+        self._refill()
+        if rate_per_minute is None:
+            self.tokens = 0.0
+        elif self.capacity is None:
+            self.tokens = rate_per_minute
+        else:
+            self.tokens = min(self.tokens, rate_per_minute)
+        self.rate = rate_per_minute
+        self.capacity = rate_per_minute
+
+    def time_until(self, amount: float) -> float:
+        """距离可以取出amount个令牌还需等待的秒数"""
+        if self.rate is None:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60 / self.rate
+
+    def consume(self, amount: float):
+        """取出令牌，允许透支（用于按实际用量校正）"""
+        if self.rate is None:
+            return
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate / 60)
+        self._updated = now
+
+
+class RateLimiter:
+    """
+    自适应限流器
+
+    - 同时限制每分钟请求数与每分钟token数
+    - 等待者按 (优先级, 到达顺序) 排队，交互式调用优先于批量任务
+    - 收到限流响应后成倍降低速率并暂停到Retry-After指定的时间，之后随成功调用逐步恢复
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        min_rate_ratio: float = 0.1,
+        recovery_step: float = 0.05
+    ):
+        """
+        Args:
+            requests_per_minute: 每分钟请求数上限，None表示不限
+            tokens_per_minute: 每分钟token数上限，None表示不限
+            min_rate_ratio: 自适应降速的下限（相对配置速率的比例）
+            recovery_step: 每次成功调用后恢复的速率比例
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_rate_ratio = min_rate_ratio
+        self.recovery_step = recovery_step
+
+        self._request_bucket = TokenBucket(requests_per_minute)
+        self._token_bucket = TokenBucket(tokens_per_minute)
+        self._scale = 1.0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._waiters: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+
+    def configure(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """更新限流配置，限额未变化时不做任何修改；桶中已有的令牌保留，不会因重新配置而补满"""
+        with self._cond:
+            if (requests_per_minute, tokens_per_minute) == (self.requests_per_minute, self.tokens_per_minute):
+                return
+            self.requests_per_minute = requests_per_minute
+            self.tokens_per_minute = tokens_per_minute
+            self._request_bucket.set_capacity(requests_per_minute)
+            self._token_bucket.set_capacity(tokens_per_minute)
+            self._apply_scale()
+            self._cond.notify_all()
+
+    def acquire(self, tokens: int = 0, priority: int = PRIORITY_INTERACTIVE):
+        """阻塞直到获得一次请求配额"""
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    wait = self._try_reserve(ticket, tokens)
+                    if wait == 0:
+                        return
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                self._discard(ticket)
+                raise
+
+    async def acquire_async(self, tokens: int = 0, priority: int = PRIORITY_INTERACTIVE):
+        """异步版本的acquire，与同步调用方共享同一个优先级队列"""
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_reserve(ticket, tokens)
+                if wait == 0:
+                    return
+                await asyncio.sleep(wait if wait is not None else 0.01)
+        except BaseException:
+            with self._cond:
+                self._discard(ticket)
+            raise
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """按响应中的实际token用量校正预估值"""
+        if actual_tokens is None:
+            return
+        with self._cond:
+            self._token_bucket.consume(actual_tokens - estimated_tokens)
+            self._cond.notify_all()
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """收到限流响应：降低速率，并在Retry-After期间暂停发放配额"""
+        with self._cond:
+            self._scale = max(self.min_rate_ratio, self._scale / 2)
+            self._apply_scale()
+            pause = retry_after if retry_after is not None else 1.0
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+
+    def on_success(self):
+        """调用成功：逐步恢复速率"""
+        if self._scale >= 1.0:
+            return
+        with self._cond:
+            self._scale = min(1.0, self._scale + self.recovery_step)
+            self._apply_scale()
+            self._cond.notify_all()
+
+    def get_stats(self) -> dict[str, Any]:
+        """获取限流器状态"""
+        with self._cond:
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "rate_scale": self._scale,
+                "paused_for": max(0.0, self._paused_until - time.monotonic()),
+                "waiting": len(self._waiters),
+            }
+
+    def _try_reserve(self, ticket: tuple[int, int], tokens: int) -> Optional[float]:
+        """
+        尝试为票据扣减配额，调用方需持有锁
+
+        Returns:
+            0表示成功；正数表示需等待的秒数；None表示前面还有更高优先级的等待者
+        """
+        if self._waiters[0] != ticket:
+            return None
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        wait = max(self._request_bucket.time_until(1), self._token_bucket.time_until(tokens))
+        if wait > 0:
+            return wait
+        self._request_bucket.consume(1)
+        self._token_bucket.consume(tokens)
+        heapq.heappop(self._waiters)
+        self._cond.notify_all()
+        return 0
+
+    def _discard(self, ticket: tuple[int, int]):
+        """移除放弃等待的票据，调用方需持有锁"""
+        if ticket in self._waiters:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+            self._cond.notify_all()
+
+    def _apply_scale(self):
+        if self.requests_per_minute is not None:
+            self._request_bucket.set_rate(self.requests_per_minute * self._scale)
+        if self.tokens_per_minute is not None:
+            self._token_bucket.set_rate(self.tokens_per_minute * self._scale)
+
+
+class RetryPolicy:
+    """指数退避 + 抖动的重试策略，优先遵循服务端的Retry-After"""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 30.0):
+        """
+        Args:
+            max_retries: 最大重试次数
+            base_delay: 首次重试的基础等待时间（秒）
+            max_delay: 单次等待时间上限（秒）
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_retryable(self, error: Exception) -> bool:
+        """判断错误是否值得重试：连接错误、超时、限流与服务端错误"""
+        import openai
+
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+    @staticmethod
+    def is_rate_limited(error: Exception) -> bool:
+        """判断是否为限流错误"""
+        return getattr(error, "status_code", None) == 429
+
+    @staticmethod
+    def get_retry_after(error: Exception) -> Optional[float]:
+        """从错误响应头中解析Retry-After（秒），支持retry-after-ms、秒数与HTTP日期格式"""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000
+            except ValueError:
+                pass
+
+        retry_after = headers.get("retry-after")
+        if not retry_after:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """计算第attempt次重试（从0开始）前的等待时间"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        # Full jitter: 在 [0, base * 2^attempt] 之间均匀取值
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+_RATE_LIMITERS: dict[tuple[str, str], RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(
+    provider: str,
+    base_url: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None
+) -> RateLimiter:
+    """
+    获取按提供商共享的限流器
+
+    同一提供商（同一服务地址）的所有HelloAgentsLLM实例共用一个限流器，
+    显式传入的限额会覆盖已有配置。
+    """
+    key = (provider, base_url)
+    with _RATE_LIMITERS_LOCK:
+        limiter = _RATE_LIMITERS.get(key)
+        if limiter is None:
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            _RATE_LIMITERS[key] = limiter
+        elif requests_per_minute is not None or tokens_per_minute is not None:
+            limiter.configure(
+                requests_per_minute if requests_per_minute is not None else limiter.requests_per_minute,
+                tokens_per_minute if tokens_per_minute is not None else limiter.tokens_per_minute,
+            )
+        return limiter
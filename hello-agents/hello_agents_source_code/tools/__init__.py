@@ -1,7 +1,10 @@
 """工具系统"""
 
 from .base import Tool, ToolParameter
-from .registry import ToolRegistry, global_registry
+from .registry import ToolRegistry, RegistrySnapshot, global_registry
+from .cache import ToolResultCache
+from .catalog import ToolCatalog
+from .lazy import LazyTool
 
 # 内置工具
 from .builtin.search import SearchTool
@@ -16,7 +19,11 @@ __all__ = [
     "Tool",
     "ToolParameter",
     "ToolRegistry",
+    "RegistrySnapshot",
     "global_registry",
+    "ToolResultCache",
+    "ToolCatalog",
+    "LazyTool",
 
     # 内置工具
     "SearchTool",
@@ -1,81 +1,111 @@
 """异步工具执行器 - HelloAgents异步工具执行支持"""
 
+import time
 import asyncio
 import concurrent.futures
-from typing import Dict, Any, List, Callable, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 from .registry import ToolRegistry
 
 
 class AsyncToolExecutor:
-    """异步工具执行器"""
+    """
+    异步工具执行器
+
+    - 所有任务并发启动：execute_tools_parallel按原顺序返回，as_completed按完成顺序逐个产出
+    - 支持单任务超时与取消，超时的任务记为timeout状态
+    - 可按工具限制并发数，避免同一个外部服务被打满
+    - 原生异步工具（重写了Tool.arun或注册的协程函数）直接在事件循环中执行，不占用线程池
+    - 按工具声明的执行方式调度：inline直接执行，thread进入线程池，process进入注册表的进程池
+    """
 
-    def __init__(self, registry: ToolRegistry, max_workers: int = 4):
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        max_workers: int = 4,
+        timeout: Optional[float] = None,
+        tool_concurrency: Optional[Dict[str, int]] = None,
+        default_tool_concurrency: Optional[int] = None
+    ):
+        """
+        Args:
+            registry: 工具注册表
+            max_workers: 同步工具使用的线程池大小
+            timeout: 单个任务的默认超时（秒），None表示不限
+            tool_concurrency: 按工具名指定的最大并发数，如 {"search": 2}
+            default_tool_concurrency: 未单独指定的工具的最大并发数，None表示不限
+        """
         self.registry = registry
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.timeout = timeout
+        self.tool_concurrency = tool_concurrency or {}
+        self.default_tool_concurrency = default_tool_concurrency
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._running: set = set()
+        self._cancel_requested: set = set()
 
-    async def execute_tool_async(self, tool_name: str, input_data: str) -> str:
-        """异步执行单个工具"""
-        loop = asyncio.get_event_loop()
-        
-        def _execute():
-            return self.registry.execute_tool(tool_name, input_data)
-        
-        try:
-            result = await loop.run_in_executor(self.executor, _execute)
-            return result
-        except Exception as e:
-            return f"❌ 工具 '{tool_name}' 异步执行失败: {e}"
+    async def execute_tool_async(self, tool_name: str, input_data: str, timeout: Optional[float] = None) -> str:
+        """
+        异步执行单个工具
 
-    async def execute_tools_parallel(self, tasks: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        Raises:
+            asyncio.TimeoutError: 超过timeout（或默认超时）仍未完成
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        semaphore = self._get_semaphore(tool_name)
+        if semaphore is None:
+            return await asyncio.wait_for(self._invoke(tool_name, input_data), timeout)
+        # 排队等待并发名额的时间也计入超时
+        async def _limited():
+            async with semaphore:
+                return await self._invoke(tool_name, input_data)
+        return await asyncio.wait_for(_limited(), timeout)
+
+    async def execute_tools_parallel(self, tasks: List[Dict[str, str]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         并行执行多个工具
         
         Args:
-            tasks: 任务列表，每个任务包含 tool_name 和 input_data
+            tasks: 任务列表，每个任务包含 tool_name 和 input_data，可选 timeout
+            timeout: 本批任务的默认超时（秒）
             
         Returns:
-            执行结果列表，包含任务信息和结果
+            执行结果列表（与tasks顺序一致），包含任务信息和结果
         """
         print(f"🚀 开始并行执行 {len(tasks)} 个工具任务")
-        
-        # 创建异步任务
-        async_tasks = []
-        for i, task in enumerate(tasks):
-            tool_name = task.get("tool_name")
-            input_data = task.get("input_data", "")
-            
-            if not tool_name:
-                continue
-                
-            print(f"📝 创建任务 {i+1}: {tool_name}")
-            async_task = self.execute_tool_async(tool_name, input_data)
-            async_tasks.append((i, task, async_task))
-        
-        # 等待所有任务完成
-        results = []
-        for i, task, async_task in async_tasks:
-            try:
-                result = await async_task
-                results.append({
-                    "task_id": i,
-                    "tool_name": task["tool_name"],
-                    "input_data": task["input_data"],
-                    "result": result,
-                    "status": "success"
-                })
-                print(f"✅ 任务 {i+1} 完成: {task['tool_name']}")
-            except Exception as e:
-                results.append({
-                    "task_id": i,
-                    "tool_name": task["tool_name"],
-                    "input_data": task["input_data"],
-                    "result": str(e),
-                    "status": "error"
-                })
-                print(f"❌ 任务 {i+1} 失败: {task['tool_name']} - {e}")
-        
-        print(f"🎉 并行执行完成，成功: {sum(1 for r in results if r['status'] == 'success')}/{len(results)}")
-        return results
+        started = time.monotonic()
+        results = await asyncio.gather(*(
+            self._run_task(i, task, timeout) for i, task in self._valid_tasks(tasks)
+        ))
+        print(
+            f"🎉 并行执行完成，成功: {sum(1 for r in results if r['status'] == 'success')}/{len(results)}，"
+            f"耗时 {time.monotonic() - started:.2f}s"
+        )
+        return list(results)
+
+    async def as_completed(self, tasks: List[Dict[str, str]], timeout: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        并发执行多个工具，按完成顺序逐个产出结果
+
+        提前退出迭代（break或aclose）时，尚未完成的任务会被取消。
+
+        用法:
+            async for result in executor.as_completed(tasks):
+                print(result["task_id"], result["result"])
+        """
+        pending = {
+            asyncio.create_task(self._run_task(i, task, timeout))
+            for i, task in self._valid_tasks(tasks)
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    yield finished.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
 
     async def execute_tools_batch(self, tool_name: str, input_list: List[str]) -> List[Dict[str, Any]]:
         """
@@ -88,23 +118,190 @@ class AsyncToolExecutor:
         Returns:
             执行结果列表
         """
+        tool = self.registry.get_tool(tool_name)
+        if tool is not None and callable(getattr(tool, "run_batch", None)):
+            return await self._execute_native_batch(tool, input_list)
+
         tasks = [
             {"tool_name": tool_name, "input_data": input_data}
             for input_data in input_list
         ]
         return await self.execute_tools_parallel(tasks)
 
+    async def _execute_native_batch(self, tool, input_list: List[str]) -> List[Dict[str, Any]]:
+        """工具提供run_batch时一次性交给它处理（如计算器的向量化求值），缓存命中的输入不再计算"""
+        print(f"🚀 使用 {tool.name} 的批量接口执行 {len(input_list)} 个输入")
+        started = time.monotonic()
+        version = self.registry.version
+        outputs = [self.registry.get_cached_result(tool.name, input_data) for input_data in input_list]
+        missing = [i for i, output in enumerate(outputs) if output is None]
+        status = "success"
+        if missing:
+            loop = asyncio.get_running_loop()
+            try:
+                computed = await asyncio.wait_for(
+                    loop.run_in_executor(self.executor, tool.run_batch, [input_list[i] for i in missing]),
+                    self.timeout
+                )
+            except asyncio.TimeoutError:
+                computed, status = [f"❌ 工具 '{tool.name}' 执行超时"] * len(missing), "timeout"
+            except Exception as e:
+                computed, status = [str(e)] * len(missing), "error"
+            for i, output in zip(missing, computed):
+                outputs[i] = output
+                if status == "success":
+                    self.registry.cache_result(tool.name, input_list[i], output, version=version)
+
+        pending = set(missing)
+        elapsed = time.monotonic() - started
+        print(f"🎉 批量执行完成，耗时 {elapsed:.2f}s")
+        return [
+            {
+                "task_id": i,
+                "tool_name": tool.name,
+                "input_data": input_data,
+                "result": output,
+                "status": status if i in pending else "success",
+                "elapsed": elapsed,
+            }
+            for i, (input_data, output) in enumerate(zip(input_list, outputs))
+        ]
+
+    def cancel_all(self) -> int:
+        """取消所有正在执行的任务，返回取消的数量（线程池中已开始的同步调用会在后台跑完）"""
+        running = list(self._running)
+        for task in running:
+            self._cancel_requested.add(task)
+            task.cancel()
+        return len(running)
+
     def close(self):
         """关闭执行器"""
+        self.cancel_all()
         self.executor.shutdown(wait=True)
         print("🔒 异步工具执行器已关闭")
 
+    async def aclose(self):
+        """异步关闭执行器，不阻塞事件循环"""
+        self.cancel_all()
+        await asyncio.to_thread(self.executor.shutdown, wait=True)
+        print("🔒 异步工具执行器已关闭")
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def _run_task(self, task_id: int, task: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        """执行单个任务并包装为结果字典，异常与超时不会影响其他任务"""
+        tool_name = task["tool_name"]
+        input_data = task.get("input_data", "")
+        result = {"task_id": task_id, "tool_name": tool_name, "input_data": input_data}
+        current = asyncio.current_task()
+        self._running.add(current)
+        started = time.monotonic()
+        try:
+            result["result"] = await self.execute_tool_async(tool_name, input_data, task.get("timeout", timeout))
+            result["status"] = "success"
+            print(f"✅ 任务 {task_id+1} 完成: {tool_name}")
+        except asyncio.TimeoutError:
+            result["result"] = f"❌ 工具 '{tool_name}' 执行超时"
+            result["status"] = "timeout"
+            print(f"⏱️ 任务 {task_id+1} 超时: {tool_name}")
+        except asyncio.CancelledError:
+            result["result"] = f"❌ 工具 '{tool_name}' 已取消"
+            result["status"] = "cancelled"
+            if current not in self._cancel_requested:
+                raise
+            # cancel_all发起的取消记为cancelled结果，不打断gather中的其他任务
+            current.uncancel()
+            print(f"🛑 任务 {task_id+1} 已取消: {tool_name}")
+        except Exception as e:
+            result["result"] = str(e)
+            result["status"] = "error"
+            print(f"❌ 任务 {task_id+1} 失败: {tool_name} - {e}")
+        finally:
+            self._running.discard(current)
+            self._cancel_requested.discard(current)
+        result["elapsed"] = time.monotonic() - started
+        return result
+
+    async def _invoke(self, tool_name: str, input_data: str) -> str:
+        """原生异步工具直接await，同步工具交给线程池"""
+        cached = self.registry.get_cached_result(tool_name, input_data)
+        if cached is not None:
+            return cached
+
+        # 整个调用基于同一个注册表快照，执行期间工具被替换时结果不会写入缓存
+        snapshot = self.registry.snapshot()
+        tool = snapshot.tools.get(tool_name)
+        info = snapshot.functions.get(tool_name)
+        func = info["func"] if info is not None else None
+        try:
+            if tool is not None and tool.is_async:
+                result = await tool.arun({"input": input_data})
+                self.registry.cache_result(tool_name, input_data, result, version=snapshot.version)
+                return result
+            if tool is None and func is not None and asyncio.iscoroutinefunction(func):
+                result = await func(input_data)
+                self.registry.cache_result(tool_name, input_data, result, version=snapshot.version)
+                return result
+        except Exception as e:
+            return f"错误：执行工具 '{tool_name}' 时发生异常: {str(e)}"
+
+        # 缓存已在上面查过，之后直接执行，避免execute_tool再查一次把一次未命中记为两次
+        mode = self.registry.get_execution_mode(tool_name)
+        if mode == "inline":
+            return self._execute_and_cache(tool_name, input_data, snapshot.version)
+
+        loop = asyncio.get_running_loop()
+        try:
+            if mode == "process":
+                future = self.registry.submit_to_process(tool_name, input_data, snapshot=snapshot)
+                if future is not None:
+                    result = await asyncio.wrap_future(future)
+                    self.registry.cache_result(tool_name, input_data, result, version=snapshot.version)
+                    return result
+            return await loop.run_in_executor(
+                self.executor, self._execute_and_cache, tool_name, input_data, snapshot.version
+            )
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            raise
+        except Exception as e:
+            return f"❌ 工具 '{tool_name}' 异步执行失败: {e}"
+
+    def _execute_and_cache(self, tool_name: str, input_data: str, version: int) -> str:
+        """执行同步工具（不查缓存），正常完成的结果按开始时的注册表版本写入缓存"""
+        result, ok = self.registry._execute_uncached(tool_name, input_data)
+        if ok:
+            self.registry.cache_result(tool_name, input_data, result, version=version)
+        return result
+
+    def _get_semaphore(self, tool_name: str) -> Optional[asyncio.Semaphore]:
+        limit = self.tool_concurrency.get(tool_name, self.default_tool_concurrency)
+        if limit is None:
+            return None
+        semaphore = self._semaphores.get(tool_name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(limit)
+            self._semaphores[tool_name] = semaphore
+        return semaphore
+
+    @staticmethod
+    def _valid_tasks(tasks: List[Dict[str, str]]):
+        for i, task in enumerate(tasks):
+            if not task.get("tool_name"):
+                continue
+            print(f"📝 创建任务 {i+1}: {task['tool_name']}")
+            yield i, task
+
 
 # 便捷函数
 async def run_parallel_tools(registry: ToolRegistry, tasks: List[Dict[str, str]], max_workers: int = 4) -> List[Dict[str, Any]]:
@@ -1,9 +1,35 @@
 """工具基类"""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Literal, Optional
 from pydantic import BaseModel
 
+# 工具执行方式：
+# - inline: 开销极小的纯计算，直接在调用方执行（异步执行器中直接在事件循环里执行）
+# - thread: 默认，可能阻塞在IO上，同步调用在当前线程执行，异步执行器交给线程池
+# - process: CPU密集型，交给常驻进程池执行，避免占用GIL拖慢同进程的其他Agent
+EXECUTION_MODES = Literal["inline", "thread", "process"]
+
+# 工具结果的可缓存性：
+# - never: 默认，不缓存（有副作用或结果随时间变化的工具）
+# - pure: 纯函数，相同输入总是得到相同结果，缓存不过期
+# - ttl: 结果在cache_ttl秒内视为有效（如搜索、天气查询）
+CACHE_POLICIES = Literal["never", "pure", "ttl"]
+
+# 以这些前缀开头的结果视为错误信息，不写入缓存
+ERROR_RESULT_PREFIXES = ("错误", "❌")
+
+# ToolParameter.type 到 JSON Schema 类型的映射
+JSON_SCHEMA_TYPES = {
+    "string": "string", "str": "string",
+    "integer": "integer", "int": "integer",
+    "number": "number", "float": "number",
+    "boolean": "boolean", "bool": "boolean",
+    "array": "array", "list": "array",
+    "object": "object", "dict": "object",
+}
+
 class ToolParameter(BaseModel):
     """工具参数定义"""
     name: str
@@ -12,8 +38,24 @@ class ToolParameter(BaseModel):
     required: bool = True
     default: Any = None
 
+    def to_json_schema(self) -> Dict[str, Any]:
+        """转换为JSON Schema属性定义"""
+        schema: Dict[str, Any] = {
+            "type": JSON_SCHEMA_TYPES.get(self.type.lower(), "string"),
+            "description": self.description,
+        }
+        if self.default is not None:
+            schema["default"] = self.default
+        return schema
+
 class Tool(ABC):
     """工具基类"""
+
+    # 子类可覆盖，声明工具的执行方式
+    execution_mode: EXECUTION_MODES = "thread"
+    # 子类可覆盖，声明工具结果的可缓存性
+    cache_policy: CACHE_POLICIES = "never"
+    cache_ttl: Optional[float] = None
     
     def __init__(self, name: str, description: str):
         self.name = name
@@ -23,6 +65,24 @@ class Tool(ABC):
     def run(self, parameters: Dict[str, Any]) -> str:
         """执行工具"""
         pass
+
+    async def arun(self, parameters: Dict[str, Any]) -> str:
+        """
+        异步执行工具
+
+        默认在线程中调用run；基于原生异步IO的工具应重写此方法，
+        异步执行器会直接在事件循环中await它，不占用线程池。
+        """
+        return await asyncio.to_thread(self.run, parameters)
+
+    def should_cache_result(self, result: str) -> bool:
+        """判断结果是否可以写入缓存，工具可重写以排除降级或错误结果"""
+        return isinstance(result, str) and not result.startswith(ERROR_RESULT_PREFIXES)
+
+    @property
+    def is_async(self) -> bool:
+        """是否为重写了arun的原生异步工具"""
+        return type(self).arun is not Tool.arun
     
     @abstractmethod
     def get_parameters(self) -> List[ToolParameter]:
@@ -34,6 +94,22 @@ class Tool(ABC):
         required_params = [p.name for p in self.get_parameters() if p.required]
         return all(param in parameters for param in required_params)
     
+    def to_openai_schema(self) -> Dict[str, Any]:
+        """转换为OpenAI function calling的工具定义"""
+        parameters = self.get_parameters()
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": {
+                    "type": "object",
+                    "properties": {param.name: param.to_json_schema() for param in parameters},
+                    "required": [param.name for param in parameters if param.required],
+                },
+            },
+        }
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
         return {
@@ -1,15 +1,44 @@
 """计算器工具"""
 
+import re
 import ast
 import operator
 import math
-from typing import Dict, Any
+from typing import Dict, Any, List, Callable, Optional
 
 from ..base import Tool
+from ...core.cache import LRUCache
 from ...core.exceptions import ToolException
 
+# NumPy只在批量/向量化计算时用到，首次使用时才导入，避免拖慢包的导入速度
+np: Any = None
+_NUMPY_CHECKED = False
+
+
+def _load_numpy() -> Any:
+    """导入NumPy，未安装时返回None"""
+    global np, _NUMPY_CHECKED
+    if not _NUMPY_CHECKED:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+        _NUMPY_CHECKED = True
+    return np
+
+# 编译后的表达式：接收 (变量表, 函数表)，返回计算结果
+CompiledExpression = Callable[[Dict[str, Any], Dict[str, Any]], Any]
+
+# 独立的十进制数字字面量（不匹配标识符中的数字以及0x1F、1_000、3j等特殊写法）；
+# 整数不匹配007这类Python不允许的前导零写法，使其与run一样报语法错误
+_NUMBER_PATTERN = re.compile(r'(?<![\w.])(\d+\.\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?|\d+[eE][+-]?\d+|0+|[1-9]\d*)(?![\w.])')
+
 class CalculatorTool(Tool):
     """Python计算器工具"""
+
+    # 相同表达式总是得到相同结果
+    cache_policy = "pure"
     
     # 支持的操作符
     OPERATORS = {
@@ -38,12 +67,31 @@ class CalculatorTool(Tool):
         'pi': math.pi,
         'e': math.e,
     }
+
+    # 向量化求值使用的NumPy等价函数；不在此表中的函数（round/max/min/sum等语义不同）不做向量化
+    VECTOR_FUNCTIONS = {
+        'abs': 'abs',
+        'sqrt': 'sqrt',
+        'sin': 'sin',
+        'cos': 'cos',
+        'tan': 'tan',
+        'exp': 'exp',
+        'log': 'log',
+        'pi': 'pi',
+        'e': 'e',
+    }
     
-    def __init__(self):
+    def __init__(self, compiled_cache_size: int = 512):
+        """
+        Args:
+            compiled_cache_size: 已编译表达式缓存的最大条目数
+        """
         super().__init__(
             name="python_calculator",
             description="执行数学计算。支持基本运算、数学函数等。例如：2+3*4, sqrt(16), sin(pi/2)等。"
         )
+        self.compiled_cache_size = compiled_cache_size
+        self._compiled = LRUCache(max_entries=compiled_cache_size)
     
     def run(self, parameters: Dict[str, Any]) -> str:
         """
@@ -63,9 +111,9 @@ class CalculatorTool(Tool):
         print(f"🧮 正在计算: {expression}")
 
         try:
-            # 解析表达式
-            node = ast.parse(expression, mode='eval')
-            result = self._eval_node(node.body)
+            # 解析并编译表达式（命中缓存时跳过解析与校验）
+            compiled = self.compile(expression)
+            result = compiled({}, self.FUNCTIONS)
             result_str = str(result)
             print(f"✅ 计算结果: {result_str}")
             return result_str
@@ -74,34 +122,200 @@ class CalculatorTool(Tool):
             print(f"❌ {error_msg}")
             return error_msg
     
-    def _eval_node(self, node):
-        """递归计算AST节点"""
-        if isinstance(node, ast.Constant):  # Python 3.8+
-            return node.value
-        elif isinstance(node, ast.Num):  # Python < 3.8
-            return node.n
+    def run_batch(self, expressions: List[str]) -> List[str]:
+        """
+        批量计算多个表达式
+
+        结构相同、只有数字不同的表达式（如 "2+3" 与 "4*1+5" 不同，"2+3" 与 "7+8" 相同）
+        会被归为一组，每组只编译一次并用NumPy数组一次性求值（含整数常量的组使用object数组，保持Python整数精度）；
+        无法向量化或结果异常（溢出、除零、定义域错误）的表达式逐个回退到标量计算，保证结果与run完全一致。
+        未安装NumPy时全部走标量计算。
+
+        Returns:
+            与expressions一一对应的结果字符串
+        """
+        results: List[Optional[str]] = [None] * len(expressions)
+
+        if len(expressions) > 1 and _load_numpy() is not None:
+            groups: Dict[tuple, tuple] = {}
+            for index, expression in enumerate(expressions):
+                template, constants = self._to_template(expression)
+                if not constants:
+                    continue
+                # 整数与浮点常量的结果类型不同（5 与 5.0），按常量类型分组
+                kinds = tuple(isinstance(value, int) for value in constants)
+                indices, rows = groups.setdefault((template, kinds), ([], []))
+                indices.append(index)
+                rows.append(constants)
+
+            for (template, _), (indices, rows) in groups.items():
+                if len(indices) < 2:
+                    continue
+                for index, value in zip(indices, self._eval_group(template, rows)):
+                    results[index] = value
+
+        for index, expression in enumerate(expressions):
+            if results[index] is None:
+                results[index] = self._run_quiet(expression)
+        return results
+
+    def evaluate_vectorized(self, expression: str, variables: Dict[str, Any]) -> Any:
+        """
+        对绑定了数组变量的表达式做向量化求值
+
+        Args:
+            expression: 数学表达式，如 "sqrt(x**2 + y**2)"
+            variables: 变量名到数组（或标量）的映射，如 {"x": [3, 6], "y": [4, 8]}
+
+        Returns:
+            NumPy数组形式的结果
+        """
+        if _load_numpy() is None:
+            raise ToolException("向量化计算需要NumPy，请运行 pip install numpy")
+        compiled = self.compile(expression, variables=tuple(variables), vectorized=True)
+        env = {name: np.asarray(value) for name, value in variables.items()}
+        return compiled(env, self._numpy_functions())
+
+    def compile(self, expression: str, variables: tuple = (), vectorized: bool = False) -> CompiledExpression:
+        """
+        解析、校验并将表达式编译为闭包，结果按 (表达式, 变量名) 缓存
+
+        Raises:
+            ValueError: 表达式包含不支持的运算、函数或未定义的变量
+            SyntaxError: 表达式语法错误
+        """
+        expression = expression.strip()
+        key = (expression, tuple(sorted(variables)), vectorized)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            node = ast.parse(expression, mode='eval')
+            compiled = self._compile_node(node.body, frozenset(variables), vectorized)
+            self._compiled.set(key, compiled)
+        return compiled
+
+    def _compile_node(self, node, variables: frozenset, vectorized: bool) -> CompiledExpression:
+        """将AST节点编译为闭包，校验在编译时完成，求值时不再遍历语法树"""
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return lambda env, funcs: value
         elif isinstance(node, ast.BinOp):
-            return self.OPERATORS[type(node.op)](
-                self._eval_node(node.left), 
-                self._eval_node(node.right)
-            )
+            op = self._get_operator(node.op)
+            left = self._compile_node(node.left, variables, vectorized)
+            right = self._compile_node(node.right, variables, vectorized)
+            return lambda env, funcs: op(left(env, funcs), right(env, funcs))
         elif isinstance(node, ast.UnaryOp):
-            return self.OPERATORS[type(node.op)](self._eval_node(node.operand))
+            op = self._get_operator(node.op)
+            operand = self._compile_node(node.operand, variables, vectorized)
+            return lambda env, funcs: op(operand(env, funcs))
         elif isinstance(node, ast.Call):
-            func_name = node.func.id
-            if func_name in self.FUNCTIONS:
-                args = [self._eval_node(arg) for arg in node.args]
-                return self.FUNCTIONS[func_name](*args)
-            else:
+            func_name = getattr(node.func, 'id', None)
+            if func_name not in self.FUNCTIONS:
                 raise ValueError(f"不支持的函数: {func_name}")
+            if vectorized and func_name not in self.VECTOR_FUNCTIONS:
+                raise ValueError(f"函数不支持向量化计算: {func_name}")
+            args = [self._compile_node(arg, variables, vectorized) for arg in node.args]
+            return lambda env, funcs: funcs[func_name](*[arg(env, funcs) for arg in args])
         elif isinstance(node, ast.Name):
-            if node.id in self.FUNCTIONS:
-                return self.FUNCTIONS[node.id]
-            else:
-                raise ValueError(f"未定义的变量: {node.id}")
+            name = node.id
+            if name in variables:
+                return lambda env, funcs: env[name]
+            if name in self.FUNCTIONS:
+                if vectorized and name not in self.VECTOR_FUNCTIONS:
+                    raise ValueError(f"函数不支持向量化计算: {name}")
+                return lambda env, funcs: funcs[name]
+            raise ValueError(f"未定义的变量: {name}")
         else:
             raise ValueError(f"不支持的表达式类型: {type(node)}")
-    
+
+    def _get_operator(self, op):
+        try:
+            return self.OPERATORS[type(op)]
+        except KeyError:
+            raise ValueError(f"不支持的运算符: {type(op).__name__}")
+
+    @staticmethod
+    def _to_template(expression: str) -> tuple:
+        """
+        把表达式中的数字字面量替换为占位变量 _c0, _c1...，得到结构模板
+
+        Returns:
+            (模板字符串, 常量列表)
+        """
+        constants = []
+
+        def _replace(match):
+            text = match.group(0)
+            constants.append(float(text) if any(ch in text for ch in '.eE') else int(text))
+            return f"_c{len(constants) - 1}"
+
+        return _NUMBER_PATTERN.sub(_replace, expression.strip()), constants
+
+    def _eval_group(self, template: str, rows: List[list]) -> List[Optional[str]]:
+        """
+        对同一模板的一组表达式做向量化求值，返回None的位置需要回退到标量计算
+
+        含整数常量的组使用object数组逐元素执行Python运算（整数不会溢出、除法与标量计算一致），
+        只有纯浮点常量的组使用float64数组。
+        """
+        names = tuple(f"_c{i}" for i in range(len(rows[0])))
+        try:
+            compiled = self.compile(template, variables=names, vectorized=True)
+        except (ValueError, SyntaxError):
+            return [None] * len(rows)
+
+        columns = list(zip(*rows))
+        exact = any(isinstance(value, int) for column in columns for value in column)
+        dtype = object if exact else np.float64
+        funcs = self._object_functions() if exact else self._numpy_functions()
+        try:
+            with np.errstate(all='ignore'):
+                values = compiled({n: np.asarray(c, dtype=dtype) for n, c in zip(names, columns)}, funcs)
+        except (ValueError, TypeError, ArithmeticError):
+            return [None] * len(rows)
+
+        values = np.broadcast_to(np.asarray(values, dtype=dtype), (len(rows),))
+        if exact:
+            # object数组中是Python的int/float，运算中的异常已整组回退，结果与run完全一致
+            return [str(value) for value in values.tolist()]
+        # 非有限值对应标量计算中的异常（除零、溢出、定义域错误）
+        valid = np.isfinite(values)
+        return [str(value) if ok else None for value, ok in zip(values.tolist(), valid.tolist())]
+
+    def _numpy_functions(self) -> Dict[str, Any]:
+        funcs = {name: getattr(np, attr) for name, attr in self.VECTOR_FUNCTIONS.items()}
+        # math.log(x, base) 的第二个参数是底数，而np.log的第二个参数是输出数组
+        funcs['log'] = lambda x, base=None: np.log(x) if base is None else np.log(x) / np.log(base)
+        return funcs
+
+    def _object_functions(self) -> Dict[str, Any]:
+        """object数组上逐元素调用与标量计算相同的Python函数"""
+        funcs = {}
+        for name in self.VECTOR_FUNCTIONS:
+            func = self.FUNCTIONS[name]
+            funcs[name] = np.frompyfunc(func, 1, 1) if callable(func) else func
+        log1, log2 = np.frompyfunc(math.log, 1, 1), np.frompyfunc(math.log, 2, 1)
+        funcs['log'] = lambda x, base=None: log1(x) if base is None else log2(x, base)
+        return funcs
+
+    def _run_quiet(self, expression: str) -> str:
+        """标量计算单个表达式，不打印过程日志"""
+        if not expression:
+            return "错误：计算表达式不能为空"
+        try:
+            return str(self.compile(expression)({}, self.FUNCTIONS))
+        except Exception as e:
+            return f"计算失败: {str(e)}"
+
+    def __getstate__(self):
+        # 编译缓存包含锁与闭包，不随工具一起序列化（process执行模式）
+        state = self.__dict__.copy()
+        state.pop('_compiled', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compiled = LRUCache(max_entries=self.compiled_cache_size)
+
     def get_parameters(self):
         """获取工具参数定义"""
         from ..base import ToolParameter
@@ -1,10 +1,129 @@
 """搜索工具 - HelloAgents原生搜索实现"""
 
 import os
-from typing import Optional, Dict, Any, List
+import math
+import importlib.util
+import time
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from typing import Optional, Dict, Any, List, Callable, Literal
 
 from ..base import Tool, ToolParameter
-from ...core.exceptions import HelloAgentsException
+
+# 混合模式下多个后端的调度方式：
+# - off: 依次尝试，前一个失败后才调用下一个
+# - hedged: 主后端超过对冲延迟仍未返回时，再向备用后端发出请求，取最先返回的有效结果
+# - race: 同时向所有后端发出请求，取最先返回的有效结果
+HEDGE_MODES = Literal["off", "hedged", "race"]
+
+
+class LatencyHistogram:
+    """
+    对数分桶的延迟直方图
+
+    桶边界从min_latency开始按growth倍数递增，分位数取所在桶的上界；
+    旧样本按decay衰减，使对冲延迟能跟上后端性能的变化。
+    """
+
+    def __init__(self, min_latency: float = 0.01, growth: float = 1.25, buckets: int = 48, decay: float = 0.99):
+        """
+        Args:
+            min_latency: 第一个桶的上界（秒）
+            growth: 相邻桶上界的倍数
+            buckets: 桶数量
+            decay: 每记录一个新样本时旧样本权重的衰减系数
+        """
+        self.bounds = [min_latency * growth ** i for i in range(buckets)]
+        self.counts = [0.0] * buckets
+        self.decay = decay
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        """记录一次延迟（秒）"""
+        index = 0
+        if latency > self.bounds[0]:
+            growth = self.bounds[1] / self.bounds[0]
+            index = min(len(self.bounds) - 1, math.ceil(math.log(latency / self.bounds[0], growth)))
+        with self._lock:
+            self.counts = [count * self.decay for count in self.counts]
+            self.counts[index] += 1
+            self.samples += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """返回p分位（0-100）的延迟上界，没有样本时返回None"""
+        with self._lock:
+            total = sum(self.counts)
+            if total == 0:
+                return None
+            threshold = total * p / 100
+            cumulative = 0.0
+            for bound, count in zip(self.bounds, self.counts):
+                cumulative += count
+                if cumulative >= threshold:
+                    return bound
+            return self.bounds[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "p50_ms": (self.percentile(50) or 0) * 1000,
+            "p95_ms": (self.percentile(95) or 0) * 1000,
+            "p99_ms": (self.percentile(99) or 0) * 1000,
+        }
+
+
+class SearchBackend(ABC):
+    """
+    搜索后端接口
+
+    search返回结构化结果 {"answer": str | None, "results": [{"title", "content", "url"}]}，
+    可选的"knowledge_graph"为知识图谱摘要；
+    format把单个后端的结果渲染为文本。可以继承本类接入其他搜索服务或测试用的本地桩。
+    """
+
+    name = "backend"
+
+    @abstractmethod
+    def search(self, query: str) -> Dict[str, Any]:
+        """执行搜索并返回结构化结果"""
+        pass
+
+    def format(self, query: str, response: Dict[str, Any]) -> str:
+        text = f"🔍 {self.name} 搜索结果：\n\n"
+        if response.get("answer"):
+            text += f"💡 直接答案：{response['answer']}\n\n"
+        if response.get("knowledge_graph"):
+            text += f"📖 知识图谱：{response['knowledge_graph']}\n\n"
+        for i, item in enumerate(response.get("results", []), 1):
+            text += f"[{i}] {item.get('title', '')}\n"
+            text += f"    {item.get('content', '')}\n"
+            text += f"    来源: {item.get('url', '')}\n\n"
+        return text
+
+
+class FunctionBackend(SearchBackend):
+    """由查询函数与格式化函数组成的后端"""
+
+    def __init__(
+        self,
+        name: str,
+        search_fn: Callable[[str], Dict[str, Any]],
+        format_fn: Optional[Callable[[str, Dict[str, Any]], str]] = None
+    ):
+        self.name = name
+        self._search_fn = search_fn
+        self._format_fn = format_fn
+
+    def search(self, query: str) -> Dict[str, Any]:
+        return self._search_fn(query)
+
+    def format(self, query: str, response: Dict[str, Any]) -> str:
+        if self._format_fn is None:
+            return super().format(query, response)
+        return self._format_fn(query, response)
+
 
 class SearchTool(Tool):
     """
@@ -14,9 +133,37 @@ class SearchTool(Tool):
     1. 混合模式 (hybrid) - 智能选择TAVILY或SERPAPI
     2. Tavily API (tavily) - 专业AI搜索
     3. SerpApi (serpapi) - 传统Google搜索
+
+    混合模式支持对冲请求（hedge_mode）：按主后端的历史延迟分位数自动决定何时向备用后端发出请求，
+    取最先返回的有效结果，两个后端都返回时按URL合并去重。
     """
 
-    def __init__(self, backend: str = "hybrid", tavily_key: Optional[str] = None, serpapi_key: Optional[str] = None):
+    # 搜索结果在一段时间内视为有效，避免同一次运行中重复消耗API配额
+    cache_policy = "ttl"
+    cache_ttl = 600.0
+
+    def __init__(
+        self,
+        backend: str = "hybrid",
+        tavily_key: Optional[str] = None,
+        serpapi_key: Optional[str] = None,
+        hedge_mode: HEDGE_MODES = "off",
+        hedge_delay: Optional[float] = None,
+        hedge_percentile: float = 95.0,
+        merge_window: float = 0.0,
+        backends: Optional[List[SearchBackend]] = None
+    ):
+        """
+        Args:
+            backend: 搜索后端 ("hybrid", "tavily", "serpapi")，使用自定义后端时也可以是其中一个后端的名称
+            tavily_key: Tavily API密钥
+            serpapi_key: SerpApi API密钥
+            hedge_mode: 混合模式下的调度方式 ("off", "hedged", "race")
+            hedge_delay: 固定的对冲延迟（秒），None表示按主后端延迟的hedge_percentile分位数自动决定
+            hedge_percentile: 自动对冲延迟使用的分位数
+            merge_window: 得到首个有效结果后，再等待另一个后端多久用于合并结果（秒）
+            backends: 自定义后端列表（按优先级排序），提供时替代Tavily/SerpApi，便于接入本地桩
+        """
         super().__init__(
             name="search",
             description="一个智能网页搜索引擎。支持混合搜索模式，自动选择最佳搜索源。当你需要回答关于时事、事实以及在你的知识库中找不到的信息时，应使用此工具。"
@@ -24,30 +171,46 @@ class SearchTool(Tool):
         self.backend = backend
         self.tavily_key = tavily_key or os.getenv("TAVILY_API_KEY")
         self.serpapi_key = serpapi_key or os.getenv("SERPAPI_API_KEY")
+        self.hedge_mode = hedge_mode
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self.merge_window = merge_window
         self.available_backends = []
-        self._setup_backends()
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.hedge_stats = {"searches": 0, "hedged": 0, "secondary_wins": 0, "merged": 0}
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._stats_lock = threading.Lock()
+        self._tavily_client = None
+        if backends is not None:
+            self.search_backends = list(backends)
+            self.available_backends = [b.name for b in self.search_backends]
+            print(f"🔧 使用自定义搜索后端: {', '.join(self.available_backends)}")
+        else:
+            self._setup_backends()
+            self.search_backends = [
+                FunctionBackend("tavily", self._query_tavily, self._format_tavily),
+                FunctionBackend("serpapi", self._query_serpapi, self._format_serpapi),
+            ]
+            self.search_backends = [b for b in self.search_backends if b.name in self.available_backends]
 
     def _setup_backends(self):
         """设置搜索后端"""
-        # 检查Tavily可用性
+        # 检查Tavily可用性（只检查是否安装，客户端在首次搜索时创建）
         if self.tavily_key:
-            try:
-                from tavily import TavilyClient
-                self.tavily_client = TavilyClient(api_key=self.tavily_key)
+            if importlib.util.find_spec("tavily") is not None:
                 self.available_backends.append("tavily")
                 print("✅ Tavily搜索引擎已初始化")
-            except ImportError:
+            else:
                 print("⚠️ Tavily未安装，无法使用Tavily搜索")
         else:
             print("⚠️ TAVILY_API_KEY未设置")
 
         # 检查SerpApi可用性
         if self.serpapi_key:
-            try:
-                import serpapi
+            if importlib.util.find_spec("serpapi") is not None:
                 self.available_backends.append("serpapi")
                 print("✅ SerpApi搜索引擎已初始化")
-            except ImportError:
+            else:
                 print("⚠️ SerpApi未安装，无法使用SerpApi搜索")
         else:
             print("⚠️ SERPAPI_API_KEY未设置")
@@ -66,6 +229,16 @@ class SearchTool(Tool):
             print("⚠️ 不支持的搜索后端，将使用hybrid模式")
             self.backend = "hybrid"
 
+    @property
+    def tavily_client(self):
+        """Tavily客户端，首次使用时才导入tavily并创建"""
+        if self._tavily_client is None:
+            with self._stats_lock:
+                if self._tavily_client is None:
+                    from tavily import TavilyClient
+                    self._tavily_client = TavilyClient(api_key=self.tavily_key)
+        return self._tavily_client
+
     def run(self, parameters: Dict[str, Any]) -> str:
         """
         执行搜索
@@ -84,73 +257,209 @@ class SearchTool(Tool):
 
         try:
             if self.backend == "hybrid":
-                return self._search_hybrid(query)
-            elif self.backend == "tavily":
-                if "tavily" not in self.available_backends:
-                    return self._get_api_config_message()
-                return self._search_tavily(query)
-            elif self.backend == "serpapi":
-                if "serpapi" not in self.available_backends:
-                    return self._get_api_config_message()
-                return self._search_serpapi(query)
-            else:
-                return self._get_api_config_message()
+                if self.hedge_mode != "off" and len(self.search_backends) > 1:
+                    return self._search_hedged(query)
+                return self._search_sequential(query)
+            # 指定后端：按名称在已配置的后端（内置或自定义）中查找
+            for backend in self.search_backends:
+                if backend.name == self.backend:
+                    return backend.format(query, self._timed_search(backend, query))
+            return self._get_api_config_message()
         except Exception as e:
             return f"搜索时发生错误: {str(e)}"
 
-    def _search_hybrid(self, query: str) -> str:
-        """混合搜索 - 智能选择最佳搜索源"""
-        # 检查是否有可用的搜索源
-        if not self.available_backends:
+    def should_cache_result(self, result: str) -> bool:
+        """只缓存真正来自搜索引擎的结果，配置提示与错误信息不缓存"""
+        return isinstance(result, str) and result.startswith(("🎯", "🔍"))
+
+    def _search_hedged(self, query: str) -> str:
+        """
+        对冲搜索
+
+        hedged模式下先只请求主后端，超过对冲延迟仍未返回（或已失败）时再请求备用后端；
+        race模式下同时请求所有后端。取最先返回的有效结果，落败的请求不再等待
+        （尚未开始的会被取消，已发出的在后台结束后只用于更新延迟统计）。
+        """
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(
+                max_workers=2 * len(self.search_backends), thread_name_prefix="search-hedge"
+            )
+        with self._stats_lock:
+            self.hedge_stats["searches"] += 1
+
+        backends = list(self.search_backends)
+        futures: Dict[Future, SearchBackend] = {}
+
+        def _launch(backend: SearchBackend):
+            futures[self._hedge_executor.submit(self._timed_search, backend, query)] = backend
+
+        if self.hedge_mode == "race":
+            for backend in backends:
+                _launch(backend)
+        else:
+            _launch(backends[0])
+            delay = self.get_hedge_delay(backends[0].name)
+            done, _ = wait(futures, timeout=delay)
+            if not done or not self._is_good(next(iter(done))):
+                print(f"⏱️ 主后端 {backends[0].name} 超过 {delay:.2f}s 未返回有效结果，发出对冲请求")
+                with self._stats_lock:
+                    self.hedge_stats["hedged"] += 1
+                for backend in backends[1:]:
+                    _launch(backend)
+
+        pending = set(futures)
+        winner: Optional[Future] = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # 同时完成时按后端优先级选择
+            for future in sorted(done, key=lambda f: backends.index(futures[f])):
+                if self._is_good(future):
+                    winner = future
+                    break
+
+        if winner is None:
+            for future, backend in futures.items():
+                if future.exception() is not None:
+                    print(f"⚠️ {backend.name}搜索失败: {future.exception()}")
+            return "❌ 所有搜索源都失败了，请检查网络连接和API密钥配置"
+
+        winner_backend = futures[winner]
+        if winner_backend is not backends[0]:
+            with self._stats_lock:
+                self.hedge_stats["secondary_wins"] += 1
+        print(f"🏁 {winner_backend.name} 最先返回有效结果")
+
+        if pending and self.merge_window > 0:
+            done, pending = wait(pending, timeout=self.merge_window)
+        for future in pending:
+            future.cancel()
+
+        others = [f for f in futures if f is not winner and f.done() and not f.cancelled() and self._is_good(f)]
+        if not others:
+            return winner_backend.format(query, winner.result())
+        with self._stats_lock:
+            self.hedge_stats["merged"] += 1
+        return self._format_merged(query, [winner] + others, futures)
+
+    def get_hedge_delay(self, backend_name: str) -> float:
+        """获取对冲延迟：固定值，或主后端延迟的分位数（样本不足时使用1秒）"""
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        histogram = self.latency.get(backend_name)
+        if histogram is None or histogram.samples < 10:
+            return 1.0
+        return histogram.percentile(self.hedge_percentile)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取对冲统计与各后端的延迟分布"""
+        with self._stats_lock:
+            stats = dict(self.hedge_stats)
+        stats["latency"] = {name: histogram.to_dict() for name, histogram in self.latency.items()}
+        return stats
+
+    def _timed_search(self, backend: SearchBackend, query: str) -> Dict[str, Any]:
+        started = time.monotonic()
+        response = backend.search(query)
+        # 只有成功的请求计入延迟分布，失败往往很快返回，会把对冲延迟拉得过低
+        with self._stats_lock:
+            histogram = self.latency.setdefault(backend.name, LatencyHistogram())
+        histogram.record(time.monotonic() - started)
+        return response
+
+    @staticmethod
+    def _is_good(future: Future) -> bool:
+        """有效结果：没有异常且包含答案、知识图谱或搜索结果"""
+        if future.cancelled() or future.exception() is not None:
+            return False
+        return SearchTool._has_content(future.result())
+
+    @staticmethod
+    def _has_content(response: Optional[Dict[str, Any]]) -> bool:
+        """结构化结果中是否包含答案、知识图谱或搜索结果"""
+        return bool(response) and bool(
+            response.get("answer") or response.get("knowledge_graph") or response.get("results")
+        )
+
+    def _format_merged(self, query: str, done: List[Future], futures: Dict[Future, SearchBackend]) -> str:
+        """合并多个后端的结果并按URL去重，保留先返回的后端的顺序"""
+        names = [futures[f].name for f in done]
+        text = f"🔍 混合搜索结果（{' + '.join(names)}）：\n\n"
+        for future in done:
+            answer = future.result().get("answer")
+            if answer:
+                text += f"💡 {futures[future].name} 直接答案：{answer}\n\n"
+            knowledge_graph = future.result().get("knowledge_graph")
+            if knowledge_graph:
+                text += f"📖 {futures[future].name} 知识图谱：{knowledge_graph}\n\n"
+
+        seen = set()
+        index = 0
+        for future in done:
+            for item in future.result().get("results", []):
+                url = (item.get("url") or "").rstrip("/")
+                if url and url in seen:
+                    continue
+                seen.add(url)
+                index += 1
+                text += f"[{index}] {item.get('title', '')}\n"
+                text += f"    {item.get('content', '')[:200]}\n"
+                text += f"    来源: {item.get('url', '')}（{futures[future].name}）\n\n"
+        return text
+
+    def _search_sequential(self, query: str) -> str:
+        """依次尝试各后端（按优先级），前一个失败或没有结果时才调用下一个"""
+        if not self.search_backends:
             return self._get_api_config_message()
 
-        # 优先使用Tavily（AI优化的搜索）
-        if "tavily" in self.available_backends:
+        fallback = None
+        for i, backend in enumerate(self.search_backends):
+            if i > 0:
+                print(f"🔄 切换到{backend.name}搜索")
             try:
-                print("🎯 使用Tavily进行AI优化搜索")
-                return self._search_tavily(query)
+                print(f"🎯 使用{backend.name}搜索")
+                response = self._timed_search(backend, query)
             except Exception as e:
-                print(f"⚠️ Tavily搜索失败: {e}")
-                # 如果Tavily失败，尝试SerpApi
-                if "serpapi" in self.available_backends:
-                    print("🔄 切换到SerpApi搜索")
-                    return self._search_serpapi(query)
-
-        # 如果Tavily不可用，使用SerpApi
-        elif "serpapi" in self.available_backends:
-            try:
-                print("🎯 使用SerpApi进行Google搜索")
-                return self._search_serpapi(query)
-            except Exception as e:
-                print(f"⚠️ SerpApi搜索失败: {e}")
-
-        # 如果都失败了，返回API配置提示
+                print(f"⚠️ {backend.name}搜索失败: {e}")
+                continue
+            if self._has_content(response):
+                return backend.format(query, response)
+            if fallback is None:
+                fallback = (backend, response or {})
+
+        # 都没有结果时返回第一个成功后端的（空）结果
+        if fallback is not None:
+            return fallback[0].format(query, fallback[1])
         return "❌ 所有搜索源都失败了，请检查网络连接和API密钥配置"
 
-    def _search_tavily(self, query: str) -> str:
-        """使用Tavily搜索"""
+    def _query_tavily(self, query: str) -> Dict[str, Any]:
+        """调用Tavily并返回结构化结果"""
         response = self.tavily_client.search(
             query=query,
             search_depth="basic",
             include_answer=True,
             max_results=3
         )
+        return {
+            "answer": response.get('answer') or "",
+            "results": [
+                {"title": item.get('title', ''), "content": item.get('content', ''), "url": item.get('url', '')}
+                for item in response.get('results', [])[:3]
+            ],
+        }
 
-        result = f"🎯 Tavily AI搜索结果：{response.get('answer', '未找到直接答案')}\n\n"
+    def _format_tavily(self, query: str, response: Dict[str, Any]) -> str:
+        result = f"🎯 Tavily AI搜索结果：{response['answer'] or '未找到直接答案'}\n\n"
 
-        for i, item in enumerate(response.get('results', [])[:3], 1):
-            result += f"[{i}] {item.get('title', '')}\n"
-            result += f"    {item.get('content', '')[:200]}...\n"
-            result += f"    来源: {item.get('url', '')}\n\n"
+        for i, item in enumerate(response['results'], 1):
+            result += f"[{i}] {item['title']}\n"
+            result += f"    {item['content'][:200]}...\n"
+            result += f"    来源: {item['url']}\n\n"
 
         return result
 
-    def _search_serpapi(self, query: str) -> str:
-        """使用SerpApi搜索"""
-        try:
-            from serpapi import SerpApiClient
-        except ImportError:
-            return "错误：SerpApi未安装，请运行 pip install serpapi"
+    def _query_serpapi(self, query: str) -> Dict[str, Any]:
+        """调用SerpApi并返回结构化结果"""
+        from serpapi import SerpApiClient
 
         params = {
             "engine": "google",
@@ -163,21 +472,31 @@ class SearchTool(Tool):
         client = SerpApiClient(params)
         results = client.get_dict()
 
+        return {
+            "answer": results.get("answer_box", {}).get("answer"),
+            "knowledge_graph": results.get("knowledge_graph", {}).get("description"),
+            "results": [
+                {"title": res.get('title', ''), "content": res.get('snippet', ''), "url": res.get('link', '')}
+                for res in results.get("organic_results", [])[:3]
+            ],
+        }
+
+    def _format_serpapi(self, query: str, response: Dict[str, Any]) -> str:
         result_text = "🔍 SerpApi Google搜索结果：\n\n"
 
         # 智能解析：优先寻找最直接的答案
-        if "answer_box" in results and "answer" in results["answer_box"]:
-            result_text += f"💡 直接答案：{results['answer_box']['answer']}\n\n"
+        if response.get("answer"):
+            result_text += f"💡 直接答案：{response['answer']}\n\n"
 
-        if "knowledge_graph" in results and "description" in results["knowledge_graph"]:
-            result_text += f"📖 知识图谱：{results['knowledge_graph']['description']}\n\n"
+        if response.get("knowledge_graph"):
+            result_text += f"📖 知识图谱：{response['knowledge_graph']}\n\n"
 
-        if "organic_results" in results and results["organic_results"]:
+        if response["results"]:
             result_text += "🔗 相关结果：\n"
-            for i, res in enumerate(results["organic_results"][:3], 1):
-                result_text += f"[{i}] {res.get('title', '')}\n"
-                result_text += f"    {res.get('snippet', '')}\n"
-                result_text += f"    来源: {res.get('link', '')}\n\n"
+            for i, res in enumerate(response["results"], 1):
+                result_text += f"[{i}] {res['title']}\n"
+                result_text += f"    {res['content']}\n"
+                result_text += f"    来源: {res['url']}\n\n"
             return result_text
 
         return f"对不起，没有找到关于 '{query}' 的信息。"
@@ -195,10 +514,9 @@ class SearchTool(Tool):
             message += "   ❌ 环境变量 TAVILY_API_KEY 未设置\n"
             message += "   📝 获取地址: https://tavily.com/\n"
         else:
-            try:
-                import tavily
+            if importlib.util.find_spec("tavily") is not None:
                 message += "   ✅ API密钥已配置，包已安装\n"
-            except ImportError:
+            else:
                 message += "   ❌ API密钥已配置，但需要安装包: pip install tavily-python\n"
 
         message += "\n"
@@ -209,10 +527,9 @@ class SearchTool(Tool):
             message += "   ❌ 环境变量 SERPAPI_API_KEY 未设置\n"
             message += "   📝 获取地址: https://serpapi.com/\n"
         else:
-            try:
-                import serpapi
+            if importlib.util.find_spec("serpapi") is not None:
                 message += "   ✅ API密钥已配置，包已安装\n"
-            except ImportError:
+            else:
                 message += "   ❌ API密钥已配置，但需要安装包: pip install google-search-results\n"
 
         message += "\n配置方法：\n"
@@ -0,0 +1,79 @@
+"""工具结果缓存 - 按工具声明的可缓存性记忆工具调用结果"""
+
+import threading
+from typing import Any, Optional, Union
+
+from ..core.batching import request_fingerprint
+from ..core.cache import LRUCache
+
+
+class ToolResultCache:
+    """
+    工具结果缓存
+
+    以 (工具名, 规范化参数) 为键，内存LRU + TTL淘汰；
+    按工具统计命中率，支持按工具或按具体参数显式失效。
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Args:
+            max_entries: 最大条目数
+        """
+        self._cache = LRUCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(tool_name: str, parameters: Union[str, dict[str, Any]]) -> tuple[str, str]:
+        """计算缓存键：字符串参数去除首尾空白，字典参数按键排序后取指纹"""
+        if isinstance(parameters, str):
+            parameters = parameters.strip()
+        return tool_name, request_fingerprint(parameters)
+
+    def get(self, tool_name: str, parameters: Union[str, dict[str, Any]]) -> Optional[str]:
+        """查找缓存结果，未命中返回None"""
+        value = self._cache.get(self.make_key(tool_name, parameters))
+        self._count(tool_name, "hits" if value is not None else "misses")
+        return value
+
+    def set(self, tool_name: str, parameters: Union[str, dict[str, Any]], result: str, ttl: Optional[float] = None):
+        """写入缓存结果，ttl为None表示不过期（纯函数工具）"""
+        if result is None:
+            return
+        self._cache.set(self.make_key(tool_name, parameters), result, ttl=ttl)
+
+    def invalidate(self, tool_name: Optional[str] = None, parameters: Union[str, dict[str, Any], None] = None) -> int:
+        """
+        使缓存失效
+
+        Args:
+            tool_name: 工具名称，None表示清空所有工具的缓存
+            parameters: 具体参数，None表示该工具的所有缓存
+
+        Returns:
+            删除的条目数
+        """
+        if tool_name is None:
+            count = len(self._cache)
+            self._cache.clear()
+            return count
+        if parameters is not None:
+            return int(self._cache.delete(self.make_key(tool_name, parameters)))
+        return self._cache.delete_where(lambda key: key[0] == tool_name)
+
+    def get_stats(self, tool_name: Optional[str] = None) -> dict[str, Any]:
+        """获取命中统计，未指定工具时返回所有工具的统计"""
+        with self._lock:
+            names = [tool_name] if tool_name is not None else list(self._stats)
+            stats = {}
+            for name in names:
+                counts = self._stats.get(name, {"hits": 0, "misses": 0})
+                total = counts["hits"] + counts["misses"]
+                stats[name] = {**counts, "hit_rate": counts["hits"] / total if total else 0.0}
+            return stats[tool_name] if tool_name is not None else stats
+
+    def _count(self, tool_name: str, field: str):
+        with self._lock:
+            counts = self._stats.setdefault(tool_name, {"hits": 0, "misses": 0})
+            counts[field] += 1
@@ -0,0 +1,252 @@
+"""工具目录 - 预渲染的工具描述与按相关性选择工具"""
+
+import re
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .registry import ToolRegistry
+
+_ASCII_WORD = re.compile(r"[a-z0-9_]{2,}")
+_CJK_RUN = re.compile(r"[一-鿿]+")
+
+
+def extract_keywords(text: str) -> set:
+    """提取关键词：英文单词（小写）与中文连续片段的二元组"""
+    text = text.lower()
+    keywords = set(_ASCII_WORD.findall(text))
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            keywords.add(run)
+        keywords.update(run[i:i + 2] for i in range(len(run) - 1))
+    return keywords
+
+
+def estimate_text_tokens(text: str) -> int:
+    """按约3个字符一个token估算，与LLM限流中的估算方式一致"""
+    return max(1, len(text) // 3)
+
+
+class ToolEntry:
+    """目录中的单个工具：渲染好的描述行、token数与索引特征"""
+
+    __slots__ = ("name", "line", "tokens", "keywords", "schema", "vector")
+
+    def __init__(
+        self,
+        name: str,
+        line: str,
+        tokens: int,
+        keywords: set,
+        schema: Dict[str, Any],
+        vector: Optional[List[float]] = None
+    ):
+        self.name = name
+        self.line = line
+        self.tokens = tokens
+        self.keywords = keywords
+        self.schema = schema
+        self.vector = vector
+
+
+class _CatalogState:
+    """某个注册表版本对应的目录内容，构建完成后只有渲染缓存会变化"""
+
+    __slots__ = ("version", "entries", "index", "idf", "full_text", "rendered")
+
+    def __init__(
+        self,
+        version: Optional[int] = None,
+        entries: Optional[List[ToolEntry]] = None,
+        index: Optional[Dict[str, List[int]]] = None,
+        idf: Optional[Dict[str, float]] = None
+    ):
+        self.version = version
+        self.entries = entries or []
+        self.index = index or {}
+        self.idf = idf or {}
+        self.full_text = "\n".join(entry.line for entry in self.entries)
+        self.rendered: Dict[tuple, str] = {}
+
+
+class ToolCatalog:
+    """
+    工具目录
+
+    - 工具的描述行与token数只在注册表变化时重新计算，平时直接复用
+    - 建立关键词倒排索引（可选向量索引），每轮只把与当前问题最相关的top-k个工具注入提示词
+    - 同时缓存每个工具的JSON Schema，供原生function calling使用
+    - 选中的工具按注册顺序输出，相同工具集合总是渲染出字节相同的文本，便于复用提示词前缀缓存
+    - 每次调用只读取一份版本一致的目录状态，注册表在并发修改时不会混用新旧版本的工具列表与渲染缓存
+    """
+
+    def __init__(
+        self,
+        registry: "ToolRegistry",
+        top_k: Optional[int] = None,
+        always_include: Sequence[str] = (),
+        embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        token_counter: Callable[[str], int] = estimate_text_tokens
+    ):
+        """
+        Args:
+            registry: 工具注册表
+            top_k: 默认选择的工具数量，None表示全部
+            always_include: 无论相关性如何都会注入的工具
+            embed_fn: 可选的文本向量化函数，提供时按余弦相似度排序，否则按关键词IDF打分
+            token_counter: token计数函数
+        """
+        self.registry = registry
+        self.top_k = top_k
+        self.always_include = set(always_include)
+        self.embed_fn = embed_fn
+        self.token_counter = token_counter
+
+        self._lock = threading.Lock()
+        self._state = _CatalogState()
+
+    def render(self, query: Optional[str] = None, top_k: Optional[int] = None) -> str:
+        """
+        渲染工具描述
+
+        Args:
+            query: 当前问题，None表示不做筛选
+            top_k: 选择的工具数量，None时使用目录默认值
+
+        Returns:
+            工具描述字符串，格式与ToolRegistry.get_tools_description一致
+        """
+        state = self._refresh()
+        if not state.entries:
+            return "暂无可用工具"
+        names = self._select(state, query, top_k)
+        if len(names) == len(state.entries):
+            return state.full_text
+        key = tuple(names)
+        with self._lock:
+            text = state.rendered.get(key)
+            if text is None:
+                lines = {entry.name: entry.line for entry in state.entries}
+                text = "\n".join(lines[name] for name in names)
+                if len(state.rendered) > 256:
+                    state.rendered.clear()
+                state.rendered[key] = text
+        return text
+
+    def select(self, query: Optional[str] = None, top_k: Optional[int] = None) -> List[str]:
+        """
+        选择与问题最相关的工具
+
+        没有任何工具与问题相关时返回全部工具，避免遗漏真正需要的工具。
+
+        Returns:
+            工具名列表（按注册顺序）
+        """
+        return self._select(self._refresh(), query, top_k)
+
+    def _select(self, state: _CatalogState, query: Optional[str], top_k: Optional[int]) -> List[str]:
+        top_k = top_k if top_k is not None else self.top_k
+        entries = state.entries
+        if query is None or top_k is None or top_k >= len(entries):
+            return [entry.name for entry in entries]
+
+        scores = self._score(state, query)
+        ranked = sorted(
+            (i for i, score in enumerate(scores) if score > 0),
+            key=lambda i: (-scores[i], i)
+        )
+        if not ranked:
+            return [entry.name for entry in entries]
+
+        chosen = set(ranked[:top_k])
+        chosen.update(i for i, entry in enumerate(entries) if entry.name in self.always_include)
+        return [entries[i].name for i in sorted(chosen)]
+
+    def openai_tools(self, query: Optional[str] = None, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        获取OpenAI function calling格式的工具定义
+
+        JSON Schema在注册表版本变化时生成一次，之后直接复用；选择逻辑与render相同。
+        """
+        state = self._refresh()
+        schemas = {entry.name: entry.schema for entry in state.entries}
+        return [schemas[name] for name in self._select(state, query, top_k)]
+
+    def token_count(self, names: Optional[Sequence[str]] = None) -> int:
+        """统计工具描述占用的token数，names为None时统计全部工具"""
+        entries = self._refresh().entries
+        if names is None:
+            return sum(entry.tokens for entry in entries)
+        wanted = set(names)
+        return sum(entry.tokens for entry in entries if entry.name in wanted)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取目录规模信息"""
+        state = self._refresh()
+        return {
+            "tools": len(state.entries),
+            "total_tokens": sum(entry.tokens for entry in state.entries),
+            "keywords": len(state.index),
+            "version": state.version,
+        }
+
+    def invalidate(self):
+        """强制下次访问时重建目录"""
+        with self._lock:
+            self._state = _CatalogState()
+
+    def _refresh(self) -> _CatalogState:
+        """返回与注册表当前版本一致的目录状态，版本变化时重建渲染结果与索引"""
+        snapshot = self.registry.snapshot()
+        version = snapshot.version
+        state = self._state
+        if version == state.version:
+            return state
+        with self._lock:
+            if version == self._state.version:
+                return self._state
+            entries = []
+            for name, description, parameters, schema in self.registry.iter_tool_specs(snapshot):
+                line = f"- {name}: {description}"
+                keywords = extract_keywords(f"{name} {description} {parameters}")
+                keywords.add(name.lower())
+                entries.append(ToolEntry(name, line, self.token_counter(line), keywords, schema))
+
+            if self.embed_fn is not None and entries:
+                vectors = self.embed_fn([entry.line for entry in entries])
+                for entry, vector in zip(entries, vectors):
+                    entry.vector = list(vector)
+
+            index: Dict[str, List[int]] = {}
+            for i, entry in enumerate(entries):
+                for keyword in entry.keywords:
+                    index.setdefault(keyword, []).append(i)
+            total = len(entries)
+            idf = {keyword: math.log(1 + total / len(ids)) for keyword, ids in index.items()}
+            # 整体替换状态对象，已经取得旧状态的调用继续使用旧版本的完整数据
+            self._state = _CatalogState(version, entries, index, idf)
+            return self._state
+
+    def _score(self, state: _CatalogState, query: str) -> List[float]:
+        entries = state.entries
+        if self.embed_fn is not None:
+            query_vector = self.embed_fn([query])[0]
+            return [self._cosine(query_vector, entry.vector) if entry.vector else 0.0 for entry in entries]
+
+        scores = [0.0] * len(entries)
+        lowered = query.lower()
+        for keyword in extract_keywords(query):
+            for i in state.index.get(keyword, ()):
+                scores[i] += state.idf[keyword]
+        # 问题中直接提到工具名时优先选择
+        for i, entry in enumerate(entries):
+            if entry.name.lower() in lowered:
+                scores[i] += 10.0
+        return scores
+
+    @staticmethod
+    def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return dot / norm if norm else 0.0
@@ -1,18 +1,59 @@
 """工具链管理器 - HelloAgents工具链式调用支持"""
 
+import time
+import string
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import List, Dict, Any, Optional
 from .registry import ToolRegistry
+from .base import ERROR_RESULT_PREFIXES
+from ..core.cache import LRUCache
 
 
 class ToolChain:
-    """工具链 - 支持多个工具的顺序执行"""
+    """
+    工具链 - 支持多个工具按依赖关系执行
 
-    def __init__(self, name: str, description: str):
+    - 每个步骤通过输入模板中的 {output_key} 声明它消费哪些上游结果（也可以用depends_on显式指定），
+      执行时编译为依赖图，互不依赖的分支并发执行
+    - 任一步骤失败（抛出异常、模板变量缺失或返回错误信息）时立即停止，不再启动后续步骤
+    - 步骤结果按 (步骤, 工具, 实际输入) 记忆，重新执行时只有输入发生变化的步骤及其下游会重新计算；
+      默认按工具声明的cache_policy决定是否记忆及有效期，未声明（never）的工具需要在add_step中显式开启
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        max_workers: int = 4,
+        memoize: bool = True,
+        memo_ttl: Optional[float] = None,
+        max_memo_entries: int = 256
+    ):
+        """
+        Args:
+            name: 工具链名称
+            description: 工具链描述
+            max_workers: 并发执行的最大步骤数
+            memoize: 是否允许记忆步骤结果（总开关，各步骤是否记忆见add_step）
+            memo_ttl: 显式开启记忆、且工具未声明TTL的步骤结果的有效期（秒），None表示不过期
+            max_memo_entries: 记忆结果的最大条目数
+        """
         self.name = name
         self.description = description
         self.steps: List[Dict[str, Any]] = []
+        self.max_workers = max_workers
+        self.memoize = memoize
+        self._memo = LRUCache(max_entries=max_memo_entries, ttl=memo_ttl)
+        self.last_run_stats: Dict[str, Any] = {}
 
-    def add_step(self, tool_name: str, input_template: str, output_key: str = None):
+    def add_step(
+        self,
+        tool_name: str,
+        input_template: str,
+        output_key: str = None,
+        depends_on: Optional[List[str]] = None,
+        memoize: Optional[bool] = None
+    ):
         """
         添加工具执行步骤
         
@@ -20,15 +61,39 @@ class ToolChain:
             tool_name: 工具名称
             input_template: 输入模板，支持变量替换，如 "{input}" 或 "{search_result}"
             output_key: 输出结果的键名，用于后续步骤引用
+            depends_on: 额外依赖的output_key（如需要在某个有副作用的步骤之后执行），
+                模板中引用的键会自动计入依赖
+            memoize: 该步骤的结果是否参与记忆。None表示按工具的cache_policy决定（pure/ttl记忆，
+                ttl策略使用工具的cache_ttl；never不记忆）；True为显式开启，False为关闭
         """
         step = {
             "tool_name": tool_name,
             "input_template": input_template,
-            "output_key": output_key or f"step_{len(self.steps)}_result"
+            "output_key": output_key or f"step_{len(self.steps)}_result",
+            "depends_on": list(depends_on or []),
+            "memoize": memoize
         }
         self.steps.append(step)
         print(f"✅ 工具链 '{self.name}' 添加步骤: {tool_name}")
 
+    def compile(self) -> List[List[int]]:
+        """
+        编译依赖图
+
+        模板引用或depends_on中的键解析为此前最近一个产出该键的步骤；
+        没有步骤产出的键（如input或调用方传入的context）视为外部输入。
+
+        Returns:
+            每个步骤依赖的上游步骤下标列表
+        """
+        producers: Dict[str, int] = {}
+        dependencies = []
+        for i, step in enumerate(self.steps):
+            keys = set(self._template_keys(step["input_template"])) | set(step["depends_on"])
+            dependencies.append(sorted({producers[key] for key in keys if key in producers}))
+            producers[step["output_key"]] = i
+        return dependencies
+
     def execute(self, registry: ToolRegistry, input_data: str, context: Dict[str, Any] = None) -> str:
         """
         执行工具链
@@ -39,44 +104,154 @@ class ToolChain:
             context: 执行上下文，用于变量替换
             
         Returns:
-            最终执行结果
+            最终执行结果（最后一个步骤的结果）
         """
         if not self.steps:
             return "❌ 工具链为空，无法执行"
 
         print(f"🚀 开始执行工具链: {self.name}")
+        started = time.monotonic()
         
         # 初始化上下文
         if context is None:
             context = {}
         context["input"] = input_data
-        
-        final_result = input_data
-        
-        for i, step in enumerate(self.steps):
-            tool_name = step["tool_name"]
-            input_template = step["input_template"]
-            output_key = step["output_key"]
-            
-            print(f"📝 执行步骤 {i+1}/{len(self.steps)}: {tool_name}")
-            
-            # 替换模板中的变量
-            try:
-                actual_input = input_template.format(**context)
-            except KeyError as e:
-                return f"❌ 模板变量替换失败: {e}"
-            
-            # 执行工具
-            try:
-                result = registry.execute_tool(tool_name, actual_input)
-                context[output_key] = result
-                final_result = result
-                print(f"✅ 步骤 {i+1} 完成")
-            except Exception as e:
-                return f"❌ 工具 '{tool_name}' 执行失败: {e}"
-        
-        print(f"🎉 工具链 '{self.name}' 执行完成")
-        return final_result
+        external = dict(context)
+
+        dependencies = self.compile()
+        dependents: List[List[int]] = [[] for _ in self.steps]
+        for i, deps in enumerate(dependencies):
+            for dep in deps:
+                dependents[dep].append(i)
+        remaining = [len(deps) for deps in dependencies]
+        results: Dict[int, str] = {}
+        stats = {"steps": len(self.steps), "executed": 0, "memo_hits": 0, "max_parallel": 0}
+        error: Optional[str] = None
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"chain-{self.name}")
+        running = {}
+        try:
+            ready = [i for i, count in enumerate(remaining) if count == 0]
+            while (ready or running) and error is None:
+                for i in ready:
+                    # 替换模板中的变量
+                    try:
+                        actual_input = self._resolve_input(i, external, dependencies, results)
+                    except KeyError as e:
+                        error = f"❌ 模板变量替换失败: {e}"
+                        break
+                    cached = self._memo_get(registry, i, actual_input)
+                    if cached is not None:
+                        stats["memo_hits"] += 1
+                        print(f"♻️ 步骤 {i+1}/{len(self.steps)} 复用已记忆的结果: {self.steps[i]['tool_name']}")
+                        running[self._completed(cached)] = (i, actual_input, True)
+                        continue
+                    print(f"📝 执行步骤 {i+1}/{len(self.steps)}: {self.steps[i]['tool_name']}")
+                    future = executor.submit(registry.execute_tool, self.steps[i]["tool_name"], actual_input)
+                    running[future] = (i, actual_input, False)
+                ready = []
+                if error is not None or not running:
+                    break
+                stats["max_parallel"] = max(stats["max_parallel"], len(running))
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, actual_input, from_memo = running.pop(future)
+                    tool_name = self.steps[i]["tool_name"]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error = f"❌ 工具 '{tool_name}' 执行失败: {e}"
+                        break
+                    if isinstance(result, str) and result.startswith(ERROR_RESULT_PREFIXES):
+                        error = f"❌ 工具 '{tool_name}' 执行失败: {result}"
+                        break
+                    results[i] = result
+                    if not from_memo:
+                        stats["executed"] += 1
+                        self._memo_set(registry, i, actual_input, result)
+                        print(f"✅ 步骤 {i+1} 完成")
+                    for child in dependents[i]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0:
+                            ready.append(child)
+        finally:
+            # 短路：取消尚未开始的步骤，不等待已在运行的步骤
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        stats["elapsed"] = time.monotonic() - started
+        self.last_run_stats = stats
+        for i in sorted(results):
+            context[self.steps[i]["output_key"]] = results[i]
+
+        if error is not None:
+            print(error)
+            return error
+
+        print(
+            f"🎉 工具链 '{self.name}' 执行完成（执行 {stats['executed']} 步，复用 {stats['memo_hits']} 步，"
+            f"耗时 {stats['elapsed']:.2f}s）"
+        )
+        return results[len(self.steps) - 1]
+
+    def clear_memo(self):
+        """清空记忆的步骤结果"""
+        self._memo.clear()
+
+    @staticmethod
+    def _template_keys(template: str) -> List[str]:
+        """提取模板中引用的变量名（a.b、a[0]取基础名a）"""
+        keys = []
+        for _, field_name, _, _ in string.Formatter().parse(template):
+            if field_name:
+                keys.append(field_name.split(".", 1)[0].split("[", 1)[0])
+        return keys
+
+    def _resolve_input(self, i: int, external: Dict[str, Any], dependencies: List[List[int]], results: Dict[int, str]) -> str:
+        """用外部上下文与上游步骤结果渲染步骤输入，缺少变量时抛出KeyError"""
+        scope = dict(external)
+        for dep in dependencies[i]:
+            scope[self.steps[dep]["output_key"]] = results[dep]
+        return self.steps[i]["input_template"].format(**scope)
+
+    def _memo_key(self, registry: ToolRegistry, i: int, actual_input: str) -> tuple:
+        # 注册表版本变化（工具被替换）后旧结果自动失效
+        return (id(registry), registry.version, i, self.steps[i]["tool_name"], actual_input)
+
+    def _memo_policy(self, registry: ToolRegistry, i: int) -> tuple:
+        """
+        步骤的记忆策略
+
+        Returns:
+            (是否记忆, 有效期)，有效期为None时使用memo_ttl
+        """
+        memoize = self.steps[i]["memoize"]
+        if not self.memoize or memoize is False:
+            return False, None
+        policy, ttl = registry.get_cache_policy(self.steps[i]["tool_name"])
+        if memoize is None and policy == "never":
+            return False, None
+        return True, ttl if policy == "ttl" else None
+
+    def _memo_get(self, registry: ToolRegistry, i: int, actual_input: str) -> Optional[str]:
+        memoize, _ = self._memo_policy(registry, i)
+        if not memoize:
+            return None
+        return self._memo.get(self._memo_key(registry, i, actual_input))
+
+    def _memo_set(self, registry: ToolRegistry, i: int, actual_input: str, result: str):
+        memoize, ttl = self._memo_policy(registry, i)
+        if memoize:
+            self._memo.set(self._memo_key(registry, i, actual_input), result, ttl=ttl)
+
+    @staticmethod
+    def _completed(value: str) -> Future:
+        """把记忆命中的结果包装成已完成的Future，与执行中的步骤统一调度"""
+        future = Future()
+        future.set_result(value)
+        return future
 
 
 class ToolChainManager:
@@ -117,9 +292,10 @@ class ToolChainManager:
                 {
                     "tool_name": step["tool_name"],
                     "input_template": step["input_template"],
-                    "output_key": step["output_key"]
+                    "output_key": step["output_key"],
+                    "depends_on": [chain.steps[dep]["output_key"] for dep in deps]
                 }
-                for step in chain.steps
+                for step, deps in zip(chain.steps, chain.compile())
             ]
         }
 
@@ -0,0 +1,119 @@
+"""惰性工具 - 注册时只保存工厂与元数据，首次执行时才创建真正的工具"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .base import Tool, ToolParameter, EXECUTION_MODES, CACHE_POLICIES
+
+
+class LazyTool(Tool):
+    """
+    惰性工具代理
+
+    注册表、工具目录与function calling只需要名称、描述与参数定义，这些由注册时的元数据提供；
+    搜索客户端、向量库连接、LLM实例等重量级资源在第一次执行时才通过工厂创建，
+    创建过程只发生一次（线程安全），之后所有调用直接转发给真正的工具。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        factory: Callable[[], Tool],
+        parameters: Optional[List[ToolParameter]] = None,
+        execution_mode: EXECUTION_MODES = "thread",
+        cache_policy: CACHE_POLICIES = "never",
+        cache_ttl: Optional[float] = None,
+        supports_batch: bool = False
+    ):
+        """
+        Args:
+            name: 工具名称
+            description: 工具描述
+            factory: 无参工厂函数（或工具类），返回真正的Tool实例；process模式下需可被pickle
+            parameters: 参数定义，None表示只有一个字符串参数input
+            execution_mode: 执行方式
+            cache_policy: 结果可缓存性（never / pure / ttl）
+            cache_ttl: ttl策略下结果的有效期（秒）
+            supports_batch: 真正的工具是否提供run_batch批量接口
+        """
+        super().__init__(name=name, description=description)
+        self.factory = factory
+        self.parameters = parameters
+        self.execution_mode = execution_mode
+        self.cache_policy = cache_policy
+        self.cache_ttl = cache_ttl
+        self.supports_batch = supports_batch
+        self._tool: Optional[Tool] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_materialized(self) -> bool:
+        """真正的工具是否已经创建"""
+        return self._tool is not None
+
+    def materialize(self) -> Tool:
+        """创建（或返回已创建的）真正的工具"""
+        tool = self._tool
+        if tool is not None:
+            return tool
+        with self._lock:
+            if self._tool is None:
+                tool = self.factory()
+                print(f"🔧 惰性工具 '{self.name}' 已创建")
+                self._tool = tool
+            return self._tool
+
+    def run(self, parameters: Dict[str, Any]) -> str:
+        return self.materialize().run(parameters)
+
+    async def arun(self, parameters: Dict[str, Any]) -> str:
+        tool = self.materialize()
+        if tool.is_async:
+            return await tool.arun(parameters)
+        return await super().arun(parameters)
+
+    @property
+    def is_async(self) -> bool:
+        # 未创建时无法得知，按同步工具处理，避免为了判断而提前创建
+        return self._tool is not None and self._tool.is_async
+
+    def should_cache_result(self, result: str) -> bool:
+        if self._tool is not None:
+            return self._tool.should_cache_result(result)
+        return super().should_cache_result(result)
+
+    def get_parameters(self) -> List[ToolParameter]:
+        # 始终使用注册时的元数据，保证创建前后工具目录与JSON Schema一致
+        if self.parameters is not None:
+            return self.parameters
+        return [ToolParameter(name="input", type="string", description="工具输入")]
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_") or name in ("factory", "parameters", "supports_batch"):
+            raise AttributeError(name)
+        if name == "run_batch":
+            # 能力探测（如执行器的 getattr(tool, "run_batch", None)）不能触发创建，
+            # 按注册时声明的supports_batch回答，真正调用时才在调用方线程中创建工具
+            if not self.__dict__.get("supports_batch"):
+                raise AttributeError(name)
+            return self._run_batch
+        # 其他属性转发给真正的工具，访问时才创建
+        return getattr(self.materialize(), name)
+
+    def _run_batch(self, inputs: List[str]) -> List[str]:
+        return self.materialize().run_batch(inputs)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 传给子进程时只携带工厂，由工作进程自行创建重量级资源
+        state = self.__dict__.copy()
+        state["_tool"] = None
+        state.pop("_lock", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"LazyTool(name={self.name}, materialized={self.is_materialized})"
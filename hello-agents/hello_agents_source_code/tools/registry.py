@@ -1,8 +1,60 @@
 """工具注册表 - HelloAgents原生工具系统"""
 
-from typing import Optional, Any, Callable
+import os
+import json
+import pickle
+import threading
+import concurrent.futures
+from types import MappingProxyType
+from typing import Optional, Any, Callable, Mapping, Union
 from ..core.exceptions import HelloAgentsException
-from .base import Tool
+from .base import Tool, ToolParameter, EXECUTION_MODES, CACHE_POLICIES, ERROR_RESULT_PREFIXES
+from .cache import ToolResultCache
+from .catalog import ToolCatalog
+from .lazy import LazyTool
+
+# 工作进程内已反序列化的工具，按序列化内容缓存，同一个工作进程只反序列化一次
+_WORKER_TOOLS: dict[int, Any] = {}
+
+
+def _run_in_process(payload: bytes, argument: Any) -> str:
+    """进程池中执行的入口：还原工具并执行，Tool对象传入参数字典，函数工具传入字符串"""
+    key = hash(payload)
+    target = _WORKER_TOOLS.get(key)
+    if target is None:
+        target = pickle.loads(payload)
+        _WORKER_TOOLS[key] = target
+    if isinstance(target, Tool):
+        return target.run(argument)
+    return target(argument)
+
+
+def _warm_up_worker(_: int = 0) -> int:
+    return os.getpid()
+
+
+class RegistrySnapshot:
+    """
+    注册表的不可变快照
+
+    每次注册/注销都会生成新的快照并整体替换，读取方拿到的快照在整个调用期间保持一致，
+    不需要加锁；version单调递增，基于工具列表构建的缓存比较版本号即可判断是否失效。
+    """
+
+    __slots__ = ("version", "tools", "functions", "names")
+
+    def __init__(self, version: int, tools: dict[str, Tool], functions: dict[str, Mapping[str, Any]]):
+        self.version = version
+        self.tools: Mapping[str, Tool] = MappingProxyType(tools)
+        self.functions: Mapping[str, Mapping[str, Any]] = MappingProxyType(functions)
+        self.names: tuple[str, ...] = tuple(tools) + tuple(functions)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.tools or name in self.functions
+
+    def __len__(self) -> int:
+        return len(self.names)
+
 
 class ToolRegistry:
     """
@@ -14,9 +66,28 @@ class ToolRegistry:
     2. 函数直接注册（简便）
     """
 
-    def __init__(self):
-        self._tools: dict[str, Tool] = {}
-        self._functions: dict[str, dict[str, Any]] = {}
+    def __init__(
+        self,
+        process_workers: Optional[int] = None,
+        max_tasks_per_child: Optional[int] = 100,
+        cache: Optional[ToolResultCache] = None
+    ):
+        """
+        Args:
+            process_workers: process模式工具使用的进程池大小，默认为CPU核数
+            max_tasks_per_child: 每个工作进程执行多少个任务后回收重建，防止内存泄漏累积；None表示不回收
+            cache: 工具结果缓存，默认创建一个1024条目的缓存，只对声明了可缓存性的工具生效
+        """
+        # 写操作串行化并发布新快照，读操作直接读取当前快照（引用赋值是原子的）
+        self._snapshot = RegistrySnapshot(0, {}, {})
+        self._write_lock = threading.Lock()
+        self.process_workers = process_workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self._process_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        # 工具名 -> (工具对象, 序列化结果)；序列化结果为None表示无法序列化，已回退为线程执行
+        self._payloads: dict[str, tuple[Any, Optional[bytes]]] = {}
+        self.cache = cache or ToolResultCache()
+        self._catalog: Optional[ToolCatalog] = None
 
     def register_tool(self, tool: Tool):
         """
@@ -25,13 +96,26 @@ class ToolRegistry:
         Args:
             tool: Tool实例
         """
-        if tool.name in self._tools:
-            print(f"⚠️ 警告：工具 '{tool.name}' 已存在，将被覆盖。")
+        with self._write_lock:
+            snapshot = self._snapshot
+            replaced = tool.name in snapshot.tools
+            self._publish({**snapshot.tools, tool.name: tool}, dict(snapshot.functions), tool.name)
 
-        self._tools[tool.name] = tool
+        if replaced:
+            print(f"⚠️ 警告：工具 '{tool.name}' 已存在，将被覆盖。")
         print(f"✅ 工具 '{tool.name}' 已注册。")
+        if tool.execution_mode == "process":
+            self._prepare_process_tool(tool.name, tool)
 
-    def register_function(self, name: str, description: str, func: Callable[[str], str]):
+    def register_function(
+        self,
+        name: str,
+        description: str,
+        func: Callable[[str], str],
+        execution_mode: EXECUTION_MODES = "thread",
+        cache_policy: CACHE_POLICIES = "never",
+        cache_ttl: Optional[float] = None
+    ):
         """
         直接注册函数作为工具（简便方式）
 
@@ -39,34 +123,109 @@ class ToolRegistry:
             name: 工具名称
             description: 工具描述
             func: 工具函数，接受字符串参数，返回字符串结果
+            execution_mode: 执行方式，process模式要求函数可被pickle（模块级函数）
+            cache_policy: 结果可缓存性（never / pure / ttl）
+            cache_ttl: ttl策略下结果的有效期（秒）
         """
-        if name in self._functions:
-            print(f"⚠️ 警告：工具 '{name}' 已存在，将被覆盖。")
-
-        self._functions[name] = {
+        info = MappingProxyType({
             "description": description,
-            "func": func
-        }
+            "func": func,
+            "execution_mode": execution_mode,
+            "cache_policy": cache_policy,
+            "cache_ttl": cache_ttl
+        })
+        with self._write_lock:
+            snapshot = self._snapshot
+            replaced = name in snapshot.functions
+            self._publish(dict(snapshot.tools), {**snapshot.functions, name: info}, name)
+
+        if replaced:
+            print(f"⚠️ 警告：工具 '{name}' 已存在，将被覆盖。")
         print(f"✅ 工具 '{name}' 已注册。")
+        if execution_mode == "process":
+            self._prepare_process_tool(name, func)
+
+    def register_lazy(
+        self,
+        name: str,
+        description: str,
+        factory: Callable[[], Tool],
+        parameters: Optional[list[ToolParameter]] = None,
+        execution_mode: EXECUTION_MODES = "thread",
+        cache_policy: CACHE_POLICIES = "never",
+        cache_ttl: Optional[float] = None,
+        supports_batch: bool = False
+    ) -> LazyTool:
+        """
+        惰性注册工具：只保存工厂与元数据，第一次执行时才创建真正的工具
+
+        适合构造开销大的工具（创建API客户端、连接向量库、实例化LLM等），
+        大部分工具在一次运行中用不到时可以显著缩短启动时间。
+
+        Args:
+            name: 工具名称
+            description: 工具描述
+            factory: 无参工厂函数（或工具类），返回Tool实例
+            parameters: 参数定义，None表示只有一个字符串参数input
+            execution_mode: 执行方式
+            cache_policy: 结果可缓存性（never / pure / ttl）
+            cache_ttl: ttl策略下结果的有效期（秒）
+            supports_batch: 真正的工具是否提供run_batch批量接口
+
+        Returns:
+            注册的惰性工具代理
+        """
+        tool = LazyTool(
+            name=name,
+            description=description,
+            factory=factory,
+            parameters=parameters,
+            execution_mode=execution_mode,
+            cache_policy=cache_policy,
+            cache_ttl=cache_ttl,
+            supports_batch=supports_batch
+        )
+        self.register_tool(tool)
+        return tool
 
     def unregister(self, name: str):
         """注销工具"""
-        if name in self._tools:
-            del self._tools[name]
-            print(f"🗑️ 工具 '{name}' 已注销。")
-        elif name in self._functions:
-            del self._functions[name]
+        with self._write_lock:
+            tools = dict(self._snapshot.tools)
+            functions = dict(self._snapshot.functions)
+            if tools.pop(name, None) is not None:
+                removed = True
+            else:
+                removed = functions.pop(name, None) is not None
+            if removed:
+                self._publish(tools, functions, name)
+
+        if removed:
             print(f"🗑️ 工具 '{name}' 已注销。")
         else:
             print(f"⚠️ 工具 '{name}' 不存在。")
 
+    def snapshot(self) -> RegistrySnapshot:
+        """获取当前注册表的不可变快照，适合需要在多次读取之间保持一致的调用方"""
+        return self._snapshot
+
+    def _publish(self, tools: dict[str, Tool], functions: dict[str, Mapping[str, Any]], changed: Optional[str] = None):
+        """发布新快照，调用方需持有写锁；changed为None表示所有工具都发生了变化"""
+        if changed is None:
+            self._payloads.clear()
+        else:
+            self._payloads.pop(changed, None)
+        self._snapshot = RegistrySnapshot(self._snapshot.version + 1, tools, functions)
+        # 先发布快照再失效缓存，避免并发执行用旧工具的结果回填缓存后残留
+        self.cache.invalidate(changed)
+
     def get_tool(self, name: str) -> Optional[Tool]:
         """获取Tool对象"""
-        return self._tools.get(name)
+        return self._snapshot.tools.get(name)
 
     def get_function(self, name: str) -> Optional[Callable]:
         """获取工具函数"""
-        func_info = self._functions.get(name)
+        func_info = self._snapshot.functions.get(name)
         return func_info["func"] if func_info else None
 
     def execute_tool(self, name: str, input_text: str) -> str:
@@ -80,57 +239,317 @@ class ToolRegistry:
         Returns:
             工具执行结果
         """
+        cached = self.get_cached_result(name, input_text)
+        if cached is not None:
+            return cached
+
+        version = self._snapshot.version
+        result, ok = self._execute_uncached(name, input_text)
+        if ok:
+            self.cache_result(name, input_text, result, version=version)
+        return result
+
+    def _execute_uncached(self, name: str, input_text: str) -> tuple[str, bool]:
+        """执行工具，返回 (结果, 是否正常完成)；异常与未找到工具不会被缓存"""
+        snapshot = self._snapshot
+        # process模式的工具交给进程池
+        future = self.submit_to_process(name, input_text, snapshot=snapshot)
+        if future is not None:
+            try:
+                return future.result(), True
+            except Exception as e:
+                return f"错误：执行工具 '{name}' 时发生异常: {str(e)}", False
+
         # 优先查找Tool对象
-        if name in self._tools:
-            tool = self._tools[name]
+        tool = snapshot.tools.get(name)
+        if tool is not None:
             try:
                 # 简化参数传递，直接传入字符串
-                return tool.run({"input": input_text})
+                return tool.run({"input": input_text}), True
             except Exception as e:
-                return f"错误：执行工具 '{name}' 时发生异常: {str(e)}"
+                return f"错误：执行工具 '{name}' 时发生异常: {str(e)}", False
 
         # 查找函数工具
-        elif name in self._functions:
-            func = self._functions[name]["func"]
+        elif name in snapshot.functions:
+            func = snapshot.functions[name]["func"]
             try:
-                return func(input_text)
+                return func(input_text), True
             except Exception as e:
-                return f"错误：执行工具 '{name}' 时发生异常: {str(e)}"
+                return f"错误：执行工具 '{name}' 时发生异常: {str(e)}", False
 
         else:
-            return f"错误：未找到名为 '{name}' 的工具。"
+            return f"错误：未找到名为 '{name}' 的工具。", False
+
+    def get_cache_policy(self, name: str) -> tuple[str, Optional[float]]:
+        """获取工具的 (可缓存性, TTL)"""
+        snapshot = self._snapshot
+        tool = snapshot.tools.get(name)
+        if tool is not None:
+            return tool.cache_policy, tool.cache_ttl
+        info = snapshot.functions.get(name)
+        if info is not None:
+            return info.get("cache_policy", "never"), info.get("cache_ttl")
+        return "never", None
 
-    def get_tools_description(self) -> str:
+    def get_cached_result(self, name: str, input_text: Union[str, dict[str, Any]]) -> Optional[str]:
+        """查找可缓存工具的缓存结果，工具不可缓存或未命中时返回None"""
+        policy, _ = self.get_cache_policy(name)
+        if policy == "never":
+            return None
+        return self.cache.get(name, input_text)
+
+    def cache_result(
+        self,
+        name: str,
+        input_text: Union[str, dict[str, Any]],
+        result: str,
+        version: Optional[int] = None
+    ):
         """
-        获取所有可用工具的格式化描述字符串
+        按工具声明的可缓存性写入结果
+
+        Args:
+            version: 开始执行时的注册表版本，执行期间注册表发生变化时不写入，避免旧工具的结果残留在缓存中
+        """
+        snapshot = self._snapshot
+        if version is not None and version != snapshot.version:
+            return
+        policy, ttl = self.get_cache_policy(name)
+        if policy == "never" or (policy == "ttl" and not ttl):
+            return
+        tool = snapshot.tools.get(name)
+        if tool is not None:
+            if not tool.should_cache_result(result):
+                return
+        elif not isinstance(result, str) or result.startswith(ERROR_RESULT_PREFIXES):
+            return
+        ttl = ttl if policy == "ttl" else None
+        if version is None:
+            self.cache.set(name, input_text, result, ttl=ttl)
+            return
+        # 版本检查与写入放在写锁内：_publish持有写锁发布快照并失效缓存，不会插入到检查与写入之间
+        with self._write_lock:
+            if version == self._snapshot.version:
+                self.cache.set(name, input_text, result, ttl=ttl)
+
+    def invalidate_cache(self, name: Optional[str] = None, input_text: Optional[str] = None) -> int:
+        """使工具结果缓存失效，name为None时清空全部，返回删除的条目数"""
+        return self.cache.invalidate(name, input_text)
+
+    def get_cache_stats(self, name: Optional[str] = None) -> dict[str, Any]:
+        """获取工具结果缓存的命中统计"""
+        return self.cache.get_stats(name)
+
+    def get_execution_mode(self, name: str) -> Optional[str]:
+        """获取工具实际使用的执行方式（无法序列化的process工具会回退为thread）"""
+        return self._execution_mode(name, self._snapshot)
+
+    def _execution_mode(self, name: str, snapshot: RegistrySnapshot) -> Optional[str]:
+        if name in snapshot.tools:
+            mode = snapshot.tools[name].execution_mode
+        elif name in snapshot.functions:
+            mode = snapshot.functions[name].get("execution_mode", "thread")
+        else:
+            return None
+        if mode == "process":
+            entry = self._payloads.get(name)
+            if entry is not None and entry[0] is self._process_target(name, snapshot) and entry[1] is None:
+                return "thread"
+        return mode
+
+    @staticmethod
+    def _process_target(name: str, snapshot: RegistrySnapshot) -> Any:
+        """进程池中实际执行的对象：Tool实例或函数"""
+        tool = snapshot.tools.get(name)
+        if tool is not None:
+            return tool
+        info = snapshot.functions.get(name)
+        return info["func"] if info is not None else None
+
+    def submit_to_process(
+        self,
+        name: str,
+        input_text: Union[str, dict[str, Any]],
+        snapshot: Optional[RegistrySnapshot] = None
+    ) -> Optional[concurrent.futures.Future]:
+        """
+        将process模式的工具提交到进程池
+
+        Args:
+            snapshot: 调用方已持有的注册表快照，None表示使用当前快照
+
+        Returns:
+            进程池返回的Future；工具不是process模式或无法序列化时返回None，由调用方按线程方式执行
+        """
+        snapshot = snapshot or self._snapshot
+        if self._execution_mode(name, snapshot) != "process":
+            return None
+        target = self._process_target(name, snapshot)
+        payload = self._prepare_process_tool(name, target)
+        if isinstance(target, Tool):
+            argument: Any = input_text if isinstance(input_text, dict) else {"input": input_text}
+        else:
+            argument = input_text
+        if payload is None:
+            return None
+        return self._get_process_pool().submit(_run_in_process, payload, argument)
+
+    def warm_up(self):
+        """预先启动进程池中的所有工作进程，避免首次调用承担进程启动与导入开销"""
+        pool = self._get_process_pool()
+        list(pool.map(_warm_up_worker, range(self._process_worker_count())))
+
+    def close(self):
+        """关闭进程池"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True, cancel_futures=True)
+            self._process_pool = None
+
+    def _get_process_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._process_pool is None:
+            with self._write_lock:
+                if self._process_pool is None:
+                    self._process_pool = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=self._process_worker_count(),
+                        max_tasks_per_child=self.max_tasks_per_child
+                    )
+        return self._process_pool
+
+    def _process_worker_count(self) -> int:
+        return self.process_workers or os.cpu_count() or 1
+
+    def _prepare_process_tool(self, name: str, target: Any) -> Optional[bytes]:
+        """序列化工具供工作进程使用，失败时记录并回退为线程执行"""
+        entry = self._payloads.get(name)
+        # 按对象身份校验，避免同名工具被替换后仍使用旧的序列化结果
+        if entry is not None and entry[0] is target:
+            return entry[1]
+        try:
+            payload = pickle.dumps(target)
+        except Exception as e:
+            payload = None
+            print(f"⚠️ 工具 '{name}' 无法序列化到子进程（{e}），将回退为线程执行。")
+        self._payloads[name] = (target, payload)
+        return payload
+
+    def get_tools_description(self, query: Optional[str] = None, top_k: Optional[int] = None) -> str:
+        """
+        获取可用工具的格式化描述字符串
+
+        描述由工具目录预先渲染并缓存，注册表变化时才重新生成。
+
+        Args:
+            query: 当前问题，提供时配合top_k只返回最相关的工具
+            top_k: 返回的工具数量，None表示全部
 
         Returns:
             工具描述字符串，用于构建提示词
         """
-        descriptions = []
+        return self.catalog.render(query, top_k)
+
+    def iter_tool_specs(self, snapshot: Optional[RegistrySnapshot] = None):
+        """
+        按注册顺序遍历 (工具名, 描述, 参数说明, OpenAI工具定义)，Tool对象在前，函数工具在后
+
+        Args:
+            snapshot: 要遍历的快照，None表示当前快照
+        """
+        snapshot = snapshot or self._snapshot
+        for tool in snapshot.tools.values():
+            try:
+                parameters = " ".join(f"{p.name} {p.description}" for p in tool.get_parameters())
+                schema = tool.to_openai_schema()
+            except Exception:
+                parameters = ""
+                schema = self._input_only_schema(tool.name, tool.description)
+            yield tool.name, tool.description, parameters, schema
+        for name, info in snapshot.functions.items():
+            yield name, info["description"], "", self._input_only_schema(name, info["description"])
+
+    def get_openai_tools(self, query: Optional[str] = None, top_k: Optional[int] = None) -> list[dict[str, Any]]:
+        """
+        获取OpenAI function calling格式的工具定义（按注册表版本缓存）
+
+        Args:
+            query: 当前问题，提供时配合top_k只返回最相关的工具
+            top_k: 返回的工具数量，None表示全部
+        """
+        return self.catalog.openai_tools(query, top_k)
 
-        # Tool对象描述
-        for tool in self._tools.values():
-            descriptions.append(f"- {tool.name}: {tool.description}")
+    def execute_tool_call(self, name: str, arguments: dict[str, Any]) -> str:
+        """
+        以结构化参数执行工具（原生function calling）
+
+        Tool对象直接接收参数字典；函数工具取input参数，没有时把整个参数字典序列化为JSON字符串传入。
+
+        Args:
+            name: 工具名称
+            arguments: 模型给出的参数字典
+
+        Returns:
+            工具执行结果
+        """
+        snapshot = self._snapshot
+        if name in snapshot.functions or name not in snapshot.tools:
+            input_text = arguments.get("input")
+            if input_text is None:
+                input_text = json.dumps(arguments, ensure_ascii=False) if arguments else ""
+            return self.execute_tool(name, str(input_text))
+
+        tool = snapshot.tools[name]
+        cached = self.get_cached_result(name, arguments)
+        if cached is not None:
+            return cached
+        future = self.submit_to_process(name, arguments, snapshot=snapshot)
+        try:
+            result = future.result() if future is not None else tool.run(arguments)
+        except Exception as e:
+            return f"错误：执行工具 '{name}' 时发生异常: {str(e)}"
+        self.cache_result(name, arguments, result, version=snapshot.version)
+        return result
+
+    @staticmethod
+    def _input_only_schema(name: str, description: str) -> dict[str, Any]:
+        """函数工具只有一个字符串参数input"""
+        return {
+            "type": "function",
+            "function": {
+                "name": name,
+                "description": description,
+                "parameters": {
+                    "type": "object",
+                    "properties": {"input": {"type": "string", "description": "工具输入"}},
+                    "required": ["input"],
+                },
+            },
+        }
 
-        # 函数工具描述
-        for name, info in self._functions.items():
-            descriptions.append(f"- {name}: {info['description']}")
+    @property
+    def version(self) -> int:
+        """注册表版本号，每次注册或注销工具后递增"""
+        return self._snapshot.version
 
-        return "\n".join(descriptions) if descriptions else "暂无可用工具"
+    @property
+    def catalog(self) -> ToolCatalog:
+        """工具目录（惰性创建）"""
+        if self._catalog is None:
+            with self._write_lock:
+                if self._catalog is None:
+                    self._catalog = ToolCatalog(self)
+        return self._catalog
 
     def list_tools(self) -> list[str]:
         """列出所有工具名称"""
-        return list(self._tools.keys()) + list(self._functions.keys())
+        return list(self._snapshot.names)
 
     def get_all_tools(self) -> list[Tool]:
         """获取所有Tool对象"""
-        return list(self._tools.values())
+        return list(self._snapshot.tools.values())
 
     def clear(self):
         """清空所有工具"""
-        self._tools.clear()
-        self._functions.clear()
+        with self._write_lock:
+            self._publish({}, {})
         print("🧹 所有工具已清空。")
 
 # 全局工具注册表
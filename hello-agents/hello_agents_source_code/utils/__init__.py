@@ -2,10 +2,10 @@
 
 from .logging import setup_logger, get_logger
 from .serialization import serialize_object, deserialize_object
-from .helpers import format_time, validate_config, safe_import
+from .helpers import format_time, validate_config, safe_import, run_coroutine_sync
 
 __all__ = [
     "setup_logger", "get_logger",
     "serialize_object", "deserialize_object", 
-    "format_time", "validate_config", "safe_import"
+    "format_time", "validate_config", "safe_import", "run_coroutine_sync"
 ]
\ No newline at end of file
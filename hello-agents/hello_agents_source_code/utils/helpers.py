@@ -1,10 +1,14 @@
 """辅助工具函数"""
 
+import asyncio
 import importlib
+import threading
 from datetime import datetime
-from typing import Any, Dict, Optional, Type
+from typing import Any, Awaitable, Dict, Optional, Type
 from pathlib import Path
 
+from ..core.llm import close_async_clients
+
 def format_time(timestamp: Optional[datetime] = None, format_str: str = "%Y-%m-%d %H:%M:%S") -> str:
     """
     格式化时间
@@ -72,4 +76,38 @@ def merge_dicts(dict1: Dict, dict2: Dict) -> Dict:
             result[key] = merge_dicts(result[key], value)
         else:
             result[key] = value
-    return result
\ No newline at end of file
+    return result
+
+def run_coroutine_sync(coro: Awaitable[Any]) -> Any:
+    """
+    在同步代码中运行协程
+
+    当前线程没有运行中的事件循环时直接使用asyncio.run；
+    已处于事件循环中（例如Jupyter）时，在独立线程中运行，避免嵌套事件循环报错。
+    每次调用都在新的事件循环中运行，循环关闭前会关闭其中创建的共享异步客户端，释放连接池。
+    """
+    async def _run_and_close():
+        try:
+            return await coro
+        finally:
+            await close_async_clients()
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_run_and_close())
+
+    result: Dict[str, Any] = {}
+
+    def _runner():
+        try:
+            result["value"] = asyncio.run(_run_and_close())
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=_runner)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
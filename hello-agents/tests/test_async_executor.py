@@ -0,0 +1,100 @@
+"""AsyncToolExecutor：并发执行、按完成顺序产出、超时与取消"""
+
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.tools.async_executor import AsyncToolExecutor
+from hello_agents_source_code.tools.registry import ToolRegistry
+
+
+def make_registry():
+    registry = ToolRegistry()
+
+    async def sleep_tool(text):
+        await asyncio.sleep(float(text))
+        return f"slept {text}"
+
+    def blocking_tool(text):
+        time.sleep(float(text))
+        return f"blocked {text}"
+
+    def failing_tool(text):
+        raise ValueError("bad input")
+
+    registry.register_function("sleep", "异步等待", sleep_tool)
+    registry.register_function("block", "同步等待", blocking_tool)
+    registry.register_function("fail", "总是失败", failing_tool)
+    return registry
+
+
+def tasks(*pairs, **extra):
+    return [{"tool_name": name, "input_data": data, **extra} for name, data in pairs]
+
+
+def test_parallel_keeps_order_and_runs_concurrently():
+    async def main():
+        async with AsyncToolExecutor(make_registry(), max_workers=4) as executor:
+            started = time.monotonic()
+            results = await executor.execute_tools_parallel(
+                tasks(("block", "0.2"), ("sleep", "0.2"), ("block", "0.21"), ("fail", "x"))
+            )
+            return results, time.monotonic() - started
+
+    results, elapsed = asyncio.run(main())
+    assert elapsed < 0.5
+    assert [r["result"] for r in results[:3]] == ["blocked 0.2", "slept 0.2", "blocked 0.21"]
+    # 工具内部的异常只影响自己的结果
+    assert results[3]["status"] == "success" and "bad input" in results[3]["result"]
+
+
+def test_as_completed_yields_in_completion_order():
+    async def main():
+        async with AsyncToolExecutor(make_registry()) as executor:
+            return [r["task_id"] async for r in executor.as_completed(
+                tasks(("sleep", "0.15"), ("sleep", "0.01"), ("block", "0.08"))
+            )]
+
+    assert asyncio.run(main()) == [1, 2, 0]
+
+
+def test_timeout_and_tool_concurrency():
+    async def main():
+        executor = AsyncToolExecutor(make_registry(), tool_concurrency={"sleep": 1})
+        results = await executor.execute_tools_parallel(
+            tasks(("sleep", "0.1"), ("sleep", "0.1"), ("sleep", "0.1")), timeout=0.25
+        )
+        await executor.aclose()
+        return [r["status"] for r in results]
+
+    # 并发数为1时第三个任务排队超过0.25秒
+    assert asyncio.run(main()) == ["success", "success", "timeout"]
+
+
+def test_cancel_all_marks_running_tasks_cancelled():
+    async def main():
+        async with AsyncToolExecutor(make_registry()) as executor:
+            gathered = asyncio.ensure_future(executor.execute_tools_parallel(tasks(("sleep", "5"), ("sleep", "5"))))
+            await asyncio.sleep(0.05)
+            assert executor.cancel_all() == 2
+            return await gathered
+
+    assert [r["status"] for r in asyncio.run(main())] == ["cancelled", "cancelled"]
+
+
+def test_breaking_out_of_as_completed_cancels_the_rest():
+    async def main():
+        async with AsyncToolExecutor(make_registry()) as executor:
+            stream = executor.as_completed(tasks(("sleep", "0.01"), ("sleep", "5")))
+            async for result in stream:
+                break
+            await stream.aclose()
+            return result, executor._running
+
+    started = time.monotonic()
+    result, running = asyncio.run(main())
+    assert result["task_id"] == 0 and not running
+    assert time.monotonic() - started < 2
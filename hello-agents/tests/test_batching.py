@@ -0,0 +1,102 @@
+"""RequestBatcher 的single-flight请求合并"""
+
+import os
+import sys
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.core.batching import RequestBatcher, request_fingerprint
+from hello_agents_source_code.core.llm import HelloAgentsLLM
+
+
+def run_concurrently(*targets):
+    results = [None] * len(targets)
+
+    def worker(i, target):
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i, t)) for i, t in enumerate(targets)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_identical_inflight_requests_are_coalesced():
+    batcher = RequestBatcher()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return "result"
+
+    threading.Timer(0.1, release.set).start()
+    results = run_concurrently(*[lambda: batcher.submit("k", fn)] * 4)
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    stats = batcher.get_stats()
+    assert (stats["requests"], stats["dispatched"], stats["coalesced"], stats["max_waiters"]) == (4, 1, 3, 4)
+
+
+def test_distinct_requests_are_not_delayed():
+    batcher = RequestBatcher()
+    start = time.monotonic()
+    assert batcher.submit("a", lambda: 1) == 1
+    assert batcher.submit("b", lambda: 2) == 2
+    # 不同请求立即在调用方线程执行，不等待收集窗口
+    assert time.monotonic() - start < 0.05
+    assert batcher.get_stats()["dispatched"] == 2
+
+
+def test_errors_reach_every_waiter_and_key_is_released():
+    batcher = RequestBatcher()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    def follower():
+        started.wait(1)
+        return batcher.submit("k", lambda: "unused")
+
+    results = run_concurrently(lambda: batcher.submit("k", failing), follower)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    # 失败后不再占用指纹，下一次请求重新下发
+    assert batcher.submit("k", lambda: "retried") == "retried"
+
+
+def test_llm_invoke_coalesces_concurrent_identical_calls():
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        time.sleep(0.1)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))], usage=None)
+
+    llm = HelloAgentsLLM(model="m", api_key="k", base_url="http://batching.test/v1", provider="custom",
+                         batching=RequestBatcher())
+    llm._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    messages = [{"role": "user", "content": "hi"}]
+
+    assert run_concurrently(*[lambda: llm.invoke(messages)] * 3) == ["ok"] * 3
+    assert len(calls) == 1
+    assert llm.invoke([{"role": "user", "content": "other"}]) == "ok"
+    assert len(calls) == 2
+
+
+def test_fingerprint_is_order_independent():
+    assert request_fingerprint({"a": 1, "b": 2}) == request_fingerprint({"b": 2, "a": 1})
+    assert request_fingerprint("x", 1) != request_fingerprint("x", 2)
@@ -0,0 +1,44 @@
+"""CalculatorTool.run_batch 与逐条 run 的结果一致性"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.tools.builtin.calculator import CalculatorTool
+
+
+def assert_same_as_run(expressions):
+    tool = CalculatorTool()
+    expected = [tool.run({"input": expression}) for expression in expressions]
+    assert tool.run_batch(expressions) == expected
+
+
+def test_int_intermediate_overflow():
+    # 中间乘积超出int64，最终结果为浮点数
+    assert_same_as_run([
+        "1099511627776*1099511627776/1125899906842624",
+        "2*3/4",
+        "4611686018427387904*4/2",
+    ])
+
+
+def test_big_int_results():
+    assert_same_as_run(["3**50+1", "2**70-5", "7**3+2"])
+
+
+def test_int_groups_with_functions_and_errors():
+    assert_same_as_run(["sqrt(16)+1", "sqrt(81)+2", "1/0+1", "4/2+1", "log(8, 2)", "log(100, 10)"])
+
+
+def test_float_groups():
+    assert_same_as_run(["1.5*2.0", "2.5*4.0", "1e308*10.0", "sin(0.5)", "sin(1.5)"])
+
+
+def test_leading_zero_integers_are_rejected_like_run():
+    # 007是Python不允许的整数写法，批量计算不能把它当作7；00与007.5合法
+    tool = CalculatorTool()
+    results = tool.run_batch(["007+1", "008+1", "00+1", "007.5+1", "1+2"])
+    assert results[0].startswith("计算失败") and results[1].startswith("计算失败")
+    assert results[2:] == ["1", "8.5", "3"]
+    assert_same_as_run(["007+1", "008+1", "00+1", "01+1", "007.5+1", "1+2"])
@@ -0,0 +1,74 @@
+"""chapter8 ColumnarMemoryStore：列式存储与元数据打包"""
+
+import os
+import sys
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# chapter8 的记忆模块依赖已安装的 hello_agents.memory
+pytest.importorskip("hello_agents.memory.storage")
+
+from chapter8_loader import load_chapter8_module
+
+columnar_store = load_chapter8_module("my_columnar_store.py", "hello_agents.memory.storage")
+
+
+@pytest.fixture(params=["msgpack", "json"])
+def metadata_format(request, monkeypatch):
+    if request.param == "msgpack":
+        if columnar_store.msgpack is None:
+            pytest.skip("未安装msgpack")
+    else:
+        monkeypatch.setattr(columnar_store, "msgpack", None)
+    return request.param
+
+
+def make_item(i, **kwargs):
+    fields = dict(id=f"m{i}", content=f"内容{i}", memory_type="episodic" if i % 2 else "working",
+                  user_id="alice" if i < 5 else "bob", timestamp=datetime(2024, 1, 1) + timedelta(hours=i),
+                  importance=i / 10, metadata={})
+    fields.update(kwargs)
+    return columnar_store.MemoryItem(**fields)
+
+
+def test_datetimes_and_tuples_round_trip(metadata_format):
+    metadata = {
+        "seen_at": datetime(2024, 5, 1, 8, 30, 15, 123456),
+        "aware": datetime(2024, 5, 1, tzinfo=timezone(timedelta(hours=8))),
+        "span": (1, "二", (3.0, None)),
+        "nested": {"items": [(1, 2), {"at": datetime(2020, 1, 1)}]},
+        "ordered": OrderedDict(a=1),
+        "plain": [1, "x", True, None],
+    }
+    restored = columnar_store.unpack_metadata(columnar_store.pack_metadata(metadata))
+    assert restored == metadata
+    assert type(restored["span"]) is tuple and type(restored["span"][2]) is tuple
+    assert type(restored["nested"]["items"][0]) is tuple
+    assert columnar_store.pack_metadata({}) is None and columnar_store.unpack_metadata(None) == {}
+
+
+def test_unsupported_values_become_strings(metadata_format):
+    restored = columnar_store.unpack_metadata(columnar_store.pack_metadata({"set": {1}, "path": object}))
+    assert restored == {"set": "{1}", "path": str(object)}
+
+
+def test_store_add_find_and_reuse_rows(metadata_format):
+    store = columnar_store.ColumnarMemoryStore()
+    for i in range(10):
+        store.add(make_item(i, metadata={"i": i, "at": datetime(2024, 1, 1)}))
+
+    assert store.get("m3") == make_item(3, metadata={"i": 3, "at": datetime(2024, 1, 1)})
+    found = store.find(user_id="alice", memory_type="episodic", start_time=datetime(2024, 1, 1, 2))
+    assert [item.id for item in found] == ["m3"]
+    assert store.count(user_id="bob") == 5 and store.find(user_id="carol") == []
+
+    assert store.remove("m3") and not store.remove("m3") and "m3" not in store
+    store.add(make_item(42))
+    assert store.get_stats()["free_rows"] == 0 and len(store) == 10
+    assert store.update_importance("m42", 0.9) and store.get("m42").importance == 0.9
+    assert store.get_stats()["metadata_format"] == metadata_format
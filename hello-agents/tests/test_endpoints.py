@@ -0,0 +1,123 @@
+"""多端点路由、熔断、健康检查与LLM的关闭"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.core.endpoints import Endpoint, EndpointPool
+from hello_agents_source_code.core.exceptions import HelloAgentsException
+from hello_agents_source_code.core.llm import HelloAgentsLLM
+
+
+class Unavailable(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+def fake_client(reply=None, error=None):
+    """只实现 chat.completions.create 的客户端，记录调用次数"""
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        if error is not None:
+            raise error
+        message = SimpleNamespace(content=reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)), calls=calls)
+
+
+def make_llm(*clients, **kwargs):
+    urls = [f"http://endpoint-{i}.test/v1" for i in range(len(clients))]
+    llm = HelloAgentsLLM(model="m", api_key="k", provider="custom", endpoints=urls, max_retries=0, **kwargs)
+    for endpoint, client in zip(llm.endpoint_pool.endpoints, clients):
+        endpoint.client = client
+    return llm
+
+
+def test_least_outstanding_routing():
+    pool = EndpointPool(["http://a.test", "http://b.test"])
+    first = pool.select()
+    second = pool.select()
+    assert {first.name, second.name} == {"http://a.test", "http://b.test"}
+    pool.release(first, latency=0.1)
+    assert pool.select() is first
+
+
+def test_breaker_opens_and_recovers():
+    pool = EndpointPool(["http://a.test"], failure_threshold=2, reset_timeout=0.05)
+    endpoint = pool.endpoints[0]
+    for _ in range(2):
+        pool.release(pool.select(), success=False)
+    assert endpoint.breaker.state == "open"
+    assert pool.select() is None
+    time.sleep(0.06)
+    # 半开状态只放行一个探测请求
+    probe = pool.select()
+    assert probe is endpoint and pool.select() is None
+    pool.release(probe, latency=0.01)
+    assert endpoint.breaker.state == "closed"
+
+
+def test_failover_to_healthy_endpoint():
+    broken, healthy = fake_client(error=Unavailable()), fake_client(reply="ok")
+    llm = make_llm(broken, healthy)
+    assert llm.invoke([{"role": "user", "content": "hi"}]) == "ok"
+    stats = {s["base_url"]: s for s in llm.endpoint_pool.get_stats()}
+    assert stats["http://endpoint-0.test/v1"]["failures"] == len(broken.calls)
+    assert all(s["outstanding"] == 0 for s in stats.values())
+
+
+def test_client_errors_do_not_fail_over():
+    rejecting, healthy = fake_client(error=BadRequest()), fake_client(reply="ok")
+    llm = make_llm(rejecting, healthy)
+    llm.endpoint_pool.endpoints[1].outstanding = 1  # 确保先选中第一个端点
+    with pytest.raises(HelloAgentsException):
+        llm.invoke([{"role": "user", "content": "hi"}])
+    assert healthy.calls == []
+    assert llm.endpoint_pool.endpoints[0].breaker.state == "closed"
+
+
+def test_endpoint_instances_are_copied():
+    shared = Endpoint("http://shared.test/v1", model="x", name="shared")
+    first = EndpointPool([shared], failure_threshold=1)
+    second = EndpointPool([shared])
+    first.release(first.select(), success=False)
+
+    # 两个端点池各自维护熔断状态，不修改调用方传入的实例
+    assert first.endpoints[0].breaker.state == "open"
+    assert second.endpoints[0].breaker.state == "closed"
+    assert shared.breaker.state == "closed" and shared.requests == 0
+    assert (second.endpoints[0].model, second.endpoints[0].name) == ("x", "shared")
+
+
+def test_close_stops_health_checks(monkeypatch):
+    probed = []
+    monkeypatch.setattr(HelloAgentsLLM, "_probe_endpoint", lambda self, endpoint: probed.append(endpoint) or True)
+    with HelloAgentsLLM(model="m", api_key="k", provider="custom",
+                        endpoints=["http://health.test/v1"], health_check_interval=0.01) as llm:
+        thread = llm.endpoint_pool._health_thread
+        time.sleep(0.05)
+        assert thread.is_alive() and probed
+    assert not thread.is_alive()
+    assert llm.endpoint_pool._health_thread is None
+
+
+def test_restart_does_not_leave_old_health_thread():
+    pool = EndpointPool(["http://a.test"])
+    pool.start_health_checks(lambda endpoint: True, interval=0.01)
+    old = pool._health_thread
+    pool.stop_health_checks(timeout=0)
+    pool.start_health_checks(lambda endpoint: True, interval=0.01)
+    old.join(1)
+    assert not old.is_alive()
+    pool.stop_health_checks()
@@ -0,0 +1,110 @@
+"""惰性工具注册与延迟导入"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from hello_agents_source_code.tools.async_executor import AsyncToolExecutor
+from hello_agents_source_code.tools.base import Tool, ToolParameter
+from hello_agents_source_code.tools.registry import ToolRegistry
+
+
+class EchoTool(Tool):
+    cache_policy = "pure"
+
+    def __init__(self):
+        super().__init__("echo", "原样返回")
+
+    def run(self, parameters):
+        return f"echo:{parameters['input']}"
+
+    def run_batch(self, inputs):
+        return [f"batch:{text}" for text in inputs]
+
+    def get_parameters(self):
+        return [ToolParameter(name="input", type="string", description="输入")]
+
+
+class CountingFactory:
+    def __init__(self, delay=0.0, fail_times=0):
+        self.calls = 0
+        self.delay = delay
+        self.fail_times = fail_times
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls <= self.fail_times:
+            raise ConnectionError("服务暂不可用")
+        return EchoTool()
+
+
+def test_metadata_is_available_without_materializing():
+    registry = ToolRegistry()
+    factory = CountingFactory()
+    params = [ToolParameter(name="query", type="string", description="查询内容")]
+    lazy = registry.register_lazy("echo", "原样返回", factory, parameters=params, cache_policy="pure")
+
+    assert "- echo: 原样返回" in registry.get_tools_description()
+    schema = registry.get_openai_tools()[0]["function"]
+    assert schema["name"] == "echo" and "query" in schema["parameters"]["properties"]
+    assert registry.get_cache_policy("echo") == ("pure", None)
+    # 能力探测同样不触发创建
+    assert getattr(lazy, "run_batch", None) is None and not lazy.is_async
+    assert factory.calls == 0 and not lazy.is_materialized
+
+
+def test_factory_runs_once_under_concurrency():
+    registry = ToolRegistry()
+    factory = CountingFactory(delay=0.05)
+    lazy = registry.register_lazy("echo", "原样返回", factory)
+
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(registry.execute_tool("echo", str(i))))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert factory.calls == 1 and lazy.is_materialized
+    assert sorted(results) == [f"echo:{i}" for i in range(8)]
+
+
+def test_failed_factory_is_retried_on_next_call():
+    registry = ToolRegistry()
+    factory = CountingFactory(fail_times=1)
+    lazy = registry.register_lazy("echo", "原样返回", factory, cache_policy="pure")
+
+    assert registry.execute_tool("echo", "x") == "错误：执行工具 'echo' 时发生异常: 服务暂不可用"
+    assert not lazy.is_materialized
+    assert registry.execute_tool("echo", "x") == "echo:x"
+    assert factory.calls == 2
+
+
+def test_declared_batch_support_uses_run_batch():
+    registry = ToolRegistry()
+    factory = CountingFactory()
+    registry.register_lazy("echo", "原样返回", factory, supports_batch=True)
+
+    async def main():
+        async with AsyncToolExecutor(registry) as executor:
+            return await executor.execute_tools_batch("echo", ["a", "b"])
+
+    assert [r["result"] for r in asyncio.run(main())] == ["batch:a", "batch:b"]
+    assert factory.calls == 1
+
+
+def test_package_import_defers_heavy_modules():
+    code = (
+        "import sys, json, hello_agents_source_code\n"
+        "print(json.dumps([m for m in ('openai', 'httpx', 'numpy') if m in sys.modules]))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(output.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,114 @@
+"""HelloAgentsLLM 的异步接口：共享连接池、ainvoke 与 astream"""
+
+import os
+import sys
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.core.cache import ResponseCache
+from hello_agents_source_code.core.exceptions import HelloAgentsException
+from hello_agents_source_code.core.llm import HelloAgentsLLM, close_async_clients
+
+
+def make_llm(api_key="k", **kwargs):
+    return HelloAgentsLLM(model="m", api_key=api_key, base_url="http://async.test/v1", provider="custom", **kwargs)
+
+
+class FakeStream:
+    def __init__(self, pieces, error=None):
+        self.pieces = pieces
+        self.error = error
+        self.closed = False
+
+    async def __aiter__(self):
+        for piece in self.pieces:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+        if self.error is not None:
+            raise self.error
+
+    async def close(self):
+        self.closed = True
+
+
+def use_fake_client(llm, create):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    llm._get_async_client = lambda base_url=None, api_key=None: client
+
+
+def test_clients_are_shared_per_loop_and_credentials():
+    async def clients():
+        first, second, other = make_llm(), make_llm(), make_llm(api_key="other")
+        result = (first._get_async_client(), second._get_async_client(), other._get_async_client())
+        await close_async_clients()
+        return result
+
+    shared, same, other = asyncio.run(clients())
+    assert shared is same and shared is not other
+    # 连接池绑定事件循环，新的循环中创建新的客户端
+    assert asyncio.run(clients())[0] is not shared
+
+
+def test_ainvoke_runs_requests_concurrently():
+    llm = make_llm()
+
+    async def create(model, messages, **params):
+        await asyncio.sleep(0.1)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=messages[0]["content"]))],
+                               usage=None)
+
+    use_fake_client(llm, create)
+
+    async def main():
+        return await asyncio.gather(*(llm.ainvoke([{"role": "user", "content": str(i)}]) for i in range(10)))
+
+    started = time.monotonic()
+    assert asyncio.run(main()) == [str(i) for i in range(10)]
+    assert time.monotonic() - started < 0.5
+
+
+def test_ainvoke_uses_cache_and_wraps_errors():
+    llm = make_llm(max_retries=0, cache=ResponseCache())
+    calls = []
+
+    async def create(model, messages, **params):
+        calls.append(messages)
+        if messages[0]["content"] == "bad":
+            raise ValueError("invalid")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))], usage=None)
+
+    use_fake_client(llm, create)
+
+    async def main():
+        first = await llm.ainvoke([{"role": "user", "content": "hi"}], temperature=0)
+        second = await llm.ainvoke([{"role": "user", "content": "hi"}], temperature=0)
+        with pytest.raises(HelloAgentsException):
+            await llm.ainvoke([{"role": "user", "content": "bad"}])
+        return first, second
+
+    assert asyncio.run(main()) == ("ok", "ok")
+    assert len(calls) == 2
+
+
+def test_astream_yields_pieces_and_closes_the_stream():
+    llm = make_llm(max_retries=0)
+    streams = []
+
+    async def create(model, messages, stream, **params):
+        streams.append(FakeStream(["你", "", "好"], error=ValueError("cut") if messages[0]["content"] == "bad" else None))
+        return streams[-1]
+
+    use_fake_client(llm, create)
+
+    async def collect(content):
+        return [piece async for piece in llm.astream([{"role": "user", "content": content}])]
+
+    assert asyncio.run(collect("hi")) == ["你", "好"]
+    assert streams[0].closed
+    with pytest.raises(HelloAgentsException):
+        asyncio.run(collect("bad"))
+    assert streams[1].closed
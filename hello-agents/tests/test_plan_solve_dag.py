@@ -0,0 +1,107 @@
+"""PlanAndSolveAgent 依赖图模式：计划规范化与并发执行"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.agents.plan_solve_agent import PlanAndSolveAgent, normalize_plan
+
+
+def ids_and_deps(steps):
+    return [(step["id"], step["deps"]) for step in steps]
+
+
+def test_string_steps_form_a_chain():
+    assert ids_and_deps(normalize_plan(["a", "b", "c"])) == [(1, []), (2, [1]), (3, [2])]
+
+
+def test_forward_dependencies_are_reordered():
+    plan = [{"id": 1, "task": "a", "deps": [2]}, {"id": 2, "task": "b", "deps": []}]
+    assert ids_and_deps(normalize_plan(plan)) == [(2, []), (1, [2])]
+
+
+def test_cycles_and_unknown_dependencies_are_dropped():
+    plan = [
+        {"id": 1, "task": "a", "deps": [3, 1, 9]},
+        {"id": 2, "task": "b", "deps": [1]},
+        {"id": 3, "task": "c", "deps": [2]},
+    ]
+    # 只丢弃使图成环的 2 -> 1，其余依赖保留，且每个依赖都排在步骤之前
+    assert ids_and_deps(normalize_plan(plan)) == [(2, []), (3, [2]), (1, [3])]
+
+
+@pytest.mark.parametrize("deps, expected", [
+    (2, [2]),
+    ("2", [2]),
+    ("12", [12]),
+    ((2,), [2]),
+    (None, []),
+    ([[2], 2], [2]),
+])
+def test_scalar_and_malformed_dependencies(deps, expected):
+    plan = [{"id": 2, "task": "a", "deps": []}, {"id": 12, "task": "b", "deps": []}, {"id": 3, "task": "c", "deps": deps}]
+    assert normalize_plan(plan)[-1]["deps"] == expected
+
+
+def test_duplicate_and_unhashable_ids_are_renumbered():
+    plan = [
+        {"id": 1, "task": "a", "deps": []},
+        {"id": 1, "task": "b", "deps": []},
+        {"id": [3], "task": "c", "deps": "1"},
+    ]
+    steps = normalize_plan(plan)
+    # 不可哈希的编号按位置编号为3，重复的1重新编号为最大编号+1
+    assert ids_and_deps(steps) == [(1, []), (4, []), (3, [1])]
+
+
+class DAGLLM:
+    """规划阶段返回依赖图，执行阶段记录并发度"""
+
+    def __init__(self, plan, fail_step=None):
+        self.plan = plan
+        self.fail_step = fail_step
+        self.running = 0
+        self.max_running = 0
+
+    def invoke(self, messages, **kwargs):
+        return f"```python\n{self.plan}\n```"
+
+    async def ainvoke(self, messages, **kwargs):
+        prompt = messages[0]["content"]
+        step = prompt.split("# 当前步骤:\n")[1].split("\n")[0]
+        if step == self.fail_step:
+            raise RuntimeError("step failed")
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.05)
+        self.running -= 1
+        return f"{step}完成"
+
+
+PLAN = '[{"id": 1, "task": "查A", "deps": []}, {"id": 2, "task": "查B", "deps": []}, {"id": 3, "task": "汇总", "deps": [1, 2]}]'
+
+
+def test_independent_steps_run_concurrently():
+    llm = DAGLLM(PLAN)
+    agent = PlanAndSolveAgent("p", llm, parallel=True)
+    assert agent.run("问题") == "汇总完成"
+    assert llm.max_running == 2
+
+
+def test_failed_step_propagates():
+    agent = PlanAndSolveAgent("p", DAGLLM(PLAN, fail_step="查B"), parallel=True)
+    with pytest.raises(RuntimeError):
+        agent.run("问题")
+
+
+def test_unparseable_plan_stops():
+    class BadPlanLLM(DAGLLM):
+        def invoke(self, messages, **kwargs):
+            return "没有计划"
+
+    agent = PlanAndSolveAgent("p", BadPlanLLM(PLAN), parallel=True)
+    assert agent.run("问题") == "无法生成有效的行动计划，任务终止。"
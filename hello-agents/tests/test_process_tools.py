@@ -0,0 +1,95 @@
+"""ToolRegistry 的process执行模式：进程池执行、序列化回退与异常处理"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.tools.async_executor import AsyncToolExecutor
+from hello_agents_source_code.tools.builtin.calculator import CalculatorTool
+from hello_agents_source_code.tools.registry import ToolRegistry
+
+
+def worker_pid(text):
+    return f"{text}:{os.getpid()}"
+
+
+def explode(text):
+    raise ValueError(f"bad {text}")
+
+
+class ProcessCalculator(CalculatorTool):
+    execution_mode = "process"
+
+    def run(self, parameters):
+        return f"{super().run(parameters)}@{os.getpid()}"
+
+
+@pytest.fixture
+def registry():
+    registry = ToolRegistry(process_workers=2)
+    yield registry
+    registry.close()
+
+
+def test_function_tools_run_in_worker_processes(registry):
+    registry.register_function("pid", "返回进程号", worker_pid, execution_mode="process")
+    assert registry.get_execution_mode("pid") == "process"
+
+    name, pid = registry.execute_tool("pid", "x").split(":")
+    assert name == "x" and int(pid) != os.getpid()
+
+
+def test_tool_objects_run_in_worker_processes(registry):
+    registry.register_tool(ProcessCalculator())
+    result, pid = registry.execute_tool("python_calculator", "2**10").split("@")
+    assert result == "1024" and int(pid) != os.getpid()
+    # 原生function calling同样进入进程池
+    assert registry.execute_tool_call("python_calculator", {"input": "1+1"}).startswith("2@")
+
+
+def test_unpicklable_tools_fall_back_to_threads(registry):
+    registry.register_function("closure", "闭包无法序列化", lambda text: f"{text}:{os.getpid()}", execution_mode="process")
+    assert registry.get_execution_mode("closure") == "thread"
+    assert registry.execute_tool("closure", "x") == f"x:{os.getpid()}"
+
+    # 同名工具替换为可序列化的函数后重新判断
+    registry.register_function("closure", "改为模块级函数", worker_pid, execution_mode="process")
+    assert registry.get_execution_mode("closure") == "process"
+
+
+def test_worker_errors_become_error_results(registry):
+    registry.register_function("explode", "总是失败", explode, execution_mode="process", cache_policy="pure")
+    for _ in range(2):
+        assert registry.execute_tool("explode", "x") == "错误：执行工具 'explode' 时发生异常: bad x"
+    # 异常结果不写入缓存
+    stats = registry.get_cache_stats("explode")
+    assert (stats["hits"], stats["misses"]) == (0, 2)
+
+
+def test_async_executor_awaits_process_tools(registry):
+    registry.register_function("pid", "返回进程号", worker_pid, execution_mode="process")
+    registry.warm_up()
+
+    async def main():
+        async with AsyncToolExecutor(registry) as executor:
+            return await executor.execute_tools_parallel(
+                [{"tool_name": "pid", "input_data": str(i)} for i in range(4)]
+            )
+
+    results = asyncio.run(main())
+    assert [r["result"].split(":")[0] for r in results] == ["0", "1", "2", "3"]
+    assert all(int(r["result"].split(":")[1]) != os.getpid() for r in results)
+
+
+def test_close_shuts_down_the_pool(registry):
+    registry.register_function("pid", "返回进程号", worker_pid, execution_mode="process")
+    registry.execute_tool("pid", "x")
+    pool = registry._process_pool
+    registry.close()
+    assert registry._process_pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(os.getpid)
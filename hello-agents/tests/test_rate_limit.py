@@ -0,0 +1,93 @@
+"""按提供商共享的限流器与重试策略"""
+
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.core.llm import HelloAgentsLLM
+from hello_agents_source_code.core.rate_limit import (
+    PRIORITY_BATCH, PRIORITY_INTERACTIVE, RateLimiter, RetryPolicy, get_rate_limiter
+)
+
+
+def drain(limiter: RateLimiter, requests: int):
+    for _ in range(requests):
+        limiter.acquire()
+
+
+def test_new_clients_do_not_refill_shared_bucket(monkeypatch):
+    monkeypatch.setenv("LLM_RPM", "3")
+    base_url = "http://rate-limit-refill.test/v1"
+    first = HelloAgentsLLM(model="m", api_key="k", base_url=base_url, provider="custom")
+    drain(first.rate_limiter, 3)
+
+    # 每个新客户端都会用同样的LLM_RPM配置限流器，不能借此重新装满令牌桶
+    for _ in range(3):
+        other = HelloAgentsLLM(model="m", api_key="k", base_url=base_url, provider="custom")
+        assert other.rate_limiter is first.rate_limiter
+    assert first.rate_limiter._request_bucket.time_until(1) > 0
+
+
+def test_reconfigure_clamps_tokens_to_new_capacity():
+    limiter = get_rate_limiter("custom", "http://rate-limit-clamp.test/v1", 60)
+    drain(limiter, 10)
+    get_rate_limiter("custom", "http://rate-limit-clamp.test/v1", 30)
+    bucket = limiter._request_bucket
+    assert bucket.capacity == 30
+    assert bucket.tokens <= 50.1
+    get_rate_limiter("custom", "http://rate-limit-clamp.test/v1", 5)
+    assert bucket.tokens <= 5
+
+
+def test_interactive_calls_go_before_batch():
+    limiter = RateLimiter(requests_per_minute=600)
+    drain(limiter, 600)
+    order = []
+
+    def worker(priority, label):
+        limiter.acquire(priority=priority)
+        order.append(label)
+
+    batch = threading.Thread(target=worker, args=(PRIORITY_BATCH, "batch"))
+    batch.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=worker, args=(PRIORITY_INTERACTIVE, "interactive"))
+    interactive.start()
+    batch.join(2)
+    interactive.join(2)
+    assert order == ["interactive", "batch"]
+
+
+def test_throttle_pauses_and_slows_down():
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.on_throttle(retry_after=0.2)
+    stats = limiter.get_stats()
+    assert stats["rate_scale"] == 0.5 and stats["paused_for"] > 0
+
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.15
+    limiter.on_success()
+    assert limiter.get_stats()["rate_scale"] == pytest.approx(0.55)
+
+
+def test_retry_policy():
+    policy = RetryPolicy(max_retries=2, base_delay=0.5, max_delay=4)
+
+    class Throttled(Exception):
+        status_code = 429
+        response = type("Response", (), {"headers": {"retry-after": "2"}})()
+
+    class BadRequest(Exception):
+        status_code = 400
+
+    assert policy.is_retryable(Throttled()) and policy.is_rate_limited(Throttled())
+    assert not policy.is_retryable(BadRequest())
+    assert policy.get_retry_after(Throttled()) == 2.0
+    assert policy.compute_delay(0, retry_after=10) == 4
+    assert 0 <= policy.compute_delay(3) <= 4
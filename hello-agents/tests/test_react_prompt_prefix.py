@@ -0,0 +1,73 @@
+"""ReActAgent 稳定提示词前缀与增量历史"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.agents.react_agent import ReActAgent
+from hello_agents_source_code.tools.registry import ToolRegistry
+
+
+class ScriptedLLM:
+    """按顺序返回预设回复，并记录每次请求的消息"""
+
+    provider = "fake"
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    def invoke(self, messages, **kwargs):
+        self.requests.append([dict(m) for m in messages])
+        return self.replies.pop(0)
+
+
+def make_registry():
+    registry = ToolRegistry()
+    registry.register_function("search", "搜索网页", lambda text: f"{text}的结果")
+    return registry
+
+
+def test_each_step_extends_the_same_prefix():
+    llm = ScriptedLLM([
+        "Thought: 先搜索\nAction: search[a]",
+        "Thought: 格式错了\nAction: 搜索a",
+        "Thought: 完成\nAction: Finish[答案]",
+    ])
+    agent = ReActAgent(name="r", llm=llm, tool_registry=make_registry())
+    assert agent.run("问题") == "答案"
+
+    first, second, third = llm.requests
+    # 每一步都以字节相同的前缀开头，之前的请求是之后请求的前缀
+    assert len(first) == 1 and "- search: 搜索网页" in first[0]["content"] and "{history}" not in first[0]["content"]
+    assert second[:1] == first and third[:3] == second
+    assert second[1:] == [
+        {"role": "assistant", "content": "Action: search[a]"},
+        {"role": "user", "content": "Observation: a的结果"},
+    ]
+    assert third[4]["content"] == "Observation: 无效的Action格式，请检查。"
+    assert agent.last_run_stats == {"llm_calls": 3, "failed_steps": 1}
+
+
+def test_prefix_is_reused_until_tools_change():
+    registry = make_registry()
+    agent = ReActAgent(name="r", llm=ScriptedLLM([]), tool_registry=registry)
+    prefix = agent._build_prompt_prefix("问题")
+    assert agent._build_prompt_prefix("问题") is prefix
+
+    registry.register_function("calc", "计算器", lambda text: text)
+    updated = agent._build_prompt_prefix("问题")
+    assert updated is not prefix and "- calc: 计算器" in updated
+    assert agent._build_prompt_prefix("另一个问题") != updated
+
+
+def test_custom_template_without_history_renders_every_step():
+    template = "工具：{tools}\n问题：{question}\n记录：{tools}"
+    llm = ScriptedLLM(["Action: search[x]", "Action: Finish[好]"])
+    agent = ReActAgent(name="r", llm=llm, tool_registry=make_registry(), custom_prompt=template)
+
+    assert agent.run("问题") == "好"
+    # 没有{history}占位符时每步整体渲染一条消息
+    assert [len(request) for request in llm.requests] == [1, 1]
+    assert llm.requests[0][0]["content"].startswith("工具：- search: 搜索网页\n问题：问题")
@@ -0,0 +1,107 @@
+"""ReActAgent 流式执行模式与增量Action解析"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.agents.react_agent import ReActAgent, StreamingActionParser
+from hello_agents_source_code.tools.registry import ToolRegistry
+
+
+def feed_all(parser, chunks):
+    for i, chunk in enumerate(chunks):
+        if parser.feed(chunk):
+            return i
+    return None
+
+
+def test_action_completes_when_brackets_close():
+    parser = StreamingActionParser()
+    chunks = ["**Thought:** 需要", "查天气\n**Action:**", " `search[北京[", "朝阳]天气]`", "\n多余内容"]
+    assert feed_all(parser, chunks) == 3
+    assert parser.action == "search[北京[朝阳]天气]"
+    assert parser.thought == "需要查天气"
+
+
+def test_marker_without_content_waits_for_more_text():
+    parser = StreamingActionParser()
+    assert not parser.feed("Thought: x\nAction:")
+    assert not parser.feed("**")
+    assert parser.feed(" Finish[完成]")
+    assert parser.action == "Finish[完成]"
+
+
+def test_unbracketed_action_is_left_to_full_parse():
+    parser = StreamingActionParser()
+    assert feed_all(parser, ["Action: Finish\n", "Thought: 之后"]) is None
+    assert parser.action is None
+
+
+class StreamingLLM:
+    """think逐字产出预设回复，记录实际消费的片段数、请求参数以及流是否被关闭"""
+
+    provider = "fake"
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.consumed = []
+        self.closed = []
+        self.kwargs = []
+
+    def think(self, messages, **kwargs):
+        self.kwargs.append(kwargs)
+        reply = self.replies.pop(0)
+        index = len(self.consumed)
+        self.consumed.append(0)
+        self.closed.append(False)
+        try:
+            for char in reply:
+                self.consumed[index] += 1
+                yield char
+        finally:
+            self.closed[index] = True
+
+    def invoke(self, messages, **kwargs):
+        raise AssertionError("流式模式不应调用invoke")
+
+
+def make_registry():
+    registry = ToolRegistry()
+    registry.register_function("search", "搜索", lambda text: f"{text}：晴")
+    return registry
+
+
+def test_stream_mode_stops_generation_once_action_is_complete():
+    first = "Thought: 查一下\nAction: search[北京]\nObservation: 模型编造的观察"
+    llm = StreamingLLM([first, "Thought: 知道了\nAction: Finish[北京晴]"])
+    agent = ReActAgent(name="r", llm=llm, tool_registry=make_registry(), stream=True)
+
+    assert agent.run("北京天气", temperature=0) == "北京晴"
+    # Action闭合后立即关闭流，不再接收模型编造的Observation
+    assert llm.consumed[0] == first.index("]") + 1
+    assert all(llm.closed)
+    assert llm.kwargs == [{"temperature": 0}, {"temperature": 0}]
+    assert agent.current_history == ["Action: search[北京]", "Observation: 北京：晴"]
+
+
+def test_stream_mode_without_valid_action_stops():
+    llm = StreamingLLM(["我不知道该怎么做"])
+    agent = ReActAgent(name="r", llm=llm, tool_registry=make_registry())
+
+    assert agent.run("问题", stream=True) == "抱歉，我无法在限定步数内完成这个任务。"
+    assert agent.last_run_stats == {"llm_calls": 1, "failed_steps": 1}
+
+
+@pytest.mark.parametrize("reply, expected", [
+    ("Thought: 好\nAction: Finish[完成]", "完成"),
+    # 括号始终未闭合时读完整个流再整体解析
+    ("Thought: 好\nAction: Finish[完成", ""),
+])
+def test_action_at_end_of_stream(reply, expected):
+    llm = StreamingLLM([reply])
+    agent = ReActAgent(name="r", llm=llm, tool_registry=make_registry(), stream=True)
+    assert agent.run("问题") == expected
+    assert llm.consumed[0] == len(reply)
@@ -0,0 +1,96 @@
+"""ReflectionAgent 流水线模式与顺序模式的一致性"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.agents.reflection_agent import ReflectionAgent
+
+PROMPTS = {
+    "initial": "INITIAL|{task}",
+    "reflect": "REFLECT|{content}",
+    "refine": "REFINE|{last_attempt}|{feedback}",
+}
+
+
+class ScriptedLLM:
+    """
+    确定性的LLM：优化结果为 上一轮回答+评审意见；
+    评审意见由回答中已应用的修改次数决定（见critiques），超出后回答"无需改进"
+    """
+
+    def __init__(self, critiques, delay=0.02):
+        self.critiques = critiques
+        self.delay = delay
+        self.prompts = []
+
+    def _respond(self, prompt):
+        self.prompts.append(prompt)
+        kind, *rest = prompt.split("|")
+        if kind == "INITIAL":
+            return "v0"
+        if kind == "REFLECT":
+            applied = rest[0].count("+")
+            return self.critiques[applied] if applied < len(self.critiques) else "无需改进"
+        last_attempt, feedback = rest
+        return f"{last_attempt}+{feedback}"
+
+    def invoke(self, messages, **kwargs):
+        return self._respond(messages[0]["content"])
+
+    async def ainvoke(self, messages, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self._respond(messages[0]["content"])
+
+
+def run(pipelined, critiques, max_iterations=5):
+    llm = ScriptedLLM(critiques)
+    agent = ReflectionAgent(
+        "r", llm, custom_prompts=PROMPTS, max_iterations=max_iterations,
+        pipelined=pipelined, convergence_threshold=1.01
+    )
+    return agent.run("任务"), agent, llm
+
+
+@pytest.mark.parametrize("critiques", [
+    ["改A", "改A", "改B"],
+    ["改A", "改B", "改C"],
+    ["改A", "改A", "改A", "改A", "改A", "改A"],
+    [],
+])
+def test_pipelined_matches_sequential(critiques):
+    expected, _, _ = run(False, critiques)
+    actual, agent, _ = run(True, critiques)
+    assert actual == expected
+
+
+def test_speculation_is_used_only_when_critique_repeats():
+    result, agent, llm = run(True, ["改A", "改A", "改B"])
+    assert result == "v0+改A+改A+改B"
+    stats = agent.last_run_stats
+    assert stats["speculation_hits"] == 1
+    # 每个被采用的优化结果都基于对同一回答的评审意见
+    refine_prompts = [p for p in llm.prompts if p.startswith("REFINE")]
+    assert "REFINE|v0+改A|改A" in refine_prompts and "REFINE|v0+改A+改A|改B" in refine_prompts
+
+
+def test_approval_discards_speculation():
+    _, agent, _ = run(True, ["改A", "改A"])
+    stats = agent.last_run_stats
+    assert stats["discarded_calls"] >= 1 and stats["wasted_tokens"] > 0
+
+
+def test_pipelined_failure_propagates():
+    class FailingLLM(ScriptedLLM):
+        async def ainvoke(self, messages, **kwargs):
+            if messages[0]["content"].startswith("REFLECT"):
+                raise RuntimeError("reflect failed")
+            return await super().ainvoke(messages, **kwargs)
+
+    agent = ReflectionAgent("r", FailingLLM(["改A"]), custom_prompts=PROMPTS, pipelined=True)
+    with pytest.raises(RuntimeError):
+        agent.run("任务")
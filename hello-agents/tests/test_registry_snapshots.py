@@ -0,0 +1,87 @@
+"""ToolRegistry 的写时复制快照与并发读写"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.tools.registry import ToolRegistry
+
+
+def test_snapshots_are_immutable_and_versioned():
+    registry = ToolRegistry()
+    registry.register_function("a", "工具a", lambda text: "a")
+    before = registry.snapshot()
+    registry.register_function("b", "工具b", lambda text: "b")
+    registry.unregister("a")
+
+    # 已取得的快照不受之后的修改影响
+    assert before.names == ("a",) and "b" not in before
+    assert registry.snapshot().names == ("b",) and registry.version == before.version + 2
+    with pytest.raises(TypeError):
+        before.functions["c"] = {}
+
+    registry.unregister("missing")
+    assert registry.version == before.version + 2
+    registry.clear()
+    assert len(registry.snapshot()) == 0 and registry.list_tools() == []
+
+
+def test_concurrent_writers_do_not_lose_registrations():
+    registry = ToolRegistry()
+
+    def register(start):
+        for i in range(start, start + 50):
+            registry.register_function(f"tool{i}", "工具", lambda text: text)
+
+    threads = [threading.Thread(target=register, args=(n * 50,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert len(registry.list_tools()) == 200
+    assert registry.version == 200
+
+
+def test_readers_see_consistent_snapshots_during_writes():
+    registry = ToolRegistry()
+    registry.register_function("stable", "始终存在", lambda text: "ok")
+    stop = threading.Event()
+    errors = []
+
+    def churn():
+        i = 0
+        while not stop.is_set():
+            registry.register_function(f"tmp{i % 3}", "临时工具", lambda text: "tmp")
+            registry.unregister(f"tmp{(i + 1) % 3}")
+            i += 1
+
+    def read():
+        try:
+            for _ in range(500):
+                snapshot = registry.snapshot()
+                assert len(snapshot.names) == len(snapshot.tools) + len(snapshot.functions)
+                assert all(name in snapshot for name in snapshot.names)
+                assert registry.execute_tool("stable", "x") == "ok"
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=churn)
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    writer.start()
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join(20)
+    stop.set()
+    writer.join(5)
+    assert errors == []
+
+
+def test_unknown_tool_reports_error():
+    registry = ToolRegistry()
+    assert registry.execute_tool("missing", "x") == "错误：未找到名为 'missing' 的工具。"
+    assert registry.get_tool("missing") is None and registry.get_function("missing") is None
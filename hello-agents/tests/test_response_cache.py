@@ -0,0 +1,76 @@
+"""LLM响应缓存：内存LRU、SQLite磁盘缓存与淘汰"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.core.cache import LRUCache, ResponseCache, SQLiteCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and len(cache) == 2
+
+
+def test_sqlite_evicts_by_last_access(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=3)
+    for key in "abc":
+        cache.set(key, key)
+        time.sleep(0.01)
+    cache.get("a")
+    cache.set("d", "d")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["a", "c", "d"]
+    assert len(cache) == 3
+
+
+def test_sqlite_keeps_running_count_without_full_scans(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=2)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    cache.set("a", "1")
+    cache.set("a", "2")  # 覆盖不增加条目数
+    cache.set("b", "3")
+    assert cache._count == 2
+    assert not any("COUNT(*)" in sql for sql in statements)
+    cache.set("c", "4")
+    assert cache._count == 2 and len(cache) == 2
+
+
+def test_sqlite_drops_expired_before_lru(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path, max_entries=2, ttl=0.05)
+    cache.set("old", "x")
+    time.sleep(0.06)
+    cache.ttl = None
+    cache.set("a", "1")
+    cache.set("b", "2")
+    # 超出容量时优先清理已过期的条目，未过期条目都保留
+    assert (cache.get("a"), cache.get("b"), cache.get("old")) == ("1", "2", None)
+    cache.close()
+
+    # 重新打开时从文件中恢复条目数
+    reopened = SQLiteCache(path, max_entries=2)
+    assert reopened._count == 2
+    reopened.clear()
+    assert len(reopened) == 0
+
+
+def test_response_cache_backfills_memory_from_disk(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = ResponseCache(db_path=path)
+    key = first.make_key("m", [{"role": "user", "content": "hi"}], {"temperature": 0})
+    first.set(key, "hello")
+
+    second = ResponseCache(db_path=path)
+    assert second.get(key) == "hello" and second.get(key) == "hello"
+    assert second.get("missing") is None
+    stats = second.get_stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert second.is_cacheable({"temperature": 0}) and not second.is_cacheable({"temperature": 0.7})
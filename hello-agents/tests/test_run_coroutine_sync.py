@@ -0,0 +1,52 @@
+"""run_coroutine_sync：同步入口运行协程并释放其中创建的异步客户端"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.core.llm import HelloAgentsLLM
+from hello_agents_source_code.utils.helpers import run_coroutine_sync
+
+
+def make_llm():
+    return HelloAgentsLLM(model="m", api_key="k", base_url="http://async-clients.test/v1", provider="custom")
+
+
+def test_async_clients_are_closed_after_sync_run():
+    llm = make_llm()
+
+    async def use_client():
+        return llm._get_async_client()
+
+    client = run_coroutine_sync(use_client())
+    assert client.is_closed()
+
+
+def test_closes_clients_when_coroutine_fails():
+    llm = make_llm()
+    created = []
+
+    async def fail():
+        created.append(llm._get_async_client())
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        run_coroutine_sync(fail())
+    assert created[0].is_closed()
+
+
+def test_inside_running_loop():
+    llm = make_llm()
+
+    async def use_client():
+        return llm._get_async_client()
+
+    async def outer():
+        # 已有事件循环时在独立线程中运行
+        return run_coroutine_sync(use_client())
+
+    assert asyncio.run(outer()).is_closed()
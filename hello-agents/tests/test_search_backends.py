@@ -0,0 +1,100 @@
+"""SearchTool 的可插拔后端：顺序回退、指定后端与对冲搜索"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.tools.builtin.search import FunctionBackend, SearchBackend, SearchTool
+
+
+def result(title):
+    return {"answer": None, "results": [{"title": title, "content": "c", "url": f"http://{title}"}]}
+
+
+def backend(name, response=None, delay=0.0, error=None):
+    calls = []
+
+    def search_fn(query):
+        calls.append(query)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return response if response is not None else result(name)
+
+    b = FunctionBackend(name, search_fn)
+    b.calls = calls
+    return b
+
+
+def test_single_custom_backend_is_used():
+    local = backend("local")
+    tool = SearchTool(backends=[local])
+    assert "[1] local" in tool.run({"input": "q"})
+    assert local.calls == ["q"]
+
+
+def test_sequential_mode_falls_back_in_order():
+    broken = backend("broken", error=RuntimeError("down"))
+    empty = backend("empty", response={"answer": "", "results": []})
+    good = backend("good")
+    tool = SearchTool(backends=[broken, empty, good], hedge_mode="off")
+
+    output = tool.run({"input": "q"})
+    assert "good 搜索结果" in output
+    assert broken.calls == empty.calls == good.calls == ["q"]
+
+
+def test_sequential_mode_all_failed():
+    tool = SearchTool(backends=[backend("a", error=RuntimeError("x")), backend("b", error=RuntimeError("y"))])
+    assert tool.run({"input": "q"}).startswith("❌ 所有搜索源都失败了")
+
+
+def test_named_backend():
+    first, second = backend("first"), backend("second")
+    tool = SearchTool(backend="second", backends=[first, second])
+    assert "second 搜索结果" in tool.run({"input": "q"})
+    assert first.calls == []
+    assert SearchTool(backend="missing", backends=[first]).run({"input": "q"}).startswith("❌ 没有可用的搜索源")
+
+
+def test_knowledge_graph_counts_as_result():
+    kg = backend("kg", response={"answer": None, "knowledge_graph": "图谱摘要", "results": []})
+    other = backend("other")
+    tool = SearchTool(backends=[kg, other])
+    assert "图谱摘要" in tool.run({"input": "q"})
+    assert other.calls == []
+
+
+def test_hedged_search_uses_secondary_when_primary_is_slow():
+    slow, fast = backend("slow", delay=0.5), backend("fast")
+    tool = SearchTool(backends=[slow, fast], hedge_mode="hedged", hedge_delay=0.05)
+
+    start = time.monotonic()
+    output = tool.run({"input": "q"})
+    assert time.monotonic() - start < 0.4
+    assert "fast 搜索结果" in output
+    stats = tool.get_stats()
+    assert stats["hedged"] == 1 and stats["secondary_wins"] == 1
+
+
+def test_hedged_search_skips_secondary_when_primary_is_fast():
+    primary, secondary = backend("primary"), backend("secondary")
+    tool = SearchTool(backends=[primary, secondary], hedge_mode="hedged", hedge_delay=0.5)
+    assert "primary 搜索结果" in tool.run({"input": "q"})
+    assert secondary.calls == []
+
+
+def test_race_merges_within_window():
+    a, b = backend("a"), backend("b", delay=0.05)
+    tool = SearchTool(backends=[a, b], hedge_mode="race", merge_window=0.5)
+    output = tool.run({"input": "q"})
+    assert "a + b" in output and "http://a" in output and "http://b" in output
+
+
+def test_search_backend_is_abstract():
+    with pytest.raises(TypeError):
+        SearchBackend()
@@ -0,0 +1,135 @@
+"""chapter7 MySimpleAgent 的工具描述与工具调用"""
+
+import os
+import sys
+import time
+import threading
+import importlib.util
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# chapter7 基于pip安装的hello_agents编写
+hello_agents = pytest.importorskip("hello_agents")
+
+from hello_agents_source_code.tools import registry as source_registry
+from hello_agents_source_code.tools.base import Tool
+
+spec = importlib.util.spec_from_file_location("chapter7_simple_agent", os.path.join(ROOT, "chapter7", "simple_agent.py"))
+simple_agent = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(simple_agent)
+MySimpleAgent = simple_agent.MySimpleAgent
+
+
+class ScriptedLLM:
+    """按顺序返回预设回复，并记录每次请求的消息"""
+
+    model = "scripted"
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    def invoke(self, messages, **kwargs):
+        self.requests.append([dict(m) for m in messages])
+        return self.replies.pop(0)
+
+
+def make_registry(registry_cls):
+    registry = registry_cls()
+    registry.register_function("echo", "原样返回输入", lambda text: f"echo:{text}")
+    registry.register_function("weather", "查询城市天气", lambda text: f"{text}晴")
+    return registry
+
+
+@pytest.mark.parametrize("top_k", [None, 1])
+def test_pip_registry_without_relevance_selection(top_k):
+    llm = ScriptedLLM(["[TOOL_CALL:echo:hi]", "完成"])
+    agent = MySimpleAgent("a", llm, tool_registry=make_registry(hello_agents.ToolRegistry), tool_top_k=top_k)
+
+    assert agent.run("天气怎么样") == "完成"
+    system_prompt = llm.requests[0][0]["content"]
+    # 不支持筛选的注册表列出全部工具
+    assert "echo" in system_prompt and "weather" in system_prompt
+
+
+def test_source_registry_selects_top_k():
+    llm = ScriptedLLM(["完成"])
+    agent = MySimpleAgent("a", llm, tool_registry=make_registry(source_registry.ToolRegistry), tool_top_k=1)
+
+    agent.run("查询城市天气")
+    system_prompt = llm.requests[0][0]["content"]
+    assert "weather" in system_prompt and "echo" not in system_prompt
+
+
+class NativeLLM(ScriptedLLM):
+    """支持原生function calling的LLM：回复为 invoke_with_tools 的返回结构"""
+
+    def invoke_with_tools(self, messages, tools, **kwargs):
+        self.requests.append([dict(m) for m in messages])
+        self.tools = tools
+        return self.replies.pop(0)
+
+
+def native_reply(content, tool_calls=()):
+    calls = [{"id": f"call_{i}", "name": name, "arguments": arguments, "error": None}
+             for i, (name, arguments) in enumerate(tool_calls)]
+    message = {"role": "assistant", "content": content, "tool_calls": [{"id": c["id"]} for c in calls]}
+    return {"content": content, "tool_calls": calls, "message": message}
+
+
+def test_native_tools_execute_structured_calls():
+    llm = NativeLLM([native_reply(None, [("weather", {"input": "北京"})]), native_reply("北京晴")])
+    agent = MySimpleAgent("a", llm, tool_registry=make_registry(source_registry.ToolRegistry), use_native_tools=True)
+
+    assert agent.use_native_tools
+    assert agent.run("北京天气") == "北京晴"
+    assert {tool["function"]["name"] for tool in llm.tools} == {"echo", "weather"}
+    tool_message = llm.requests[1][-1]
+    assert tool_message["role"] == "tool" and tool_message["tool_call_id"] == "call_0"
+    assert "北京晴" in tool_message["content"]
+
+
+def test_native_tools_fall_back_to_text_mode():
+    # pip的ToolRegistry与不支持tools参数的LLM：退回 [TOOL_CALL:...] 文本标记
+    llm = ScriptedLLM(["完成"])
+    agent = MySimpleAgent("a", llm, tool_registry=make_registry(hello_agents.ToolRegistry), use_native_tools=True)
+
+    assert not agent.use_native_tools
+    assert agent.run("你好") == "完成"
+    assert "[TOOL_CALL:" in llm.requests[0][0]["content"]
+
+
+class SlowTool(Tool):
+    def __init__(self, release):
+        super().__init__("slow", "等待release后返回")
+        self.release = release
+
+    def run(self, parameters):
+        self.release.wait(5)
+        return "slow done"
+
+    def get_parameters(self):
+        return []
+
+
+def test_tool_timeout_and_close():
+    release = threading.Event()
+    registry = make_registry(source_registry.ToolRegistry)
+    registry.register_tool(SlowTool(release))
+    llm = ScriptedLLM([])
+
+    with MySimpleAgent("a", llm, tool_registry=registry, tool_timeout=0.2) as agent:
+        start = time.monotonic()
+        # 单个调用同样受超时限制
+        results = agent._execute_tool_calls([{"tool_name": "slow", "parameters": "x"}])
+        assert time.monotonic() - start < 2
+        assert "超时" in results[0]
+        executor = agent._tool_executor
+    # 退出时关闭线程池，不等待超时后仍在运行的调用
+    assert agent._tool_executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(lambda: None)
+    release.set()
@@ -0,0 +1,86 @@
+"""chapter8 SQLiteMemoryStore：批量提交、读自己的写与写线程的错误处理"""
+
+import os
+import sys
+from concurrent.futures import Future
+from datetime import datetime
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# chapter8 的记忆模块依赖已安装的 hello_agents.memory
+pytest.importorskip("hello_agents.memory.storage")
+
+from chapter8_loader import load_chapter8_module
+
+sqlite_store = load_chapter8_module("my_sqlite_store.py", "hello_agents.memory.storage")
+
+
+@pytest.fixture
+def store(tmp_path):
+    with sqlite_store.SQLiteMemoryStore(str(tmp_path / "memory.db"), read_pool_size=2) as store:
+        yield store
+
+
+def test_writes_are_visible_to_following_reads(store):
+    for i in range(20):
+        store.add_memory(f"m{i}", "alice" if i % 2 else "bob", f"内容{i}", "episodic", 1000 + i, i / 20,
+                         properties={"i": i})
+    store.link_concepts("m1", [("c1", "天气", 0.9)])
+
+    # 未显式flush也能读到刚提交的写入
+    assert store.get_memory("m3")["properties"] == {"i": 3}
+    rows = store.search_memories(user_id="alice", memory_type="episodic", start_time=1010, importance_threshold=0.6)
+    assert [row["memory_id"] for row in rows] == ["m19", "m17", "m15", "m13"]
+
+    assert store.update_memory("m3", content="新内容") and store.get_memory("m3")["content"] == "新内容"
+    assert not store.update_memory("missing", importance=1.0)
+    assert store.delete_memory("m1") and store.get_memory("m1") is None
+
+    stats = store.get_database_stats()
+    assert (stats["memories_count"], stats["users_count"], stats["memory_concepts_count"]) == (19, 2, 0)
+    assert stats["journal_mode"] == "wal" and stats["writes"] >= 24
+
+
+def test_memory_item_round_trip(store):
+    item = sqlite_store.MemoryItem(id="x", content="记住这件事", memory_type="semantic", user_id="u",
+                                   timestamp=datetime(2024, 5, 1, 12, 0, 0), importance=0.7, metadata={"k": "v"})
+    store.add_memory_item(item, wait=True)
+    restored = sqlite_store.SQLiteMemoryStore.to_memory_item(store.get_memory("x"))
+    assert restored == item
+
+
+def test_non_sqlite_errors_fail_the_request_and_keep_the_writer_alive(store):
+    # 超出64位的整数在绑定参数时抛出OverflowError，而不是sqlite3.Error
+    failed = store.link_concepts("m", [("c", "概念", 2 ** 70)])
+    with pytest.raises(OverflowError):
+        failed.result(timeout=5)
+
+    store.add_memory("m", "alice", "仍然可以写入", "working", 1, 0.5, wait=True)
+    assert store.get_memory("m")["content"] == "仍然可以写入"
+    assert store._thread.is_alive()
+
+
+def test_only_the_bad_request_in_a_batch_fails(store):
+    store.flush(timeout=5)
+    batch = [
+        ([(sqlite_store._INSERT_USER, ("u", "u"))], Future()),
+        ([(sqlite_store._INSERT_CONCEPT, ("c", "概念")), (sqlite_store._LINK_CONCEPT, ("m", "c", 2 ** 70))], Future()),
+        ([(sqlite_store._INSERT_CONCEPT, ("d", "另一个概念"))], Future()),
+    ]
+    # 写线程空闲时直接提交一个批次，整批失败后逐条重试
+    store._commit_batch(batch)
+    assert batch[0][1].result(timeout=1) == 0 and batch[2][1].result(timeout=1) == 0
+    with pytest.raises(OverflowError):
+        batch[1][1].result(timeout=1)
+    assert store.get_database_stats()["concepts_count"] == 1
+
+
+def test_closed_store_rejects_writes(tmp_path):
+    store = sqlite_store.SQLiteMemoryStore(str(tmp_path / "memory.db"))
+    store.add_memory("m", "u", "c", "working", 1, 0.5)
+    store.close()
+    with pytest.raises(RuntimeError):
+        store.add_memory("n", "u", "c", "working", 1, 0.5)
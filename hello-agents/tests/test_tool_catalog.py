@@ -0,0 +1,86 @@
+"""ToolCatalog：预渲染的工具描述、相关性筛选与并发下的版本一致性"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.tools.catalog import ToolCatalog
+from hello_agents_source_code.tools.registry import ToolRegistry
+
+
+def make_registry():
+    registry = ToolRegistry()
+    registry.register_function("weather", "查询城市天气", lambda text: "晴")
+    registry.register_function("calculator", "计算数学表达式", lambda text: "2")
+    registry.register_function("search", "搜索网页内容", lambda text: "结果")
+    return registry
+
+
+def test_render_selects_relevant_tools_in_registration_order():
+    catalog = ToolCatalog(make_registry(), always_include=["search"])
+    assert catalog.render("北京天气怎么样", top_k=1) == "- weather: 查询城市天气\n- search: 搜索网页内容"
+    assert catalog.render() == "- weather: 查询城市天气\n- calculator: 计算数学表达式\n- search: 搜索网页内容"
+    # 与任何工具都不相关时返回全部工具
+    assert catalog.select("你好", top_k=1) == ["weather", "calculator", "search"]
+
+
+def test_render_cache_follows_registry_version():
+    registry = make_registry()
+    catalog = registry.catalog
+    assert "weather" in catalog.render("天气", top_k=1)
+    registry.unregister("weather")
+    assert catalog.render("天气", top_k=1) == "- calculator: 计算数学表达式\n- search: 搜索网页内容"
+    assert ToolRegistry().get_tools_description() == "暂无可用工具"
+
+
+def test_render_uses_one_version_when_registry_changes_midway():
+    registry = make_registry()
+    changed = []
+
+    def embed(texts):
+        # 打分过程中另一个调用方注销工具并重建目录
+        if len(texts) == 1 and not changed:
+            changed.append(True)
+            registry.unregister("weather")
+            catalog.render()
+        return [[float("天气" in text or "weather" in text), 1.0] for text in texts]
+
+    catalog = ToolCatalog(registry, embed_fn=embed)
+    catalog.render()
+    assert catalog.render("天气", top_k=1).startswith("- weather: 查询城市天气")
+    assert "weather" not in catalog.render("天气", top_k=1)
+
+
+def test_concurrent_render_and_register():
+    registry = make_registry()
+    catalog = registry.catalog
+    errors = []
+    stop = threading.Event()
+
+    def churn():
+        i = 0
+        while not stop.is_set():
+            registry.register_function(f"extra{i % 5}", "额外的天气工具", lambda text: "")
+            registry.unregister(f"extra{(i + 3) % 5}")
+            i += 1
+
+    def render():
+        try:
+            for _ in range(300):
+                text = catalog.render("天气", top_k=2)
+                assert text and all(line.startswith("- ") for line in text.split("\n"))
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=churn)
+    readers = [threading.Thread(target=render) for _ in range(4)]
+    writer.start()
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join(10)
+    stop.set()
+    writer.join(5)
+    assert errors == []
@@ -0,0 +1,112 @@
+"""ToolChain 依赖图执行与步骤结果记忆"""
+
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.tools.chain import ToolChain
+from hello_agents_source_code.tools.registry import ToolRegistry
+
+
+class Recorder:
+    """记录调用次数与最大并发数的工具函数"""
+
+    def __init__(self, fn, delay=0.0):
+        self.fn = fn
+        self.delay = delay
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text):
+        with self._lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return self.fn(text)
+
+
+def make_registry(**tools):
+    registry = ToolRegistry()
+    for name, (recorder, policy, ttl) in tools.items():
+        registry.register_function(name, name, recorder, cache_policy=policy, cache_ttl=ttl)
+    return registry
+
+
+def test_independent_branches_run_concurrently():
+    upper = Recorder(str.upper, delay=0.1)
+    join = Recorder(lambda text: f"[{text}]")
+    registry = make_registry(upper=(upper, "never", None), join=(join, "never", None))
+    chain = ToolChain("c", "d")
+    chain.add_step("upper", "{input}-a", "a")
+    chain.add_step("upper", "{input}-b", "b")
+    chain.add_step("join", "{a}+{b}", "result")
+
+    assert chain.execute(registry, "x") == "[X-A+X-B]"
+    assert upper.max_running == 2
+    assert chain.compile() == [[], [], [0, 1]]
+
+
+def test_failure_stops_downstream_steps():
+    join = Recorder(lambda text: text)
+    registry = make_registry(join=(join, "never", None))
+    chain = ToolChain("c", "d")
+    chain.add_step("missing", "{input}", "a")
+    chain.add_step("join", "{a}", "b")
+    assert chain.execute(registry, "x").startswith("❌ 工具 'missing' 执行失败")
+    assert join.calls == 0
+
+    chain = ToolChain("c", "d")
+    chain.add_step("join", "{nope}", "a")
+    assert chain.execute(registry, "x").startswith("❌ 模板变量替换失败")
+
+
+def test_memoization_follows_tool_cache_policy():
+    pure = Recorder(str.upper)
+    side_effect = Recorder(lambda text: f"saved {text}")
+    registry = make_registry(pure=(pure, "pure", None), write=(side_effect, "never", None))
+    chain = ToolChain("c", "d")
+    chain.add_step("pure", "{input}", "a")
+    chain.add_step("write", "{a}", "b")
+
+    for _ in range(3):
+        assert chain.execute(registry, "x") == "saved X"
+    # 未声明缓存策略的工具每次都重新执行
+    assert side_effect.calls == 3
+    assert chain.last_run_stats["memo_hits"] == 1
+
+
+def test_never_policy_requires_explicit_opt_in():
+    side_effect = Recorder(lambda text: f"saved {text}")
+    registry = make_registry(write=(side_effect, "never", None))
+    chain = ToolChain("c", "d")
+    chain.add_step("write", "{input}", "a", memoize=True)
+    chain.execute(registry, "x")
+    chain.execute(registry, "x")
+    assert side_effect.calls == 1
+
+    chain = ToolChain("c", "d", memoize=False)
+    chain.add_step("write", "{input}", "a", memoize=True)
+    chain.execute(registry, "x")
+    assert side_effect.calls == 2
+
+
+def test_ttl_policy_expires_memoized_results():
+    search = Recorder(lambda text: f"result {text}")
+    registry = make_registry(search=(search, "ttl", 0.1))
+    chain = ToolChain("c", "d")
+    chain.add_step("search", "{input}", "a")
+
+    chain.execute(registry, "x")
+    chain.execute(registry, "x")
+    assert chain.last_run_stats["memo_hits"] == 1
+    time.sleep(0.15)
+    chain.execute(registry, "x")
+    assert chain.last_run_stats["memo_hits"] == 0
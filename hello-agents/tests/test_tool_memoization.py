@@ -0,0 +1,143 @@
+"""ToolRegistry 按工具声明的可缓存性记忆结果"""
+
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hello_agents_source_code.tools.base import Tool
+from hello_agents_source_code.tools.registry import ToolRegistry
+
+
+class Counter:
+    def __init__(self, result="ok"):
+        self.calls = 0
+        self.result = result
+
+    def __call__(self, text):
+        self.calls += 1
+        return f"{self.result}:{text}" if not callable(self.result) else self.result(text)
+
+
+def test_pure_results_are_reused_and_normalized():
+    registry = ToolRegistry()
+    func = Counter()
+    registry.register_function("pure", "纯函数", func, cache_policy="pure")
+    assert registry.execute_tool("pure", "a") == registry.execute_tool("pure", "  a ") == "ok:a"
+    assert registry.execute_tool_call("pure", {"input": "a"}) == "ok:a"
+    assert func.calls == 1
+    stats = registry.get_cache_stats("pure")
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_never_policy_always_runs():
+    registry = ToolRegistry()
+    func = Counter()
+    registry.register_function("live", "不可缓存", func)
+    registry.execute_tool("live", "a")
+    registry.execute_tool("live", "a")
+    assert func.calls == 2
+
+
+def test_ttl_results_expire():
+    registry = ToolRegistry()
+    func = Counter()
+    registry.register_function("ttl", "短期有效", func, cache_policy="ttl", cache_ttl=0.05)
+    registry.execute_tool("ttl", "a")
+    registry.execute_tool("ttl", "a")
+    assert func.calls == 1
+    time.sleep(0.06)
+    registry.execute_tool("ttl", "a")
+    assert func.calls == 2
+
+    # ttl策略缺少有效期时不缓存
+    missing = Counter()
+    registry.register_function("no_ttl", "未设置有效期", missing, cache_policy="ttl")
+    registry.execute_tool("no_ttl", "a")
+    registry.execute_tool("no_ttl", "a")
+    assert missing.calls == 2
+
+
+def test_errors_are_not_cached():
+    registry = ToolRegistry()
+    func = Counter(result=lambda text: "错误：暂时不可用")
+    registry.register_function("flaky", "偶尔失败", func, cache_policy="pure")
+
+    def boom(text):
+        raise RuntimeError("boom")
+
+    registry.register_function("boom", "抛出异常", boom, cache_policy="pure")
+    for _ in range(2):
+        registry.execute_tool("flaky", "a")
+        assert registry.execute_tool("boom", "a").startswith("错误")
+    assert func.calls == 2
+    assert registry.get_cache_stats("boom")["hits"] == 0
+
+
+class DegradingTool(Tool):
+    """结果带降级标记时不缓存"""
+
+    cache_policy = "pure"
+
+    def __init__(self):
+        super().__init__("degrading", "可能返回降级结果")
+        self.calls = 0
+
+    def run(self, parameters):
+        self.calls += 1
+        return "降级结果" if parameters["input"] == "slow" else "完整结果"
+
+    def get_parameters(self):
+        return []
+
+    def should_cache_result(self, result):
+        return super().should_cache_result(result) and result != "降级结果"
+
+
+def test_tool_can_refuse_to_cache_results():
+    registry = ToolRegistry()
+    tool = DegradingTool()
+    registry.register_tool(tool)
+    for _ in range(2):
+        registry.execute_tool("degrading", "slow")
+        registry.execute_tool("degrading", "fast")
+    assert tool.calls == 3
+
+
+def test_invalidation_and_reregistration():
+    registry = ToolRegistry()
+    func = Counter()
+    registry.register_function("pure", "纯函数", func, cache_policy="pure")
+    registry.execute_tool("pure", "a")
+    registry.execute_tool("pure", "b")
+    assert registry.invalidate_cache("pure", "a") == 1
+    registry.execute_tool("pure", "a")
+    registry.execute_tool("pure", "b")
+    assert func.calls == 3
+
+    # 重新注册同名工具后旧结果失效
+    replacement = Counter(result="new")
+    registry.register_function("pure", "新实现", replacement, cache_policy="pure")
+    assert registry.execute_tool("pure", "b") == "new:b"
+
+
+def test_result_of_replaced_tool_is_not_cached():
+    registry = ToolRegistry()
+    started, release = threading.Event(), threading.Event()
+
+    def slow(text):
+        started.set()
+        release.wait(2)
+        return "old"
+
+    registry.register_function("tool", "旧实现", slow, cache_policy="pure")
+    worker = threading.Thread(target=registry.execute_tool, args=("tool", "a"))
+    worker.start()
+    started.wait(2)
+    registry.register_function("tool", "新实现", lambda text: "new", cache_policy="pure")
+    release.set()
+    worker.join(2)
+    # 执行期间工具被替换，旧实现的结果不能留在缓存里
+    assert registry.execute_tool("tool", "a") == "new"
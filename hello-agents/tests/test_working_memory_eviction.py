@@ -0,0 +1,82 @@
+"""chapter8 WorkingMemory 基于堆的过期清理与容量淘汰"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# chapter8 的记忆模块依赖已安装的 hello_agents.memory
+memory_base = pytest.importorskip("hello_agents.memory.base")
+
+from chapter8_loader import load_chapter8_module
+
+working_memory = load_chapter8_module("my_working_memory.py", "hello_agents.memory.types")
+
+
+def make_memory(capacity=3, ttl=60):
+    config = memory_base.MemoryConfig(working_memory_capacity=capacity, working_memory_ttl=ttl)
+    return working_memory.WorkingMemory(config)
+
+
+def item(memory_id, importance=0.5, minutes_ago=0.0, content="内容"):
+    return memory_base.MemoryItem(id=memory_id, content=content, importance=importance,
+                                  timestamp=datetime.now() - timedelta(minutes=minutes_ago))
+
+
+def current_priority(memory, m):
+    return m.importance * memory._calculate_time_decay(m.timestamp)
+
+
+def test_capacity_evicts_lowest_current_priority():
+    memory = make_memory(capacity=3)
+    memory.add(item("new_low", importance=0.3))
+    memory.add(item("old_high", importance=0.9, minutes_ago=50))
+    memory.add(item("mid", importance=0.5, minutes_ago=10))
+    lowest = min(memory.memories.values(), key=lambda m: current_priority(memory, m)).id
+
+    memory.add(item("incoming", importance=0.6))
+    assert lowest == "new_low" and set(memory.memories) == {"old_high", "mid", "incoming"}
+
+
+def test_overwrite_updates_priority_and_does_not_evict():
+    memory = make_memory(capacity=2)
+    memory.add(item("a", importance=0.1))
+    memory.add(item("b", importance=0.5))
+    memory.add(item("a", importance=0.9))  # 覆盖同ID，不占用新容量
+    assert set(memory.memories) == {"a", "b"}
+
+    memory.add(item("c", importance=0.6))
+    # a的旧条目已失效，淘汰的是当前优先级最低的b
+    assert set(memory.memories) == {"a", "c"}
+
+
+def test_expired_memories_are_removed_on_access():
+    memory = make_memory(capacity=10, ttl=30)
+    memory.add(item("old", minutes_ago=40, content="北京天气"))
+    memory.add(item("fresh", minutes_ago=5, content="北京天气"))
+    assert set(memory.memories) == {"fresh"}
+
+    memory.add(item("expiring", minutes_ago=30 - 0.001, content="北京天气"))
+    assert {m.id for m in memory.retrieve("北京天气")} == {"fresh", "expiring"}
+    time.sleep(0.1)
+    assert [m.id for m in memory.retrieve("北京天气")] == ["fresh"]
+
+
+def test_removed_entries_are_skipped_and_heaps_stay_bounded():
+    memory = make_memory(capacity=5)
+    memory.add(item("keep", importance=0.9))
+    for i in range(500):
+        memory.add(item(f"tmp{i}", importance=0.1))
+        assert memory.remove(f"tmp{i}")
+    assert not memory.remove("missing")
+    assert len(memory._priority_heap) <= 2 * len(memory.memories) + 64
+    assert len(memory._expiry_heap) <= 2 * len(memory.memories) + 64
+
+    for i in range(5):
+        memory.add(item(f"n{i}", importance=0.5))
+    assert "keep" in memory.memories and len(memory.memories) == 5
@@ -0,0 +1,98 @@
+"""chapter8 WorkingMemory 的增量倒排索引与TF-IDF"""
+
+import os
+import sys
+import math
+from collections import Counter
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# chapter8 的记忆模块依赖已安装的 hello_agents.memory
+pytest.importorskip("hello_agents.memory.types")
+
+from chapter8_loader import load_chapter8_module
+
+working_memory = load_chapter8_module("my_working_memory.py", "hello_agents.memory.types")
+InvertedIndex, tokenize = working_memory.InvertedIndex, working_memory.tokenize
+
+DOCS = {
+    0: "Python 异步编程 asyncio 教程",
+    1: "今天北京天气晴朗",
+    2: "python python 性能优化",
+    3: "北京的天气预报与空气质量",
+}
+
+
+def reference_scores(docs, query):
+    """逐条重新计算的TF-IDF余弦相似度与关键词覆盖率"""
+    def weights(text):
+        return {term: 1 + math.log(count) for term, count in Counter(tokenize(text)).items()}
+
+    total = len(docs)
+    df = Counter(term for text in docs.values() for term in set(tokenize(text)))
+    query_counts = Counter(tokenize(query))
+    query_vector = {t: (1 + math.log(c)) * (math.log((1 + total) / (1 + df[t])) + 1)
+                    for t, c in query_counts.items() if df[t]}
+    query_norm = math.sqrt(sum(w * w for w in query_vector.values()))
+    result = {}
+    for doc_id, text in docs.items():
+        doc_vector = weights(text)
+        doc_norm = math.sqrt(sum(w * w for w in doc_vector.values()))
+        dot = sum(w * doc_vector.get(t, 0.0) for t, w in query_vector.items())
+        matched = sum(1 for t in query_counts if t in doc_vector)
+        if matched:
+            result[doc_id] = (dot / (query_norm * doc_norm), matched / len(query_counts))
+    return result
+
+
+def search_dict(index, query):
+    candidates, vector, keyword = index.search(query)
+    return {int(c): (v, k) for c, v, k in zip(candidates, vector, keyword)}
+
+
+def build(docs):
+    index = InvertedIndex()
+    for doc_id, text in docs.items():
+        index.add(doc_id, text)
+    return index
+
+
+def test_tokenize_words_and_cjk_bigrams():
+    assert tokenize("Hello 北京天气, x") == ["hello", "x", "北京", "京天", "天气"]
+    assert tokenize("好") == ["好"]
+
+
+@pytest.mark.parametrize("query", ["北京天气", "python 优化", "asyncio 北京 未知词"])
+def test_scores_match_full_recomputation(query):
+    actual = search_dict(build(DOCS), query)
+    expected = reference_scores(DOCS, query)
+    assert actual.keys() == expected.keys()
+    for doc_id, (vector, keyword) in expected.items():
+        assert actual[doc_id] == pytest.approx((vector, keyword))
+
+
+def test_incremental_updates_match_rebuild():
+    index = build(DOCS)
+    index.remove(1)
+    index.add(2, "北京 python 天气")  # 覆盖已有槽位
+    index.add(5, "天气 天气 天气")
+    docs = {0: DOCS[0], 2: "北京 python 天气", 3: DOCS[3], 5: "天气 天气 天气"}
+
+    assert len(index) == 4 and 1 not in index.doc_terms
+    actual = search_dict(index, "北京天气 python")
+    for doc_id, (vector, keyword) in reference_scores(docs, "北京天气 python").items():
+        assert actual[doc_id] == pytest.approx((vector, keyword))
+    # 删除最后一个包含某词的记忆后，倒排表中不再保留该词
+    index.remove(0)
+    assert "asyncio" not in index.postings
+
+
+def test_queries_without_known_terms_return_no_candidates():
+    index = build(DOCS)
+    for query in ("", "！？", "unknown"):
+        candidates, vector, keyword = index.search(query)
+        assert candidates.size == vector.size == keyword.size == 0
+    assert InvertedIndex().search("北京")[0].size == 0
@@ -0,0 +1,78 @@
+"""chapter8 WorkingMemory 向量化混合评分与逐条计算的一致性"""
+
+import os
+import sys
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# chapter8 的记忆模块依赖已安装的 hello_agents.memory
+memory_base = pytest.importorskip("hello_agents.memory.base")
+
+from chapter8_loader import load_chapter8_module
+
+working_memory = load_chapter8_module("my_working_memory.py", "hello_agents.memory.types")
+
+WORDS = ["北京", "天气", "python", "异步", "会议", "预算", "旅行", "asyncio", "报告", "数据"]
+
+
+def build(count=200, seed=7):
+    rng = random.Random(seed)
+    config = memory_base.MemoryConfig(working_memory_capacity=count, working_memory_ttl=600)
+    memory = working_memory.WorkingMemory(config)
+    for i in range(count):
+        memory.add(memory_base.MemoryItem(
+            id=f"m{i}",
+            content=" ".join(rng.sample(WORDS, 3)),
+            importance=round(rng.uniform(0.05, 1.0), 2),
+            timestamp=datetime.now() - timedelta(minutes=rng.uniform(0, 500)),
+        ))
+    return memory
+
+
+def scalar_ranking(memory, query):
+    """逐条计算的混合评分"""
+    candidates, vector, keyword = memory.index.search(query)
+    scored = []
+    for slot, v, k in zip(candidates.tolist(), vector.tolist(), keyword.tolist()):
+        item = memory._slot_items[slot]
+        base = v * 0.7 + k * 0.3 if v > 0 else k
+        score = base * memory._calculate_time_decay(item.timestamp) * (0.8 + item.importance * 0.4)
+        if score > 0:
+            scored.append((score, item.id))
+    return scored
+
+
+@pytest.mark.parametrize("query", ["北京天气", "python asyncio 报告", "预算"])
+def test_vectorized_ranking_matches_scalar_scoring(query):
+    memory = build()
+    expected = sorted(scalar_ranking(memory, query), key=lambda pair: -pair[0])
+    retrieved = [item.id for item in memory.retrieve(query, limit=10)]
+    scores = dict((memory_id, score) for score, memory_id in expected)
+
+    assert len(retrieved) == 10 and len(set(retrieved)) == 10
+    assert [scores[m] for m in retrieved] == pytest.approx([score for score, _ in expected[:10]])
+
+
+def test_limit_and_empty_results():
+    memory = build(count=20)
+    total = len(scalar_ranking(memory, "北京"))
+    assert len(memory.retrieve("北京", limit=100)) == total
+    assert memory.retrieve("北京", limit=0) == []
+    assert memory.retrieve("完全无关的查询 zzz") == []
+
+
+def test_slots_are_reused_after_removal():
+    memory = build(count=20)
+    for i in range(10):
+        memory.remove(f"m{i}")
+    memory.add(memory_base.MemoryItem(id="new", content="北京 天气", importance=1.0, timestamp=datetime.now()))
+
+    assert len(memory._slot_items) == 20
+    results = memory.retrieve("北京天气", limit=20)
+    assert results[0].id == "new"
+    assert all(item.id not in {f"m{i}" for i in range(10)} for item in results)